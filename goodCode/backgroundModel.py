@@ -0,0 +1,167 @@
+from collections import deque
+
+import cv2
+import numpy as np
+
+from detection import create_background_subtractor
+
+# Every backend follows the OpenCV subtractor interface: apply(frame, learningRate)
+# returns a uint8 mask that is non-zero where the pixel is foreground, and a
+# learningRate of 0 leaves the model untouched.
+
+
+class KnnSubtractor:
+    """OpenCV's K-nearest-neighbours model, with the same history and shadow handling as MOG2"""
+
+    # OpenCV's KNN derives its sample update periods from log(1 - learningRate), so
+    # a rate of exactly 0 stops it detecting anything; this is frozen in practice
+    FROZEN_LEARNING_RATE = 1e-6
+
+    def __init__(self):
+        self.model = cv2.createBackgroundSubtractorKNN(history=800, dist2Threshold=400, detectShadows=True)
+
+    def apply(self, image, learningRate=-1):
+        if learningRate == 0:
+            learningRate = self.FROZEN_LEARNING_RATE
+        return self.model.apply(image, learningRate=learningRate)
+
+
+class RunningAverageSubtractor:
+    """Exponential running average of the grayscale frame, thresholded frame difference"""
+
+    def __init__(self, threshold=25, default_learning_rate=0.05):
+        self.threshold = threshold
+        self.default_learning_rate = default_learning_rate
+        self.background = None
+
+    def apply(self, image, learningRate=-1):
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        if self.background is None:
+            self.background = gray.astype(np.float32)
+            return np.zeros_like(gray)
+
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self.background))
+        _, mask = cv2.threshold(diff, self.threshold, 255, cv2.THRESH_BINARY)
+
+        rate = self.default_learning_rate if learningRate < 0 else learningRate
+        if rate > 0:
+            cv2.accumulateWeighted(gray, self.background, min(rate, 1.0))
+        return mask
+
+
+def median_image(images):
+    """Per-pixel median of an odd number of equally sized images
+
+    A partial bubble-sort network of cv2.min/cv2.max that stops once the middle
+    element is in place; far cheaper than np.median over a stack.
+    """
+    images = list(images)
+    n = len(images)
+    for i in range(n // 2 + 1):
+        for j in range(n - 1 - i):
+            low = cv2.min(images[j], images[j + 1])
+            images[j + 1] = cv2.max(images[j], images[j + 1])
+            images[j] = low
+    return images[n - 1 - n // 2]
+
+
+class MedianSubtractor:
+    """Median of the last N sampled frames on downscaled grayscale
+
+    Frames are sampled every sample_interval calls while learning, or on every
+    call when the learning rate is at least fast_learning_rate. The mask is
+    scaled back up to the input size.
+    """
+
+    def __init__(self, samples=9, sample_interval=5, downscale=2, threshold=25, fast_learning_rate=0.1):
+        self.samples = deque(maxlen=samples if samples % 2 else samples + 1)
+        self.sample_interval = sample_interval
+        self.downscale = downscale
+        self.threshold = threshold
+        self.fast_learning_rate = fast_learning_rate
+        self.calls = 0
+        self.background = None
+
+    def apply(self, image, learningRate=-1):
+        height, width = image.shape[:2]
+        small = cv2.resize(image, (width // self.downscale, height // self.downscale), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+        self.calls += 1
+        if self.background is None:
+            mask = np.zeros_like(gray)
+        else:
+            diff = cv2.absdiff(gray, self.background)
+            _, mask = cv2.threshold(diff, self.threshold, 255, cv2.THRESH_BINARY)
+
+        learning = learningRate != 0
+        if learning and (learningRate >= self.fast_learning_rate or self.calls % self.sample_interval == 0
+                         or self.background is None):
+            self.samples.append(gray)
+            if len(self.samples) % 2:
+                self.background = median_image(self.samples)
+
+        return cv2.resize(mask, (width, height), interpolation=cv2.INTER_NEAREST)
+
+
+BACKENDS = {
+    "mog2": create_background_subtractor,
+    "knn": KnnSubtractor,
+    "running_average": RunningAverageSubtractor,
+    "median": MedianSubtractor,
+}
+
+
+def create_background_model(backend="mog2"):
+    """A fresh background subtractor of the named kind, see BACKENDS"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown background backend {backend!r}, choose from {', '.join(BACKENDS)}")
+    return BACKENDS[backend]()
+
+
+class BackgroundModelManager:
+    """One background model that stays warm across red and green light
+
+    During green light the model keeps learning the scene. When red light
+    starts it spends settle_time absorbing the poses players froze in, then
+    every frame is checked for motion against it while it keeps learning at
+    red_learning_rate. That is slow enough that a moving player still shows
+    up, but lighting drift and a player who moved once and froze again fade
+    out instead of triggering for the rest of the phase. The model is never
+    recreated, so red light no longer starts from a cold model.
+    """
+
+    def __init__(self, motion_detector, backend="mog2", green_learning_rate=0.01,
+                 settle_learning_rate=0.3, settle_time=0.5, red_learning_rate=0.002):
+        self.motion_detector = motion_detector
+        self.backend = backend
+        self.subtractor = create_background_model(backend)
+        self.green_learning_rate = green_learning_rate
+        self.settle_learning_rate = settle_learning_rate
+        self.settle_time = settle_time
+        self.red_learning_rate = red_learning_rate
+        self.red_start_time = None
+
+    def start_red(self, elapsed_time):
+        self.red_start_time = elapsed_time
+
+    def start_green(self):
+        self.red_start_time = None
+
+    def settle_remaining(self, elapsed_time):
+        """Seconds of red light left before detection starts; 0 once detecting or during green"""
+        if self.red_start_time is None:
+            return 0.0
+        return max(0.0, self.settle_time - (elapsed_time - self.red_start_time))
+
+    def learn(self, frame):
+        """Green light: keep the model trained on the scene"""
+        self.motion_detector.learn(self.subtractor, frame, self.green_learning_rate)
+
+    def settle(self, frame):
+        """Start of red light: quickly absorb where everyone stopped"""
+        self.motion_detector.learn(self.subtractor, frame, self.settle_learning_rate)
+
+    def detect(self, frame):
+        """Red light: MotionGroups against the slowly learning model"""
+        return self.motion_detector.detect(self.subtractor, frame, self.red_learning_rate)
@@ -0,0 +1,82 @@
+"""
+Compare background subtraction backends on the same footage: cost per frame and
+how often each one makes the same trigger decision as MOG2.
+
+Each backend plays the full game loop headless, with green light learning,
+red light settling and then detecting, so the decisions are the ones the
+turret would act on.
+
+Usage: python benchmarkBackgrounds.py [video file | image directory | synthetic] [max frames] [fps]
+"""
+import io
+import sys
+from contextlib import redirect_stdout
+import time
+
+import numpy as np
+
+from backgroundModel import BACKENDS
+from detection import MotionDetector
+from frameSource import open_frames
+from gameLoop import GameLoop, NullMusic
+from replay import FRAME_SIZE, ANALYSIS_SIZE, MOTION_THRESHOLD, TRIGGER_AREA, CYCLE_DURATION
+from stageTimer import stage_timer
+
+
+def run_backend(backend, source, max_frames, fps):
+    """Per-frame trigger decisions (None outside red-light detection), step times and background times"""
+    clock = {"now": 0.0}
+    motion_detector = MotionDetector(frame_size=FRAME_SIZE, analysis_size=ANALYSIS_SIZE,
+                                     motion_threshold=MOTION_THRESHOLD, trigger_area=TRIGGER_AREA)
+    game = GameLoop(motion_detector, trigger_fn=lambda event: None,
+                    cycle_music=NullMusic(clock=lambda: clock["now"], cycle_duration=CYCLE_DURATION),
+                    frame_size=FRAME_SIZE, cycle_duration=CYCLE_DURATION, recording_duration=None,
+                    background_backend=backend, show_hud=False)
+
+    decisions = []
+    step_times = []
+    stage_timer.reset()
+    for i, frame in enumerate(open_frames(source, FRAME_SIZE)):
+        if i >= max_frames:
+            break
+        clock["now"] = i / fps
+        start = time.perf_counter()
+        groups = game.step(frame, clock["now"])
+        step_times.append(time.perf_counter() - start)
+
+        model = game.background_model
+        detecting = game.previous_detection_state and model.settle_remaining(clock["now"]) == 0
+        decisions.append(motion_detector.should_trigger(groups) if detecting else None)
+
+    background_times = np.array(stage_timer.samples.get("background", [0]), dtype=np.float64) / 1e6
+    return decisions, step_times, background_times, len(game.trigger_events)
+
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 else "synthetic"
+    max_frames = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+    fps = float(sys.argv[3]) if len(sys.argv) > 3 else 20.0
+
+    stage_timer.enabled = True
+    stage_timer.window = max_frames
+    results = {}
+    for backend in BACKENDS:
+        # The game loop narrates phase changes; keep the report readable
+        with redirect_stdout(io.StringIO()):
+            results[backend] = run_backend(backend, source, max_frames, fps)
+
+    print(f"Background backends on {source}, {max_frames} frames at {fps:g} fps game time")
+    reference = results["mog2"][0]
+    for backend, (decisions, step_times, background_times, triggers) in results.items():
+        compared = [(a, b) for a, b in zip(reference, decisions) if a is not None and b is not None]
+        agree = sum(a == b for a, b in compared)
+        agreement = f"{100 * agree / len(compared):.1f}%" if compared else "n/a"
+        print(f"\n{backend}:")
+        print(f"  background {np.mean(background_times):.2f} ms/frame (p95 {np.percentile(background_times, 95):.2f}), "
+              f"whole step {np.mean(step_times) * 1000:.2f} ms/frame")
+        print(f"  trigger agreement with mog2: {agreement} of {len(compared)} red-light frames, "
+              f"{triggers} triggers fired")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark contour grouping on scenes with many blobs: the original greedy
+pairwise grouping against the grid + union-find clustering in clustering.py.
+
+Usage: python benchmarkClustering.py
+"""
+import math
+import time
+
+import cv2
+import numpy as np
+
+from clustering import cluster_contours
+
+MAX_DISTANCE = 25
+RUNS = 20
+
+
+def legacy_group_nearby_contours(contours, max_distance, min_group_area):
+    """The grouping motionDetection.py used to redefine on every frame, kept for comparison"""
+    centers = []
+    for contour in contours:
+        M = cv2.moments(contour)
+        if M["m00"] != 0:
+            centers.append((int(M["m10"] / M["m00"]), int(M["m01"] / M["m00"]), contour))
+
+    groups = []
+    used = set()
+    for i, (cx1, cy1, contour1) in enumerate(centers):
+        if i in used:
+            continue
+        group = [(cx1, cy1, contour1)]
+        used.add(i)
+        for j, (cx2, cy2, contour2) in enumerate(centers[i+1:], i+1):
+            if j in used:
+                continue
+            if math.sqrt((cx1 - cx2)**2 + (cy1 - cy2)**2) <= max_distance:
+                group.append((cx2, cy2, contour2))
+                used.add(j)
+        total_area = sum(cv2.contourArea(item[2]) for item in group)
+        if total_area > min_group_area:
+            groups.append(group)
+
+    # The per-group summary the detection loop computed afterwards
+    summary = []
+    for group in groups:
+        group_area = sum(cv2.contourArea(item[2]) for item in group)
+        weighted_x = sum(item[0] * cv2.contourArea(item[2]) for item in group) / group_area
+        weighted_y = sum(item[1] * cv2.contourArea(item[2]) for item in group) / group_area
+        summary.append((weighted_x, weighted_y, group_area))
+    return summary
+
+
+def blob_scene(blob_count, size=(640, 360), seed=0):
+    rng = np.random.default_rng(seed)
+    mask = np.zeros((size[1], size[0]), dtype=np.uint8)
+    for _ in range(blob_count):
+        center = (int(rng.integers(0, size[0])), int(rng.integers(0, size[1])))
+        axes = (int(rng.integers(2, 8)), int(rng.integers(2, 8)))
+        cv2.ellipse(mask, center, axes, 0, 0, 360, 255, -1)
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    return list(contours)
+
+
+def time_call(fn, *args):
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        result = fn(*args)
+    return (time.perf_counter() - start) / RUNS, result
+
+
+def main():
+    print(f"Grouping contours within {MAX_DISTANCE}px, mean of {RUNS} runs")
+    for blob_count in (10, 100, 300, 1000):
+        contours = blob_scene(blob_count)
+        legacy_time, legacy = time_call(legacy_group_nearby_contours, contours, MAX_DISTANCE, 0)
+        new_time, clusters = time_call(cluster_contours, contours, MAX_DISTANCE, 0)
+        print(f"  {len(contours):4d} contours: legacy {legacy_time * 1000:7.2f} ms ({len(legacy)} groups), "
+              f"clustering {new_time * 1000:6.2f} ms ({len(clusters)} groups), "
+              f"{legacy_time / new_time:5.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
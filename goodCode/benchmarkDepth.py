@@ -0,0 +1,89 @@
+"""
+Compare the local depth model backends: load time, per-inference latency and
+how closely each one's depth map agrees with the eager fp32 model.
+
+Needs the files from 'python depthModel.py export'; backends whose runtime
+or model file is missing are reported and skipped.
+
+Usage: python benchmarkDepth.py [video file | image directory | synthetic] [inferences] [threads] [WIDTHxHEIGHT]
+"""
+import sys
+import time
+
+import numpy as np
+
+from depthModel import DEPTH_BACKENDS, INPUT_SIZE, load_depth_model
+from frameSource import open_frames
+
+FRAME_SIZE = (1280, 720)
+WARMUP_INFERENCES = 3
+
+
+def load_frames(source, count):
+    frames = []
+    for frame in open_frames(source, FRAME_SIZE):
+        frames.append(frame)
+        if len(frames) >= count:
+            break
+    return frames
+
+
+def run_backend(backend, frames, inferences, threads, input_size):
+    """(load seconds, inference times, predictions) or None if the backend cannot load here"""
+    try:
+        model = load_depth_model(backend, input_size=input_size, threads=threads)
+    except Exception as e:
+        print(f"  {backend:12s} skipped: {e}")
+        return None
+
+    for frame in frames[:WARMUP_INFERENCES]:
+        model.estimate(frame)
+
+    timings = []
+    predictions = []
+    for i in range(inferences):
+        frame = frames[i % len(frames)]
+        start = time.perf_counter()
+        prediction = model.estimate(frame)
+        timings.append(time.perf_counter() - start)
+        if i < len(frames):
+            predictions.append(prediction)
+    return model.load_time, timings, predictions
+
+
+def agreement(reference, predictions):
+    """Mean correlation between depth maps; MiDaS depth is relative, so scale does not matter"""
+    scores = [np.corrcoef(a.ravel(), b.ravel())[0, 1] for a, b in zip(reference, predictions)]
+    return float(np.mean(scores))
+
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 else "synthetic"
+    inferences = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    threads = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    input_size = tuple(int(v) for v in sys.argv[4].split("x")) if len(sys.argv) > 4 else INPUT_SIZE
+
+    frames = load_frames(source, min(inferences, 10))
+    if not frames:
+        print("No frames to benchmark")
+        return
+
+    print(f"Benchmarking depth backends on {source}: {inferences} inferences at "
+          f"{input_size[0]}x{input_size[1]}, threads {threads or 'default'}")
+    results = {}
+    for backend in DEPTH_BACKENDS:
+        result = run_backend(backend, frames, inferences, threads, input_size)
+        if result is not None:
+            results[backend] = result
+
+    reference = results.get("eager", (None, None, None))[2]
+    print(f"\n{'backend':12s} {'load s':>7s} {'mean ms':>8s} {'p50 ms':>7s} {'p95 ms':>7s} {'vs eager':>9s}")
+    for backend, (load_time, timings, predictions) in results.items():
+        ms = np.array(timings) * 1000
+        p50, p95 = np.percentile(ms, [50, 95])
+        match = f"{agreement(reference, predictions):9.4f}" if reference is not None else f"{'-':>9s}"
+        print(f"{backend:12s} {load_time:7.2f} {ms.mean():8.1f} {p50:7.1f} {p95:7.1f} {match}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark blob filtering: the original per-contour loop against the batched
+feature extraction in blobFeatures.py, on clean and noisy foreground masks.
+
+Usage: python benchmarkFeatures.py
+"""
+import time
+
+import cv2
+import numpy as np
+
+from blobFeatures import BlobFilter, extract_features
+
+MIN_AREA = 1750  # motion_threshold at 640x360
+RUNS = 10
+
+
+def legacy_valid_contours(fg_mask, min_area):
+    """The filter loop motionDetection.py used to run, kept for comparison"""
+    contours, _ = cv2.findContours(fg_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    valid = []
+    for contour in contours:
+        area = cv2.contourArea(contour)
+        if area > min_area:
+            x, y, w, h = cv2.boundingRect(contour)
+            aspect_ratio = w / h if h > 0 else 0
+            if 0.3 < aspect_ratio < 3.0:
+                hull_area = cv2.contourArea(cv2.convexHull(contour))
+                solidity = area / hull_area if hull_area > 0 else 0
+                if solidity > 0.5:
+                    perimeter = cv2.arcLength(contour, True)
+                    if perimeter > 0 and 4 * np.pi * area / (perimeter * perimeter) > 0.3:
+                        valid.append((x, y, w, h))
+    return sorted(valid)
+
+
+def make_mask(noise, seed=0, size=(640, 360)):
+    """A few person-sized blobs plus salt noise covering `noise` of the frame"""
+    rng = np.random.default_rng(seed)
+    mask = ((rng.random((size[1], size[0])) < noise) * 255).astype(np.uint8)
+    for _ in range(4):
+        center = (int(rng.integers(0, size[0])), int(rng.integers(0, size[1])))
+        axes = (int(rng.integers(20, 60)), int(rng.integers(30, 80)))
+        cv2.ellipse(mask, center, axes, 0, 0, 360, 255, -1)
+    return mask
+
+
+def time_call(fn):
+    start = time.perf_counter()
+    for _ in range(RUNS):
+        fn()
+    return (time.perf_counter() - start) / RUNS * 1000
+
+
+def main():
+    blob_filter = BlobFilter(MIN_AREA)
+    print(f"Blob filtering at 640x360, mean of {RUNS} runs")
+    for label, noise in (("clean", 0.0), ("some noise", 0.02), ("lighting change", 0.3)):
+        mask = make_mask(noise)
+        features = extract_features(mask, blob_filter)
+        batched = sorted((int(r["x"]), int(r["y"]), int(r["w"]), int(r["h"]))
+                         for r in features[blob_filter.mask(features)])
+        agree = "same result" if batched == legacy_valid_contours(mask, MIN_AREA) else "RESULTS DIFFER"
+
+        legacy_ms = time_call(lambda: legacy_valid_contours(mask, MIN_AREA))
+        batched_ms = time_call(lambda: extract_features(mask, blob_filter))
+        print(f"  {label:15s} {len(features):6d} blobs: legacy {legacy_ms:6.2f} ms, "
+              f"batched {batched_ms:6.2f} ms, {agree}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Serial round-trip latency to the Pico: "ping:<nonce>" commands answered at
+once by the firmware with its monotonic_ns.
+
+Pings go through MotorClient, the same writer/reader threads a trigger
+takes, so the RTT is the host-side cost of "motion detected" up to the
+firmware acting on the command: queueing, USB CDC, the firmware's
+serial_bytes_available polling and line parsing, and the reply coming back.
+Each (rate, payload size) pair is one run; rate 0 sends the next ping as
+soon as the previous reply is in, other rates send open loop at that many
+pings per second. Payloads over the firmware's 64 characters per loop pass
+take more than one pass to read.
+
+The board clock offset comes from the fastest 10% of pings, where the
+reply is least delayed: for each, board time minus the midpoint of send and
+receive, NTP style. Their spread over the run gives the drift.
+
+Without --port the pings go to a fake board on a pseudo-terminal, which is
+enough for CI and for seeing the host's own share of the latency.
+
+Usage: python benchmarkPing.py [--port /dev/cu.usbmodem11401] [--binary] [--reset]
+                               [--count 500] [--rates 0,100,500] [--sizes 8,64,256]
+"""
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from motorClient import MotorClient, open_binary_client
+from serialLink import open_ready
+
+
+def make_nonce(index, size):
+    """Nonce of exactly size characters that starts with the ping's index"""
+    nonce = f"{index:06d}"
+    return nonce + "x" * max(0, size - len(nonce))
+
+
+def parse_pong(reply, nonce):
+    """Board monotonic_ns from "pong:<nonce>:<ns>", or None if it is not this ping's echo"""
+    prefix = f"pong:{nonce}:"
+    if not reply.startswith(prefix):
+        return None
+    try:
+        return int(reply[len(prefix):])
+    except ValueError:
+        return None
+
+
+def run_pings(client, count, rate, size, timeout=2.0):
+    """Send count pings; returns (samples, lost) with samples as (send_ns, receive_ns, board_ns)"""
+    sends = [0] * count
+    receives = [0] * count
+    done = threading.Semaphore(0)
+    futures = []
+
+    def received(index):
+        def callback(future):
+            receives[index] = time.monotonic_ns()
+            done.release()
+        return callback
+
+    start = time.monotonic()
+    for index in range(count):
+        if rate:
+            delay = start + index / rate - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        nonce = make_nonce(index, size)
+        sends[index] = time.monotonic_ns()
+        future = client.send(f"ping:{nonce}")
+        future.add_done_callback(received(index))
+        futures.append((nonce, future))
+        if not rate:
+            done.acquire(timeout=timeout)
+
+    samples = []
+    lost = 0
+    for index, (nonce, future) in enumerate(futures):
+        try:
+            board_ns = parse_pong(future.result(timeout=timeout), nonce)
+        except Exception:
+            board_ns = None
+        if board_ns is None:
+            lost += 1
+        else:
+            samples.append((sends[index], receives[index], board_ns))
+    return samples, lost
+
+
+def rtt_stats(samples):
+    """Percentiles, max and jitter of the round trips in milliseconds
+
+    Jitter is the mean difference between consecutive round trips, as RTP
+    reports it; std is over the whole run.
+    """
+    rtt = np.array([receive - send for send, receive, _ in samples], dtype=np.float64) / 1e6
+    p50, p90, p99 = np.percentile(rtt, [50, 90, 99])
+    jitter = float(np.abs(np.diff(rtt)).mean()) if len(rtt) > 1 else 0.0
+    return {"p50": p50, "p90": p90, "p99": p99, "max": rtt.max(), "jitter": jitter, "std": rtt.std()}
+
+
+def estimate_clock(samples, fraction=0.1):
+    """(offset_ns, uncertainty_ns, drift_ppm) of the board clock relative to the host's
+
+    board time = host time + offset. The uncertainty is half the fastest
+    round trip: the ping could have been stamped anywhere in it.
+    """
+    rtt = np.array([receive - send for send, receive, _ in samples], dtype=np.float64)
+    fast = np.argsort(rtt)[:max(2, int(len(samples) * fraction))]
+    midpoints = np.array([(samples[i][0] + samples[i][1]) / 2 for i in fast])
+    offsets = np.array([samples[i][2] for i in fast], dtype=np.float64) - midpoints
+    drift_ppm = 0.0
+    if np.ptp(midpoints) > 0:
+        drift_ppm = float(np.polyfit(midpoints - midpoints.min(), offsets, 1)[0] * 1e6)
+    return float(np.median(offsets)), float(rtt.min() / 2), drift_ppm
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Round-trip latency to the Pico's firmware")
+    parser.add_argument("--port", default=None, help="Pico console port; a pty fake board is used if not given")
+    parser.add_argument("--binary", action="store_true", help="ping over the binary data channel")
+    parser.add_argument("--reset", action="store_true", help="restart code.py before measuring")
+    parser.add_argument("--count", type=int, default=500, help="pings per rate and size")
+    parser.add_argument("--rates", default="0,100,500", help="pings per second, 0 = back to back")
+    parser.add_argument("--sizes", default="8,64,256", help="nonce sizes in characters")
+    args = parser.parse_args()
+    rates = [float(rate) for rate in args.rates.split(",")]
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    board = None
+    port = args.port
+    if port is None:
+        from fakeSerial import PtyBoard
+        board = PtyBoard()
+        port = board.port
+        print(f"Fake board on {port}")
+
+    ser = open_ready(port, reset=args.reset)
+    console_client = MotorClient(ser)
+    client = console_client
+    if args.binary:
+        client = open_binary_client(console_client, port) or console_client
+
+    all_samples = []
+    print(f"\n{'rate/s':>8s} {'size':>5s} {'pings':>6s} {'lost':>5s}   "
+          f"{'p50':>7s} {'p90':>7s} {'p99':>7s} {'max':>7s} {'jitter':>7s} {'std':>7s}  (ms)")
+    try:
+        for size in sizes:
+            for rate in rates:
+                samples, lost = run_pings(client, args.count, rate, size)
+                all_samples.extend(samples)
+                label = f"{rate:g}" if rate else "b2b"
+                if not samples:
+                    print(f"{label:>8s} {size:5d} {0:6d} {lost:5d}   no replies")
+                    continue
+                stats = rtt_stats(samples)
+                print(f"{label:>8s} {size:5d} {len(samples):6d} {lost:5d}   {stats['p50']:7.3f} {stats['p90']:7.3f} "
+                      f"{stats['p99']:7.3f} {stats['max']:7.3f} {stats['jitter']:7.3f} {stats['std']:7.3f}")
+    finally:
+        if client is not console_client:
+            client.close()
+            client.ser.close()
+            console_client.command("binary:off", timeout=1.0)
+        console_client.close()
+        ser.close()
+        if board is not None:
+            board.close()
+
+    if len(all_samples) >= 2:
+        offset, uncertainty, drift = estimate_clock(all_samples)
+        print(f"\nBoard clock = host monotonic {offset / 1e9:+.6f} s (+/- {uncertainty / 1e6:.3f} ms), "
+              f"drift {drift:+.1f} ppm over {len(all_samples)} pings")
+
+
+if __name__ == "__main__":
+    main()
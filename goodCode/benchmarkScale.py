@@ -0,0 +1,83 @@
+"""
+Compare motion detection at different analysis resolutions against full resolution.
+
+Usage: python benchmarkScale.py [video file | image directory | synthetic] [max frames]
+"""
+import sys
+import time
+
+import numpy as np
+
+from detection import MotionDetector, create_background_subtractor
+from frameSource import open_frames
+
+FRAME_SIZE = (1280, 720)
+ANALYSIS_SIZES = [(1280, 720), (640, 360), (320, 180)]
+WARMUP_FRAMES = 30
+
+
+def run_detector(source, analysis_size, max_frames):
+    detector = MotionDetector(frame_size=FRAME_SIZE, analysis_size=analysis_size)
+    subtractor = create_background_subtractor()
+    results = []
+    timings = []
+
+    for i, frame in enumerate(open_frames(source, FRAME_SIZE)):
+        if i >= max_frames:
+            break
+        if i < WARMUP_FRAMES:
+            detector.learn(subtractor, frame, 0.3)
+            continue
+        start = time.perf_counter()
+        groups = detector.detect(subtractor, frame)
+        timings.append(time.perf_counter() - start)
+        results.append(groups)
+
+    return results, timings
+
+
+def centroid_error(reference, groups):
+    """Mean distance from each reference centroid to the nearest centroid in groups"""
+    if not reference or not groups:
+        return None
+    points = np.array([(g.center_x, g.center_y) for g in groups], dtype=np.float64)
+    errors = []
+    for ref in reference:
+        errors.append(np.min(np.hypot(points[:, 0] - ref.center_x, points[:, 1] - ref.center_y)))
+    return float(np.mean(errors))
+
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 else "synthetic"
+    max_frames = int(sys.argv[2]) if len(sys.argv) > 2 else 300
+
+    print(f"Benchmarking analysis scales on {source}")
+    reference = None
+    for size in ANALYSIS_SIZES:
+        results, timings = run_detector(source, size, max_frames)
+        if not timings:
+            print("Not enough frames to benchmark")
+            return
+        if reference is None:
+            reference = results
+
+        count = min(len(reference), len(results))
+        motion_agree = sum(bool(reference[i]) == bool(results[i]) for i in range(count))
+        trigger_agree = sum(
+            (sum(g.area for g in reference[i]) > 10000) == (sum(g.area for g in results[i]) > 10000)
+            for i in range(count)
+        )
+        errors = [centroid_error(reference[i], results[i]) for i in range(count)]
+        errors = [e for e in errors if e is not None]
+
+        mean_ms = np.mean(timings) * 1000
+        print(f"\n{size[0]}x{size[1]}:")
+        print(f"  {mean_ms:.2f} ms/frame ({1000 / mean_ms:.1f} fps), p95 {np.percentile(timings, 95) * 1000:.2f} ms")
+        print(f"  motion agreement:  {100 * motion_agree / count:.1f}%")
+        print(f"  trigger agreement: {100 * trigger_agree / count:.1f}%")
+        if errors:
+            print(f"  centroid error:    {np.mean(errors):.1f} px (mean over matched frames)")
+
+
+if __name__ == "__main__":
+    main()
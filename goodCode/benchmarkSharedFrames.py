@@ -0,0 +1,173 @@
+"""
+Compare handing 1280x720 frames to two reader processes (depth and detection)
+through the shared-memory SharedFramePool against pickling them through
+multiprocessing.Queue.
+
+The writer stamps each frame with its number; readers check the stamp before
+and after "processing" a frame, so a slot reused under a reader shows up as
+a torn read. The two do not deliver the same frames: pool readers always
+take the newest frame and skip whatever arrived while they were busy,
+queue readers get every frame from a two-deep queue per reader and hold
+the writer back instead. Compare frames delivered per reader alongside
+the fps, not the fps alone.
+
+Usage: python benchmarkSharedFrames.py [frames] [reader work ms]
+"""
+import multiprocessing
+import sys
+import time
+
+import numpy as np
+
+from sharedFrames import SharedFramePool
+
+FRAME_SHAPE = (720, 1280, 3)
+READERS = ("depth", "detection")
+QUEUE_DEPTH = 2
+
+
+def make_frames():
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 256, FRAME_SHAPE, dtype=np.uint8) for _ in range(4)]
+
+
+def stamp(frame, number):
+    frame[0, :8, 0] = np.frombuffer(np.int64(number).tobytes(), dtype=np.uint8)
+
+
+def read_stamp(frame):
+    return int(np.frombuffer(frame[0, :8, 0].tobytes(), dtype=np.int64)[0])
+
+
+def work(frame, work_ms):
+    """Stand-in for a reader's processing: touch the frame, then hold it for work_ms"""
+    checksum = int(frame[::16, ::16].sum())
+    if work_ms:
+        time.sleep(work_ms / 1000)
+    return checksum
+
+
+def pool_writer(pool, frames, count, done):
+    for number in range(1, count + 1):
+        slot, view = pool.begin_write()
+        if slot is None:
+            continue
+        np.copyto(view, frames[number % len(frames)])
+        stamp(view, number)
+        pool.commit_write(slot, time.perf_counter())
+    done.set()
+    pool.close()
+
+
+def pool_reader(pool, done, work_ms, results):
+    received = 0
+    torn = 0
+    latencies = []
+    last = 0
+    while True:
+        finished = done.is_set()  # checked first, like pool_frames(): the last frame is not missed
+        frame = pool.acquire_latest(after=last, timeout=0.05)
+        if frame is None:
+            if finished:
+                break
+            continue
+        latencies.append(time.perf_counter() - frame.capture_time)
+        before = read_stamp(frame.frame)
+        work(frame.frame, work_ms)
+        if before != frame.frame_number or read_stamp(frame.frame) != before or frame.is_stale():
+            torn += 1
+        last = frame.frame_number
+        pool.release(frame)
+        received += 1
+    del frame
+    results.put((received, torn, latencies))
+    pool.close()
+
+
+def queue_writer(queues, frames, count):
+    for number in range(1, count + 1):
+        frame = frames[number % len(frames)].copy()
+        stamp(frame, number)
+        for q in queues:
+            q.put((number, time.perf_counter(), frame))
+    for q in queues:
+        q.put(None)
+
+
+def queue_reader(q, work_ms, results):
+    received = 0
+    torn = 0
+    latencies = []
+    while True:
+        item = q.get()
+        if item is None:
+            break
+        number, capture_time, frame = item
+        latencies.append(time.perf_counter() - capture_time)
+        work(frame, work_ms)
+        if read_stamp(frame) != number:
+            torn += 1
+        received += 1
+    results.put((received, torn, latencies))
+
+
+def run_pool(frames, count, work_ms):
+    pool = SharedFramePool(slots=len(READERS) + 2, shape=FRAME_SHAPE)
+    done = multiprocessing.Event()
+    results = multiprocessing.Queue()
+    readers = [multiprocessing.Process(target=pool_reader, args=(pool, done, work_ms, results), name=name)
+               for name in READERS]
+    writer = multiprocessing.Process(target=pool_writer, args=(pool, frames, count, done))
+    start = time.perf_counter()
+    seconds = run_processes(writer, readers, start)
+    reports = [results.get() for _ in readers]
+    drops = pool.writer_drops.value
+    pool.close()
+    return seconds, reports, drops
+
+
+def run_queue(frames, count, work_ms):
+    queues = [multiprocessing.Queue(maxsize=QUEUE_DEPTH) for _ in READERS]
+    results = multiprocessing.Queue()
+    readers = [multiprocessing.Process(target=queue_reader, args=(q, work_ms, results), name=name)
+               for name, q in zip(READERS, queues)]
+    writer = multiprocessing.Process(target=queue_writer, args=(queues, frames, count))
+    start = time.perf_counter()
+    seconds = run_processes(writer, readers, start)
+    return seconds, [results.get() for _ in readers], 0
+
+
+def run_processes(writer, readers, start):
+    for reader in readers:
+        reader.start()
+    writer.start()
+    writer.join()
+    for reader in readers:
+        reader.join()
+    return time.perf_counter() - start
+
+
+def print_result(name, count, seconds, reports, drops):
+    print(f"\n{name}: writer done with {count} frames in {seconds:.2f}s ({count / seconds:.1f} fps)")
+    if drops:
+        print(f"  writer dropped {drops} frames with every slot pinned")
+    for reader, (received, torn, latencies) in zip(READERS, reports):
+        ms = np.array(latencies) * 1000 if latencies else np.zeros(1)
+        p50, p95 = np.percentile(ms, [50, 95])
+        print(f"  {reader:10s} delivered {received:5d}/{count} ({100 * received / count:5.1f}%, "
+              f"{received / seconds:6.1f} fps)  latency p50 {p50:6.2f} ms  p95 {p95:6.2f} ms  torn reads {torn}")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    work_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0
+
+    frames = make_frames()
+    frame_mb = frames[0].nbytes / 1e6
+    print(f"Moving {count} frames of {frame_mb:.1f} MB to {len(READERS)} readers, {work_ms:g} ms work per frame")
+    print_result("multiprocessing.Queue", count, *run_queue(frames, count, work_ms))
+    print_result("SharedFramePool", count, *run_pool(frames, count, work_ms))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import cv2
+import numpy as np
+
+# One row per connected blob in a foreground mask. The shape descriptors after
+# pixel_area are only computed for blobs that pass the cheap pre-filter and are
+# NaN for the rest.
+FEATURE_DTYPE = np.dtype([
+    ("label", np.int32),
+    ("x", np.int32),
+    ("y", np.int32),
+    ("w", np.int32),
+    ("h", np.int32),
+    ("pixel_area", np.int32),
+    ("aspect", np.float64),
+    ("area", np.float64),
+    ("hull_area", np.float64),
+    ("solidity", np.float64),
+    ("perimeter", np.float64),
+    ("circularity", np.float64),
+    ("cx", np.float64),
+    ("cy", np.float64),
+])
+
+
+class BlobFilter:
+    """Thresholds for keeping a blob, applied as vector masks over a feature array
+
+    min_area is in the pixels of the mask being analysed. Swap or tune any of
+    these without touching the detection loop.
+    """
+
+    def __init__(self, min_area, aspect_range=(0.3, 3.0), min_solidity=0.5, min_circularity=0.3):
+        self.min_area = min_area
+        self.aspect_range = aspect_range
+        self.min_solidity = min_solidity
+        self.min_circularity = min_circularity
+
+    def prefilter(self, features):
+        """Cheap mask from connected-component stats alone
+
+        The bounding box is an upper bound on the contour area, so nothing that
+        could pass the full filter is dropped here.
+        """
+        low, high = self.aspect_range
+        return ((features["w"] * features["h"] > self.min_area)
+                & (features["aspect"] > low) & (features["aspect"] < high))
+
+    def mask(self, features):
+        with np.errstate(invalid="ignore"):
+            return (self.prefilter(features)
+                    & (features["area"] > self.min_area)
+                    & (features["solidity"] > self.min_solidity)
+                    & (features["circularity"] > self.min_circularity))
+
+
+def extract_features(fg_mask, blob_filter):
+    """Describe every blob in a binary mask in one batched pass
+
+    connectedComponentsWithStats gives the label, bounding box and pixel area of
+    all blobs at once. Contours, hulls, perimeters and moments are then only
+    computed for blobs that survive blob_filter.prefilter().
+    """
+    # Grana's block-based labelling measured fastest on clean masks here, where this pass is a fixed cost
+    count, labels, stats, _ = cv2.connectedComponentsWithStatsWithAlgorithm(fg_mask, 8, cv2.CV_32S, cv2.CCL_GRANA)
+    features = np.zeros(count - 1, dtype=FEATURE_DTYPE)
+    if count <= 1:
+        return features
+
+    # Row 0 is the background
+    stats = stats[1:]
+    features["label"] = np.arange(1, count)
+    features["x"] = stats[:, cv2.CC_STAT_LEFT]
+    features["y"] = stats[:, cv2.CC_STAT_TOP]
+    features["w"] = stats[:, cv2.CC_STAT_WIDTH]
+    features["h"] = stats[:, cv2.CC_STAT_HEIGHT]
+    features["pixel_area"] = stats[:, cv2.CC_STAT_AREA]
+    features["aspect"] = features["w"] / features["h"]
+    for name in ("area", "hull_area", "solidity", "perimeter", "circularity", "cx", "cy"):
+        features[name] = np.nan
+
+    for i in np.flatnonzero(blob_filter.prefilter(features)):
+        row = features[i]
+        x, y, w, h = int(row["x"]), int(row["y"]), int(row["w"]), int(row["h"])
+        blob = (labels[y:y + h, x:x + w] == row["label"]).astype(np.uint8)
+        contours, _ = cv2.findContours(blob, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE, offset=(x, y))
+        contour = max(contours, key=len)
+
+        M = cv2.moments(contour)
+        area = abs(M["m00"])
+        hull_area = cv2.contourArea(cv2.convexHull(contour))
+        perimeter = cv2.arcLength(contour, True)
+
+        features["area"][i] = area
+        features["hull_area"][i] = hull_area
+        features["perimeter"][i] = perimeter
+        if area > 0:
+            features["cx"][i] = M["m10"] / M["m00"]
+            features["cy"][i] = M["m01"] / M["m00"]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        features["solidity"] = features["area"] / features["hull_area"]
+        features["circularity"] = 4 * np.pi * features["area"] / (features["perimeter"] ** 2)
+    return features
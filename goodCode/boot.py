@@ -0,0 +1,6 @@
+# Save as boot.py on CIRCUITPY drive; it only runs after a hard reset.
+# Enables the second USB serial channel that carries the binary protocol,
+# while the console channel keeps the REPL and the text commands.
+import usb_cdc
+
+usb_cdc.enable(console=True, data=True)
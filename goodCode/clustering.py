@@ -0,0 +1,149 @@
+import cv2
+import numpy as np
+
+# Forward half of the 3x3 cell neighbourhood; each unordered pair of cells is visited once
+NEIGHBOUR_OFFSETS = ((0, 0), (1, -1), (1, 0), (1, 1), (0, 1))
+DENSE_PAIR_LIMIT = 32
+
+
+class ContourClusters:
+    """Groups of contours as parallel NumPy arrays, one row per group"""
+
+    def __init__(self, centers, areas, bboxes, labels):
+        self.centers = centers  # (G, 2) float, area-weighted centroid
+        self.areas = areas      # (G,) float
+        self.bboxes = bboxes    # (G, 4) int, x, y, w, h
+        self.labels = labels    # group index per non-empty input contour, -1 if its group was too small
+
+    def __len__(self):
+        return len(self.areas)
+
+
+def contour_features(contours):
+    """Moments and bounding boxes computed once per contour
+
+    Returns (moments, bboxes): moments is (N, 3) of m00, m10, m01 and bboxes is
+    (N, 4) of x, y, w, h. Contours with zero area are dropped, as they have no centroid.
+    """
+    if not contours:
+        return np.zeros((0, 3)), np.zeros((0, 4), dtype=np.int32)
+
+    moments = np.empty((len(contours), 3))
+    bboxes = np.empty((len(contours), 4), dtype=np.int32)
+    for i, contour in enumerate(contours):
+        M = cv2.moments(contour)
+        moments[i] = (M["m00"], M["m10"], M["m01"])
+        bboxes[i] = cv2.boundingRect(contour)
+
+    # Orientation can make m00 negative; flipping the row keeps the centroid the same
+    moments *= np.where(moments[:, :1] < 0, -1.0, 1.0)
+    keep = moments[:, 0] > 0
+    return moments[keep], bboxes[keep]
+
+
+def candidate_pairs(points, cell_size):
+    """Index pairs of points in the same or adjacent grid cells of size cell_size"""
+    cells = np.floor(points / cell_size).astype(np.int64)
+    # Pack (cx, cy) into one sortable key; offsets stay well inside 32 bits for any frame size
+    keys = (cells[:, 0] << 32) + cells[:, 1]
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+
+    firsts = []
+    seconds = []
+    for dx, dy in NEIGHBOUR_OFFSETS:
+        target = keys + (dx << 32) + dy
+        lo = np.searchsorted(sorted_keys, target, side="left")
+        hi = np.searchsorted(sorted_keys, target, side="right")
+        counts = hi - lo
+        if not counts.any():
+            continue
+        first = np.repeat(np.arange(len(points)), counts)
+        # Position of each candidate inside its run of sorted_keys
+        starts = np.repeat(lo, counts)
+        run_offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        second = order[starts + run_offsets]
+        if dx == 0 and dy == 0:
+            same_cell = first < second
+            first, second = first[same_cell], second[same_cell]
+        firsts.append(first)
+        seconds.append(second)
+
+    if not firsts:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(firsts), np.concatenate(seconds)
+
+
+def connected_labels(count, first, second):
+    """Union-find over an edge list, done as vectorized min-label propagation"""
+    labels = np.arange(count)
+    if len(first) == 0:
+        return labels
+    while True:
+        edge_min = np.minimum(labels[first], labels[second])
+        previous = labels.copy()
+        np.minimum.at(labels, first, edge_min)
+        np.minimum.at(labels, second, edge_min)
+        # Path compression: point every label at its root
+        labels = labels[labels]
+        if np.array_equal(labels, previous):
+            return labels
+
+
+def cluster_points(points, max_distance):
+    """Group index for each point, linking any two points within max_distance (transitively)"""
+    if len(points) == 0:
+        return np.zeros(0, dtype=np.int64)
+    if len(points) <= DENSE_PAIR_LIMIT:
+        # For a handful of blobs checking every pair beats building the grid
+        first, second = np.triu_indices(len(points), k=1)
+    else:
+        first, second = candidate_pairs(points, max_distance)
+    close = np.hypot(*(points[first] - points[second]).T) <= max_distance
+    labels = connected_labels(len(points), first[close], second[close])
+    _, labels = np.unique(labels, return_inverse=True)
+    return labels
+
+
+def cluster_contours(contours, max_distance, min_group_area=0.0):
+    """Cluster contours by centroid distance and summarise each group
+
+    Unlike the old greedy pass this is order independent and transitive: a chain
+    of blobs each within max_distance of the next ends up in one group.
+    """
+    moments, bboxes = contour_features(contours)
+    if len(moments) == 0:
+        return cluster_blobs(np.zeros((0, 2)), np.zeros(0), bboxes, max_distance, min_group_area)
+    return cluster_blobs(moments[:, 1:] / moments[:, :1], moments[:, 0], bboxes,
+                         max_distance, min_group_area)
+
+
+def cluster_blobs(centers, areas, bboxes, max_distance, min_group_area=0.0):
+    """cluster_contours() for blobs already described as arrays of centroids, areas and x, y, w, h boxes"""
+    if len(areas) == 0:
+        return ContourClusters(np.zeros((0, 2)), np.zeros(0), np.zeros((0, 4), dtype=np.int32),
+                               np.zeros(0, dtype=np.int64))
+
+    labels = cluster_points(centers, max_distance)
+    group_count = labels.max() + 1
+
+    # Area-weighted centroids, i.e. the centroid of the group's combined moments
+    group_areas = np.bincount(labels, weights=areas, minlength=group_count)
+    m10 = np.bincount(labels, weights=areas * centers[:, 0], minlength=group_count)
+    m01 = np.bincount(labels, weights=areas * centers[:, 1], minlength=group_count)
+    group_centers = np.column_stack((m10 / group_areas, m01 / group_areas))
+
+    x1 = np.full(group_count, np.iinfo(np.int32).max)
+    y1 = np.full(group_count, np.iinfo(np.int32).max)
+    x2 = np.zeros(group_count, dtype=np.int64)
+    y2 = np.zeros(group_count, dtype=np.int64)
+    np.minimum.at(x1, labels, bboxes[:, 0])
+    np.minimum.at(y1, labels, bboxes[:, 1])
+    np.maximum.at(x2, labels, bboxes[:, 0] + bboxes[:, 2])
+    np.maximum.at(y2, labels, bboxes[:, 1] + bboxes[:, 3])
+    group_bboxes = np.column_stack((x1, y1, x2 - x1, y2 - y1)).astype(np.int32)
+
+    keep = group_areas > min_group_area
+    remap = np.full(group_count, -1)
+    remap[keep] = np.arange(keep.sum())
+    return ContourClusters(group_centers[keep], group_areas[keep], group_bboxes[keep], remap[labels])
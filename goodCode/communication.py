@@ -1,32 +1,16 @@
 import serial
-import serial.tools.list_ports
 import time
-
-def find_xiao_port():
-    ports = serial.tools.list_ports.comports()
-    for port in ports:
-        if "usbmodem" in port.device.lower() or "2e8a" in str(port.hwid):
-            return port.device
-    return None
+from serialLink import find_xiao_port, open_ready
 
 PORT = find_xiao_port() or "/dev/cu.usbmodem11401"
 BAUD = 115200
 
 try:
-    ser = serial.Serial(PORT, BAUD, timeout=2)
-    time.sleep(1)
+    # Resets the board and returns once the firmware says it is ready for commands
+    ser = open_ready(PORT, BAUD)
+    ser.timeout = 2
     print(f"Connected to Orpheus Pico on {PORT}")
     
-    # Reset and initialize
-    ser.write(b'\x03')
-    time.sleep(0.5)
-    ser.write(b'\x04')
-    time.sleep(3)
-    
-    while ser.in_waiting > 0:
-        ser.read(ser.in_waiting)
-        time.sleep(0.1)
-    
     def send_command(cmd, timeout=15):
         print(f"\nSending: {cmd}")
         ser.write((cmd + "\r\n").encode("utf-8"))
@@ -35,9 +19,11 @@ try:
         attempts = 0
         max_attempts = timeout * 10
         while attempts < max_attempts:  
+            if attempts and attempts % 10 == 0:
+                ser.write(b"ping\r\n")  # Long actions would otherwise trip the board's host failsafe
             if ser.in_waiting > 0:
                 data = ser.readline().decode('utf-8', errors='ignore').strip()
-                if data and not data.startswith('>>>') and not data.startswith('...') and data != cmd:
+                if data and not data.startswith('>>>') and not data.startswith('...') and data not in (cmd, "ping", "pong"):
                     print(f"Response: {data}")
                     return data
             time.sleep(0.1)
@@ -45,6 +31,14 @@ try:
         print("Response: No response")
         return "No response"
 
+    def keep_alive(seconds, interval=1.0):
+        """Wait while pinging the board, so its host failsafe does not stop a running motor"""
+        end = time.monotonic() + seconds
+        while time.monotonic() < end:
+            ser.write(b"ping\r\n")
+            time.sleep(min(interval, max(0.0, end - time.monotonic())))
+            ser.reset_input_buffer()  # Drop the pongs
+
     print("\n" + "="*50)
     print("    A4988 STEPPER MOTOR DEBUG TEST")
     print("="*50)
@@ -68,7 +62,7 @@ try:
  
     print("   6b. Large backward movement (100 steps):")
     send_command("brushMotor:30")
-    time.sleep(5)
+    keep_alive(5)
     
     # 7. Final status check
     print("\n7. FINAL STATUS CHECK:")
@@ -0,0 +1,217 @@
+"""
+MiDaS_small depth models loaded from local files, so startup needs no network.
+
+Run once with network access to fill the model directory:
+
+    python depthModel.py export [model dir] [WxH]
+
+That saves the weights, a traced TorchScript module and ONNX models (fp32
+and int8) next to each other. After that, load_depth_model() picks one by
+backend name:
+
+    eager        the MiDaS module from the torch hub cache plus the local weights
+    torchscript  the traced module; needs only torch, no MiDaS code
+    int8         eager with torch dynamic int8 quantization
+    onnx         ONNX Runtime session
+    onnx_int8    ONNX Runtime session on the int8 weight-quantized model
+
+The traced module only takes the input size it was traced at, which is
+saved inside it; loading it for any other size fails until it is exported
+again with that size. eager and torchscript run on CUDA when it is
+available, the rest on the CPU.
+"""
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models")
+WEIGHTS_FILE = "midas_small.pt"
+TORCHSCRIPT_FILE = "midas_small_traced.pt"
+ONNX_FILE = "midas_small.onnx"
+ONNX_INT8_FILE = "midas_small_int8.onnx"
+HUB_REPO = "intel-isl/MiDaS"
+
+# (width, height), multiples of 32; roughly the aspect of the 1280x720 camera
+INPUT_SIZE = (256, 160)
+
+# ImageNet normalisation, as in MiDaS's small_transform
+MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+
+def preprocess(frame, input_size=INPUT_SIZE):
+    """BGR frame to a normalised 1x3xHxW float32 batch"""
+    rgb = cv2.cvtColor(cv2.resize(frame, input_size, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2RGB)
+    normalized = (rgb.astype(np.float32) / 255.0 - MEAN) / STD
+    return np.ascontiguousarray(normalized.transpose(2, 0, 1)[np.newaxis])
+
+
+def set_torch_threads(threads):
+    import torch
+    if threads:
+        torch.set_num_threads(threads)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            pass  # only settable before torch's first parallel work
+
+
+def local_hub_repo():
+    """The MiDaS checkout in the torch hub cache, which holds the model code"""
+    import torch
+    path = os.path.join(torch.hub.get_dir(), HUB_REPO.replace("/", "_") + "_master")
+    if not os.path.isdir(path):
+        raise FileNotFoundError(f"No MiDaS code in the torch hub cache at {path}; run 'python depthModel.py export'")
+    return path
+
+
+def default_device():
+    import torch
+    return torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+
+def size_label(input_size):
+    return f"{input_size[0]}x{input_size[1]}"
+
+
+def load_torchscript_module(model_dir, input_size, device):
+    """The traced module, refusing one traced at a different input size"""
+    import torch
+    path = os.path.join(model_dir, TORCHSCRIPT_FILE)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Missing {path}; run 'python depthModel.py export'")
+    extra_files = {"input_size": ""}
+    module = torch.jit.load(path, map_location=device, _extra_files=extra_files)
+    traced_size = extra_files["input_size"]
+    if isinstance(traced_size, bytes):
+        traced_size = traced_size.decode("utf-8")
+    if traced_size != size_label(input_size):
+        raise ValueError(f"{path} was traced at {traced_size or 'an unknown size'}, not {size_label(input_size)}; "
+                         f"run 'python depthModel.py export {model_dir} {size_label(input_size)}'")
+    return module.eval()
+
+
+def load_eager_module(model_dir):
+    import torch
+    weights = os.path.join(model_dir, WEIGHTS_FILE)
+    if not os.path.exists(weights):
+        raise FileNotFoundError(f"Missing {weights}; run 'python depthModel.py export'")
+    module = torch.hub.load(local_hub_repo(), "MiDaS_small", source="local", pretrained=False)
+    module.load_state_dict(torch.load(weights, map_location="cpu"))
+    return module.eval()
+
+
+class TorchDepthModel:
+    """MiDaS through PyTorch: eager, traced TorchScript or dynamically quantized int8
+
+    eager and torchscript run on device, CUDA when available unless given;
+    int8 always runs on the CPU, where dynamic quantization works. It only
+    converts Linear layers, and MiDaS_small is almost all convolutions, so
+    int8 mostly matters for the ONNX backend.
+    """
+
+    def __init__(self, model_dir=MODEL_DIR, input_size=INPUT_SIZE, threads=None, mode="torchscript", device=None):
+        import torch
+        self.torch = torch
+        self.input_size = input_size
+        self.device = torch.device("cpu") if mode == "int8" else torch.device(device or default_device())
+        set_torch_threads(threads)
+
+        if mode == "torchscript":
+            self.module = load_torchscript_module(model_dir, input_size, self.device)
+        else:
+            self.module = load_eager_module(model_dir)
+            if mode == "int8":
+                self.module = torch.ao.quantization.quantize_dynamic(self.module, {torch.nn.Linear}, dtype=torch.qint8)
+            self.module.to(self.device)
+
+    def estimate(self, frame):
+        """Relative inverse depth at the model's output resolution, as float32"""
+        batch = self.torch.from_numpy(preprocess(frame, self.input_size)).to(self.device)
+        with self.torch.inference_mode():
+            prediction = self.module(batch)
+        return prediction.squeeze().cpu().numpy()
+
+
+class OnnxDepthModel:
+    """MiDaS through an ONNX Runtime CPU session"""
+
+    def __init__(self, model_dir=MODEL_DIR, input_size=INPUT_SIZE, threads=None, quantized=False):
+        import onnxruntime
+        path = os.path.join(model_dir, ONNX_INT8_FILE if quantized else ONNX_FILE)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Missing {path}; run 'python depthModel.py export'")
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.input_size = input_size
+
+    def estimate(self, frame):
+        prediction = self.session.run(None, {self.input_name: preprocess(frame, self.input_size)})[0]
+        return prediction.squeeze()
+
+
+DEPTH_BACKENDS = {
+    "eager": lambda model_dir, input_size, threads: TorchDepthModel(model_dir, input_size, threads, "eager"),
+    "torchscript": lambda model_dir, input_size, threads: TorchDepthModel(model_dir, input_size, threads, "torchscript"),
+    "int8": lambda model_dir, input_size, threads: TorchDepthModel(model_dir, input_size, threads, "int8"),
+    "onnx": lambda model_dir, input_size, threads: OnnxDepthModel(model_dir, input_size, threads),
+    "onnx_int8": lambda model_dir, input_size, threads: OnnxDepthModel(model_dir, input_size, threads, quantized=True),
+}
+
+
+def load_depth_model(backend="torchscript", model_dir=MODEL_DIR, input_size=INPUT_SIZE, threads=None):
+    """A depth model with an estimate(frame) method, see DEPTH_BACKENDS; load_time is set in seconds"""
+    if backend not in DEPTH_BACKENDS:
+        raise ValueError(f"Unknown depth backend {backend!r}, choose from {', '.join(DEPTH_BACKENDS)}")
+    start = time.perf_counter()
+    model = DEPTH_BACKENDS[backend](model_dir, input_size, threads)
+    model.backend = backend
+    model.load_time = time.perf_counter() - start
+    return model
+
+
+def export_models(model_dir=MODEL_DIR, input_size=INPUT_SIZE):
+    """Download MiDaS_small once and write every local model file; needs network access"""
+    import torch
+
+    os.makedirs(model_dir, exist_ok=True)
+    module = torch.hub.load(HUB_REPO, "MiDaS_small", trust_repo=True).eval()
+    torch.save(module.state_dict(), os.path.join(model_dir, WEIGHTS_FILE))
+    print(f"Saved weights to {WEIGHTS_FILE}")
+
+    example = torch.from_numpy(preprocess(np.zeros((input_size[1], input_size[0], 3), np.uint8), input_size))
+    with torch.inference_mode():
+        traced = torch.jit.trace(module, example)
+    traced = torch.jit.freeze(traced)
+    traced.save(os.path.join(model_dir, TORCHSCRIPT_FILE), _extra_files={"input_size": size_label(input_size)})
+    print(f"Saved TorchScript module to {TORCHSCRIPT_FILE}, traced at {size_label(input_size)}")
+
+    onnx_path = os.path.join(model_dir, ONNX_FILE)
+    torch.onnx.export(module, example, onnx_path, input_names=["image"], output_names=["depth"],
+                      dynamic_axes={"image": {2: "height", 3: "width"}, "depth": {1: "height", 2: "width"}},
+                      opset_version=17)
+    print(f"Saved ONNX model to {ONNX_FILE}")
+
+    try:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+    except ImportError:
+        print("onnxruntime not installed, skipping the int8 ONNX model")
+        return
+    quantize_dynamic(onnx_path, os.path.join(model_dir, ONNX_INT8_FILE), weight_type=QuantType.QUInt8)
+    print(f"Saved int8 ONNX model to {ONNX_INT8_FILE}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] != "export":
+        print("Usage: python depthModel.py export [model dir] [WxH]")
+        sys.exit(1)
+    size = tuple(int(v) for v in sys.argv[3].split("x")) if len(sys.argv) > 3 else INPUT_SIZE
+    export_models(sys.argv[2] if len(sys.argv) > 2 else MODEL_DIR, size)
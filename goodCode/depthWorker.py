@@ -0,0 +1,128 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from stageTimer import stage_timer
+
+
+class DepthResult:
+    """A published depth prediction along with the capture time of the frame it came from
+
+    The prediction stays at the model's native resolution. Callers query it in
+    full-resolution frame coordinates and only the queried pixels are read.
+    Values are MiDaS relative inverse depth: larger means closer.
+    """
+
+    def __init__(self, prediction, frame_size, timestamp, inference_time):
+        self.prediction = prediction
+        self.frame_size = frame_size  # (width, height) of the frame coordinates used in queries
+        self.timestamp = timestamp
+        self.inference_time = inference_time
+        self.scale_x = prediction.shape[1] / frame_size[0]
+        self.scale_y = prediction.shape[0] / frame_size[1]
+
+    def age(self, now=None):
+        """Seconds between the source frame being captured and now"""
+        if now is None:
+            now = time.monotonic()
+        return now - self.timestamp
+
+    def sample_box(self, x, y, w, h):
+        """Median depth inside a full-resolution box"""
+        x1 = min(int(x * self.scale_x), self.prediction.shape[1] - 1)
+        y1 = min(int(y * self.scale_y), self.prediction.shape[0] - 1)
+        x2 = max(int(np.ceil((x + w) * self.scale_x)), x1 + 1)
+        y2 = max(int(np.ceil((y + h) * self.scale_y)), y1 + 1)
+        return float(np.median(self.prediction[max(y1, 0):y2, max(x1, 0):x2]))
+
+    def sample_point(self, center_x, center_y, window_size=20):
+        """Median depth in a window_size square around a full-resolution point"""
+        half_window = window_size // 2
+        return self.sample_box(center_x - half_window, center_y - half_window, window_size, window_size)
+
+    def visualization(self, size):
+        """Min-max normalised uint8 depth image at the given (width, height), for display only"""
+        depth_display = cv2.resize(self.prediction, size, interpolation=cv2.INTER_LINEAR)
+        return cv2.normalize(depth_display, None, 0, 255, cv2.NORM_MINMAX, dtype=cv2.CV_8U)
+
+
+class DepthWorker(threading.Thread):
+    """Runs depth inference on its own thread and keeps only the newest result
+
+    The detection loop hands frames over with submit() and reads get_latest();
+    neither call ever waits on the model.
+    """
+
+    def __init__(self, estimate_fn):
+        super().__init__(name="depth", daemon=True)
+        self.estimate_fn = estimate_fn
+        self.lock = threading.Lock()
+        self.frame_ready = threading.Event()
+        self.stop_event = threading.Event()
+        self.pending_frame = None
+        self.pending_timestamp = None
+        self.latest = None
+        self.busy = False
+        self.frames_submitted = 0
+        self.frames_replaced = 0
+        self.inferences = 0
+
+    def is_idle(self):
+        """True when the worker has nothing queued, so submitting a frame is worth the copy"""
+        with self.lock:
+            return not self.busy and self.pending_frame is None
+
+    def submit(self, frame, timestamp=None):
+        """Offer a frame for inference; an older frame still waiting is replaced"""
+        if timestamp is None:
+            timestamp = time.monotonic()
+        with self.lock:
+            if self.pending_frame is not None:
+                self.frames_replaced += 1
+            self.pending_frame = frame
+            self.pending_timestamp = timestamp
+            self.frames_submitted += 1
+        self.frame_ready.set()
+
+    def get_latest(self):
+        """Return the most recent DepthResult, or None if nothing has been published yet"""
+        with self.lock:
+            return self.latest
+
+    def run(self):
+        while not self.stop_event.is_set():
+            if not self.frame_ready.wait(timeout=0.2):
+                continue
+
+            with self.lock:
+                frame = self.pending_frame
+                timestamp = self.pending_timestamp
+                self.pending_frame = None
+                self.frame_ready.clear()
+                self.busy = frame is not None
+
+            if frame is None:
+                continue
+
+            start = time.monotonic()
+            try:
+                prediction = self.estimate_fn(frame)
+            except Exception as e:
+                print(f"Depth worker error: {e}")
+                prediction = None
+            inference_time = time.monotonic() - start
+            if stage_timer.enabled:
+                stage_timer.record("depth", int(inference_time * 1e9))
+
+            with self.lock:
+                if prediction is not None:
+                    frame_size = (frame.shape[1], frame.shape[0])
+                    self.latest = DepthResult(prediction, frame_size, timestamp, inference_time)
+                    self.inferences += 1
+                self.busy = False
+
+    def stop(self):
+        self.stop_event.set()
+        self.frame_ready.set()
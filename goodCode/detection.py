@@ -0,0 +1,133 @@
+import math
+
+import cv2
+import numpy as np
+
+from blobFeatures import BlobFilter, extract_features
+from clustering import cluster_blobs
+from stageTimer import stage_timer
+
+
+def create_background_subtractor():
+    """MOG2 model with the settings tuned for the venue"""
+    return cv2.createBackgroundSubtractorMOG2(
+        detectShadows=True,
+        varThreshold=50,
+        history=800
+    )
+
+
+class MotionGroup:
+    """A cluster of moving contours, in full-resolution frame coordinates"""
+
+    def __init__(self, center_x, center_y, area, bbox):
+        self.center_x = center_x
+        self.center_y = center_y
+        self.area = area
+        self.bbox = bbox  # (x, y, w, h)
+        self.depth = None  # MiDaS relative inverse depth, larger is closer; None without a fresh depth result
+        self.track_id = None  # set by the tracker
+
+
+class MotionDetector:
+    """Background subtraction, morphology and contour grouping on a downscaled frame
+
+    All thresholds are given in full-resolution pixels and scaled to the analysis
+    size internally. Results are mapped back to full-resolution coordinates, so
+    callers never see the analysis resolution.
+    """
+
+    def __init__(self, frame_size=(1280, 720), analysis_size=(640, 360),
+                 motion_threshold=7000, trigger_area=10000, max_group_distance=150):
+        self.frame_size = frame_size
+        self.analysis_size = analysis_size or frame_size
+        self.trigger_area = trigger_area
+
+        self.scale_x = self.analysis_size[0] / frame_size[0]
+        self.scale_y = self.analysis_size[1] / frame_size[1]
+        linear_scale = math.sqrt(self.scale_x * self.scale_y)
+        self.area_scale = self.scale_x * self.scale_y
+
+        # Thresholds in analysis pixels
+        self.motion_threshold = motion_threshold * self.area_scale
+        self.max_group_distance = max_group_distance * linear_scale
+
+        # Aspect 0.3-3.0, solidity > 0.5 and circularity > 0.3, as tuned for the venue
+        self.blob_filter = BlobFilter(self.motion_threshold)
+
+        open_size = max(3, int(round(16 * linear_scale)))
+        erode_size = max(2, int(round(8 * linear_scale)))
+        self.kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (open_size, open_size))
+        self.kernel_erode = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (erode_size, erode_size))
+
+    def prepare(self, frame):
+        """Downscale a full-resolution frame to the analysis size"""
+        if (frame.shape[1], frame.shape[0]) == self.analysis_size:
+            return frame
+        start = stage_timer.start()
+        small_frame = cv2.resize(frame, self.analysis_size, interpolation=cv2.INTER_AREA)
+        stage_timer.stop("downscale", start)
+        return small_frame
+
+    def learn(self, subtractor, frame, learning_rate):
+        """Feed a frame to a background model without looking for motion"""
+        small_frame = self.prepare(frame)
+        start = stage_timer.start()
+        subtractor.apply(small_frame, learningRate=learning_rate)
+        stage_timer.stop("background", start)
+
+    def foreground_mask(self, subtractor, small_frame, learning_rate):
+        start = stage_timer.start()
+        fg_mask = subtractor.apply(small_frame, learningRate=learning_rate)
+        stage_timer.stop("background", start)
+
+        # More aggressive morphological operations
+        start = stage_timer.start()
+        fg_mask = cv2.morphologyEx(fg_mask, cv2.MORPH_OPEN, self.kernel)
+        fg_mask = cv2.morphologyEx(fg_mask, cv2.MORPH_CLOSE, self.kernel)
+
+        fg_mask = cv2.erode(fg_mask, self.kernel_erode, iterations=2)
+        fg_mask = cv2.dilate(fg_mask, self.kernel_erode, iterations=2)
+        stage_timer.stop("morphology", start)
+        return fg_mask
+
+    def blob_features(self, fg_mask):
+        """Structured array of shape descriptors for every blob in the mask"""
+        return extract_features(fg_mask, self.blob_filter)
+
+    def to_full_resolution(self, clusters):
+        """Map analysis-space clusters back to full-resolution MotionGroups"""
+        centers = clusters.centers / (self.scale_x, self.scale_y)
+        areas = clusters.areas / self.area_scale
+        bboxes = clusters.bboxes.astype(np.float64)
+        bboxes[:, 0::2] /= self.scale_x
+        bboxes[:, 1::2] /= self.scale_y
+        x = np.floor(bboxes[:, 0]).astype(int)
+        y = np.floor(bboxes[:, 1]).astype(int)
+        w = np.ceil(bboxes[:, 2]).astype(int)
+        h = np.ceil(bboxes[:, 3]).astype(int)
+
+        return [MotionGroup(int(centers[i, 0]), int(centers[i, 1]), float(areas[i]),
+                            (int(x[i]), int(y[i]), int(w[i]), int(h[i])))
+                for i in range(len(clusters))]
+
+    def detect(self, subtractor, frame, learning_rate=0.002):
+        """Return the MotionGroups found in a full-resolution frame"""
+        fg_mask = self.foreground_mask(subtractor, self.prepare(frame), learning_rate)
+        start = stage_timer.start()
+        features = self.blob_features(fg_mask)
+        valid = features[self.blob_filter.mask(features)]
+        stage_timer.stop("contours", start)
+
+        start = stage_timer.start()
+        centers = np.column_stack((valid["cx"], valid["cy"]))
+        bboxes = np.column_stack((valid["x"], valid["y"], valid["w"], valid["h"]))
+        clusters = cluster_blobs(centers, valid["area"], bboxes, self.max_group_distance,
+                                 self.motion_threshold * 0.5)
+        groups = self.to_full_resolution(clusters)
+        stage_timer.stop("grouping", start)
+        return groups
+
+    def should_trigger(self, groups):
+        """True when the combined full-resolution area is big enough to fire"""
+        return sum(group.area for group in groups) > self.trigger_area
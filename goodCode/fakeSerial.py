@@ -0,0 +1,131 @@
+import os
+import select
+import threading
+import time
+
+from motorClient import COMMAND_PREFIX, REPLY_PREFIX
+from serialLink import READY_BANNER
+
+
+class FakeSerial:
+    """In-memory stand-in for the Pico's console port
+
+    Answers every "@<seq>:<cmd>" line with "#<seq>:<reply>" like the firmware
+    would and keeps a log of (monotonic time, command) for inspection. Enough of
+    the pyserial API for MotorClient's text protocol.
+    """
+
+    def __init__(self, timeout=1.0, reply_fn=None):
+        self.timeout = timeout
+        self.reply_fn = reply_fn or (lambda cmd: f"OK {cmd}")
+        self.condition = threading.Condition()
+        self.incoming = b""
+        self.outgoing = b""
+        self.commands = []
+        self.is_open = True
+
+    @property
+    def in_waiting(self):
+        with self.condition:
+            return len(self.outgoing)
+
+    def write(self, data):
+        with self.condition:
+            self.incoming += data
+            while b"\n" in self.incoming:
+                line, self.incoming = self.incoming.split(b"\n", 1)
+                self._handle_line(line.decode("utf-8", errors="ignore").strip())
+            self.condition.notify_all()
+        return len(data)
+
+    def _handle_line(self, line):
+        if not line.startswith(COMMAND_PREFIX) or ":" not in line:
+            return
+        seq, cmd = line[len(COMMAND_PREFIX):].split(":", 1)
+        self.commands.append((time.monotonic(), cmd))
+        self.outgoing += f"{REPLY_PREFIX}{seq}:{self.reply_fn(cmd)}\r\n".encode("utf-8")
+
+    def readline(self):
+        with self.condition:
+            if b"\n" not in self.outgoing and self.is_open:
+                self.condition.wait(self.timeout)
+            if b"\n" not in self.outgoing:
+                return b""
+            line, self.outgoing = self.outgoing.split(b"\n", 1)
+            return line + b"\n"
+
+    def read(self, size=1):
+        with self.condition:
+            if not self.outgoing and self.is_open:
+                self.condition.wait(self.timeout)
+            data, self.outgoing = self.outgoing[:size], self.outgoing[size:]
+            return data
+
+    def close(self):
+        with self.condition:
+            self.is_open = False
+            self.condition.notify_all()
+
+
+class PtyBoard:
+    """Fake Pico behind a pseudo-terminal, for tools that open a real serial port
+
+    Unlike FakeSerial the bytes go through pyserial and the OS tty layer, so
+    latency measurements include them. Speaks the firmware's console
+    protocol: the ready banner after Ctrl-D, "pong" for "ping",
+    "pong:<nonce>:<monotonic_ns>" for "ping:<nonce>", and reply_fn(cmd) for
+    everything else. POSIX only.
+    """
+
+    def __init__(self, reply_fn=None, boot_delay=0.1):
+        import pty
+        import tty
+        self.reply_fn = reply_fn or (lambda cmd: f"OK {cmd}")
+        self.boot_delay = boot_delay
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave)  # No echo or newline translation, like a USB CDC port
+        self.port = os.ttyname(self.slave)
+        self.commands = 0
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="pty-board", daemon=True)
+        self.thread.start()
+
+    def _write(self, line):
+        os.write(self.master, (line + "\r\n").encode("utf-8"))
+
+    def _reply(self, cmd):
+        if cmd == "ping":
+            return "pong"
+        if cmd.startswith("ping:"):
+            return f"pong:{cmd[5:]}:{time.monotonic_ns()}"
+        return self.reply_fn(cmd)
+
+    def _run(self):
+        buffer = b""
+        while self.running:
+            ready, _, _ = select.select([self.master], [], [], 0.1)
+            if not ready:
+                continue
+            try:
+                buffer += os.read(self.master, 4096)
+            except OSError:
+                return
+            if b"\x04" in buffer:
+                # Ctrl-D restarts code.py on the real board
+                buffer = buffer.rsplit(b"\x04", 1)[1]
+                time.sleep(self.boot_delay)
+                self._write(READY_BANNER)
+            while b"\n" in buffer:
+                line, buffer = buffer.split(b"\n", 1)
+                line = line.decode("utf-8", errors="ignore").strip()
+                if not line.startswith(COMMAND_PREFIX) or ":" not in line:
+                    continue
+                seq, cmd = line[len(COMMAND_PREFIX):].split(":", 1)
+                self.commands += 1
+                self._write(f"{REPLY_PREFIX}{seq}:{self._reply(cmd)}")
+
+    def close(self):
+        self.running = False
+        self.thread.join(timeout=1.0)
+        os.close(self.master)
+        os.close(self.slave)
@@ -6,6 +6,18 @@ import digitalio
 import pwmio
 import time
 from adafruit_motor import servo
+from motionProfile import step_intervals_ns, parse_profile, TRAPEZOID, DEFAULT_MAX_SPEED, DEFAULT_ACCEL
+from protocol import (FrameDecoder, encode_frame, decode_args, decode_batch, PROTOCOL_VERSION,
+                      OP_TEXT, OP_SERVO, OP_BRUSH_MOTOR, OP_STEPPER, OP_SERVO_THEN_MOTOR,
+                      OP_STOP, OP_HARDWARE_TEST, OP_ARM, OP_DISARM, OP_FIRE, ARM_IDLE, ARM_FIRE,
+                      OP_TELEMETRY, OP_PING, OP_BATCH, OP_REPLY, OP_STATUS, encode_telemetry, format_telemetry_line)
+
+try:
+    import usb_cdc
+    data_port = usb_cdc.data  # None unless boot.py enabled the data channel
+except ImportError:
+    data_port = None
+binary_enabled = False
 
 # Initialize hardware
 my_servo = None
@@ -68,17 +80,243 @@ except Exception as e:
     step_pin = None
     dir_pin = None
 
+# Fire modes: arm keeps the flywheel spinning between shots so a burst only
+# has to cycle the pusher. Throttles are ESC fractions; times in milliseconds.
+IDLE_THROTTLE = 0.1
+FIRE_THROTTLE = 0.2
+SPIN_UP_MS = 500        # stopped to fire speed
+IDLE_SPIN_UP_MS = 150   # idle to fire speed
+PUSH_MS = 200           # pusher travel each way
+PUSHER_FIRE_ANGLE = 90
+PUSHER_REST_ANGLE = 0
+MAX_BURST = 20
+
+armed_throttle = 0.0
+steps_executed = 0  # stepper pulses since boot, reported by telemetry
+
+# Long-running commands are generators driven by the scheduler loop below. They
+# yield the time.monotonic_ns() deadline at which they want to resume and finish
+# by yielding their reply string, so serial input is still read while they run.
+def after_ms(ms):
+    return time.monotonic_ns() + int(ms * 1000000)
+
+def servo_action(target_angle):
+    print(f"Moving servo to {target_angle} degrees")
+    my_servo.angle = target_angle
+    yield after_ms(500)
+    yield f"Servo moved to {target_angle} degrees"
+
+def step_pulses(count, gap_ms):
+    global steps_executed
+    for i in range(count):
+        step_pin.value = True
+        steps_executed += 1
+        yield after_ms(1)  # 1ms pulse width
+        step_pin.value = False
+        yield after_ms(gap_ms)
+
+def stepper_action(steps, max_speed, accel, profile):
+    global steps_executed
+    print(f"Moving A4988 stepper {steps} steps (max {max_speed} steps/s, accel {accel}, {profile})")
+    
+    # Set direction (True = forward, False = backward)
+    dir_pin.value = steps > 0
+    
+    # Deadlines are chained from the previous step so loop jitter doesn't accumulate.
+    # The A4988 only needs a 1us pulse, which the two pin writes already give.
+    next_step_at = time.monotonic_ns()
+    for interval in step_intervals_ns(steps, max_speed, accel, profile):
+        next_step_at += interval
+        yield next_step_at
+        step_pin.value = True
+        step_pin.value = False
+        steps_executed += 1
+    yield f"A4988 moved {steps} steps"
+
+def stepper_test_action():
+    print("Testing A4988 stepper - 50 steps forward, 50 steps back")
+    
+    # 50 steps forward, slower for test
+    dir_pin.value = True
+    yield from step_pulses(50, 20)
+    
+    yield after_ms(500)  # Pause between directions
+    
+    # 50 steps backward
+    dir_pin.value = False
+    yield from step_pulses(50, 20)
+    
+    yield "A4988 test completed: 50 forward, 50 backward"
+
+def servo_then_motor_action():
+    print("Starting servo-then-motor sequence")
+    
+    # Move servo to 90 degrees first
+    my_servo.angle = 90
+    yield after_ms(500)
+    print("Servo moved to 90 degrees")
+    
+    # Run motor at 20% for 0.5 seconds
+    esc_motor.throttle = 0.2
+    yield after_ms(500)
+    esc_motor.throttle = 0.0
+    print("Motor sequence completed")
+    
+    # Move servo back to 0
+    my_servo.angle = 0
+    yield after_ms(500)
+    print("Servo returned to 0 degrees")
+    
+    yield "Servo-then-motor sequence completed"
+
+def fire_action(count, interval_ms):
+    # Spin up to fire speed unless already armed at or above it
+    fire_throttle = max(FIRE_THROTTLE, armed_throttle)
+    if armed_throttle < fire_throttle:
+        esc_motor.throttle = fire_throttle
+        yield after_ms(IDLE_SPIN_UP_MS if armed_throttle > 0 else SPIN_UP_MS)
+    
+    start = time.monotonic_ns()
+    for shot in range(count):
+        my_servo.angle = PUSHER_FIRE_ANGLE
+        yield after_ms(PUSH_MS)
+        my_servo.angle = PUSHER_REST_ANGLE
+        yield after_ms(PUSH_MS)
+        # interval_ms is shot start to shot start; 0 means as fast as the pusher cycles
+        next_shot_at = start + (shot + 1) * interval_ms * 1000000
+        if shot + 1 < count and next_shot_at > time.monotonic_ns():
+            yield next_shot_at
+    elapsed_ns = time.monotonic_ns() - start
+    
+    # Back to whatever arm left it at, which is stopped when disarmed
+    esc_motor.throttle = armed_throttle
+    rate = count * 1000000000 / elapsed_ns
+    yield f"Fired {count} in {elapsed_ns // 1000000} ms ({rate:.1f} shots/s)"
+
+def stepper_debug_action():
+    global steps_executed
+    print("A4988 Debug Test - Manual pin control")
+    
+    # Test direction pin
+    print("Testing DIR pin - HIGH for 2 seconds")
+    dir_pin.value = True
+    yield after_ms(2000)
+    
+    print("Testing DIR pin - LOW for 2 seconds") 
+    dir_pin.value = False
+    yield after_ms(2000)
+    
+    # Test step pin with visible pulses
+    print("Testing STEP pin - 10 slow pulses")
+    for i in range(10):
+        print(f"Step pulse {i+1}")
+        step_pin.value = True
+        steps_executed += 1
+        yield after_ms(500)  # Long pulse so you can see it
+        step_pin.value = False
+        yield after_ms(500)  # Long gap so you can see it
+    
+    yield "A4988 debug test completed"
+
+def stepper_ready():
+    return stepper_motor == "A4988_READY" and step_pin and dir_pin
+
+def hardware_test_command():
+    servo_status = "OK" if my_servo else "None"
+    brush_status = "OK" if brush_motor_available else "None"
+    stepper_status = "A4988_OK" if stepper_motor == "A4988_READY" else "None"
+    return f"Servo: {servo_status}, Brush: {brush_status}, Stepper: {stepper_status}"
+
+def servo_command(angle):
+    if not my_servo:
+        return "Servo not available"
+    return servo_action(angle)
+
+def stepper_command(steps, max_speed=0, accel=0, profile=""):
+    """Zero / empty limits fall back to the motion profile defaults"""
+    if not stepper_ready():
+        return "A4988 stepper not available"
+    max_speed = max_speed or DEFAULT_MAX_SPEED
+    accel = accel or DEFAULT_ACCEL
+    profile = parse_profile(profile) if profile else TRAPEZOID
+    if max_speed <= 0 or accel <= 0:
+        return "A4988 error: speed and acceleration must be positive"
+    return stepper_action(steps, max_speed, accel, profile)
+
+def brush_motor_command(speed):
+    if not brush_motor_available:
+        return "ESC not available"
+    throttle = speed / 100.0
+    esc_motor.throttle = throttle
+    
+    if speed == 0:
+        return "Motor stopped"
+    elif speed > 0:
+        return f"Motor forward at {speed}%"
+    else:
+        return f"Motor reverse at {abs(speed)}%"
+
+def servo_then_motor_command():
+    if brush_motor_available and my_servo:
+        return servo_then_motor_action()
+    else:
+        return "Servo or motor not available"
+
+def arm_command(level):
+    """Hold the flywheel at "idle", "fire" or a throttle percent until disarm"""
+    global armed_throttle
+    if not brush_motor_available:
+        return "ESC not available"
+    if level == "" or level == "idle":
+        throttle = IDLE_THROTTLE
+    elif level == "fire":
+        throttle = FIRE_THROTTLE
+    else:
+        percent = int(level)
+        if percent <= 0 or percent > 100:
+            return "Arm error: throttle must be 1-100%"
+        throttle = percent / 100.0
+    armed_throttle = throttle
+    esc_motor.throttle = throttle
+    return f"Armed at {int(throttle * 100)}%"
+
+def disarm_command():
+    global armed_throttle
+    armed_throttle = 0.0
+    if brush_motor_available:
+        esc_motor.throttle = 0.0
+    return "Disarmed"
+
+def fire_command(count, interval_ms=0):
+    if not (brush_motor_available and my_servo):
+        return "Servo or motor not available"
+    if count < 1 or count > MAX_BURST:
+        return f"Fire error: 1-{MAX_BURST} shots"
+    if interval_ms < 0:
+        return "Fire error: interval must not be negative"
+    return fire_action(count, interval_ms)
+
+def set_binary_mode(enabled):
+    """Turn binary frames on the usb_cdc data channel on or off"""
+    global binary_enabled, telemetry_channel
+    if enabled and data_port is None:
+        return "binary:unavailable (enable usb_cdc data in boot.py)"
+    binary_enabled = enabled
+    if not enabled and telemetry_channel == BINARY:
+        telemetry_channel = None
+    if enabled:
+        return f"binary:ok:{PROTOCOL_VERSION}"
+    return "binary:off"
+
 def process_command(command):
+    """Return a reply string, or a generator for commands that take time"""
     command = command.strip()
     
     if command == "library_test":
         return "Motor: True, Audio: True"
     
     elif command == "hardware_test":
-        servo_status = "OK" if my_servo else "None"
-        brush_status = "OK" if brush_motor_available else "None"
-        stepper_status = "A4988_OK" if stepper_motor == "A4988_READY" else "None"
-        return f"Servo: {servo_status}, Brush: {brush_status}, Stepper: {stepper_status}"
+        return hardware_test_command()
     
     elif command == "pin_test":
         available_pins = []
@@ -102,163 +340,404 @@ def process_command(command):
         return f"Available: {', '.join(available_pins)} | In use: {', '.join(in_use_pins)}"
     
     elif command.startswith("servo:"):
-        if my_servo:
-            try:
-                _, angle = command.split(":")
-                target_angle = int(angle)
-                print(f"Moving servo to {target_angle} degrees")
-                my_servo.angle = target_angle
-                time.sleep(0.5)
-                return f"Servo moved to {target_angle} degrees"
-            except Exception as e:
-                print(f"Servo command error: {e}")
-                return f"Servo error: {e}"
-        else:
-            return "Servo not available"
+        try:
+            _, angle = command.split(":")
+            return servo_command(int(angle))
+        except Exception as e:
+            print(f"Servo command error: {e}")
+            return f"Servo error: {e}"
 
     elif command.startswith("stepper:"):
-        if stepper_motor == "A4988_READY" and step_pin and dir_pin:
-            try:
-                _, steps_str = command.split(":")
-                steps = int(steps_str)
-                print(f"Moving A4988 stepper {steps} steps")
-                
-                # Set direction (True = forward, False = backward)
-                dir_pin.value = steps > 0
-                abs_steps = abs(steps)
-                
-                # Generate step pulses
-                for i in range(abs_steps):
-                    step_pin.value = True
-                    time.sleep(0.001)  # 1ms pulse width
-                    step_pin.value = False
-                    time.sleep(0.01)   # 10ms between steps (100 steps/second)
-                
-                return f"A4988 moved {steps} steps"
-            except Exception as e:
-                print(f"A4988 command error: {e}")
-                return f"A4988 error: {e}"
-        else:
-            return "A4988 stepper not available"
+        try:
+            # stepper:<steps>[:<max_speed>[:<accel>[:<trap|scurve>]]]
+            parts = command.split(":")
+            steps = int(parts[1])
+            max_speed = int(parts[2]) if len(parts) > 2 else 0
+            accel = int(parts[3]) if len(parts) > 3 else 0
+            profile = parts[4] if len(parts) > 4 else ""
+            return stepper_command(steps, max_speed, accel, profile)
+        except Exception as e:
+            print(f"A4988 command error: {e}")
+            return f"A4988 error: {e}"
 
     elif command == "stepperTest":
-        if stepper_motor == "A4988_READY" and step_pin and dir_pin:
-            try:
-                print("Testing A4988 stepper - 50 steps forward, 50 steps back")
-                
-                # 50 steps forward
-                dir_pin.value = True
-                for i in range(50):
-                    step_pin.value = True
-                    time.sleep(0.001)
-                    step_pin.value = False
-                    time.sleep(0.02)  # Slower for test
-                
-                time.sleep(0.5)  # Pause between directions
-                
-                # 50 steps backward
-                dir_pin.value = False
-                for i in range(50):
-                    step_pin.value = True
-                    time.sleep(0.001)
-                    step_pin.value = False
-                    time.sleep(0.02)  # Slower for test
-                
-                return "A4988 test completed: 50 forward, 50 backward"
-            except Exception as e:
-                print(f"A4988 test error: {e}")
-                return f"A4988 test error: {e}"
+        if stepper_ready():
+            return stepper_test_action()
         else:
             return "A4988 stepper not available"
 
     elif command.startswith("brushMotor:"):
-        if brush_motor_available:
-            try:
-                _, speed_str = command.split(":")
-                speed = int(speed_str)
-                throttle = speed / 100.0
-                esc_motor.throttle = throttle
-                
-                if speed == 0:
-                    return "Motor stopped"
-                elif speed > 0:
-                    return f"Motor forward at {speed}%"
-                else:
-                    return f"Motor reverse at {abs(speed)}%"
-            except Exception as e:
-                return f"Motor error: {e}"
-        else:
-            return "ESC not available"
+        try:
+            _, speed_str = command.split(":")
+            return brush_motor_command(int(speed_str))
+        except Exception as e:
+            return f"Motor error: {e}"
 
     elif command == "servoThenMotor":
-        if brush_motor_available and my_servo:
-            try:
-                print("Starting servo-then-motor sequence")
-                
-                # Move servo to 90 degrees first
-                my_servo.angle = 90
-                time.sleep(0.5)
-                print("Servo moved to 90 degrees")
-                
-                # Run motor at 20% for 0.5 seconds
-                esc_motor.throttle = 0.2
-                time.sleep(0.5)
-                esc_motor.throttle = 0.0
-                print("Motor sequence completed")
-                
-                # Move servo back to 0
-                my_servo.angle = 0
-                time.sleep(0.5)
-                print("Servo returned to 0 degrees")
-                
-                return "Servo-then-motor sequence completed"
-            except Exception as e:
-                print(f"Servo-then-motor error: {e}")
-                return f"Servo-then-motor error: {e}"
-        else:
-            return "Servo or motor not available"
+        return servo_then_motor_command()
+
+    elif command == "arm" or command.startswith("arm:"):
+        try:
+            return arm_command(command[4:])
+        except Exception as e:
+            return f"Arm error: {e}"
+
+    elif command == "disarm":
+        return disarm_command()
+
+    elif command.startswith("fire:"):
+        try:
+            # fire:<shots>[:<interval_ms>]
+            parts = command.split(":")
+            interval_ms = int(parts[2]) if len(parts) > 2 else 0
+            return fire_command(int(parts[1]), interval_ms)
+        except Exception as e:
+            return f"Fire error: {e}"
 
     elif command == "stepper_debug":
-        if stepper_motor == "A4988_READY" and step_pin and dir_pin:
-            try:
-                print("A4988 Debug Test - Manual pin control")
-                
-                # Test direction pin
-                print("Testing DIR pin - HIGH for 2 seconds")
-                dir_pin.value = True
-                time.sleep(2)
-                
-                print("Testing DIR pin - LOW for 2 seconds") 
-                dir_pin.value = False
-                time.sleep(2)
-                
-                # Test step pin with visible pulses
-                print("Testing STEP pin - 10 slow pulses")
-                for i in range(10):
-                    print(f"Step pulse {i+1}")
-                    step_pin.value = True
-                    time.sleep(0.5)  # Long pulse so you can see it
-                    step_pin.value = False
-                    time.sleep(0.5)  # Long gap so you can see it
-                
-                return "A4988 debug test completed"
-            except Exception as e:
-                return f"Debug test error: {e}"
+        if stepper_ready():
+            return stepper_debug_action()
         else:
             return "A4988 not available for debug"
 
+    elif command == "binary:on":
+        return set_binary_mode(True)
+
+    elif command == "binary:off":
+        return set_binary_mode(False)
+
     else:
         return "Unknown command"
 
-print("CircuitPython ready for commands")
+def process_frame_command(opcode, payload):
+    """Binary-protocol counterpart of process_command, without any string parsing"""
+    try:
+        args = decode_args(opcode, payload)
+    except Exception as e:
+        return f"Bad payload: {e}"
+    
+    if opcode == OP_SERVO:
+        return servo_command(args[0])
+    elif opcode == OP_BRUSH_MOTOR:
+        return brush_motor_command(args[0])
+    elif opcode == OP_STEPPER:
+        try:
+            return stepper_command(*args)
+        except Exception as e:
+            return f"A4988 error: {e}"
+    elif opcode == OP_SERVO_THEN_MOTOR:
+        return servo_then_motor_command()
+    elif opcode == OP_HARDWARE_TEST:
+        return hardware_test_command()
+    elif opcode == OP_ARM:
+        level = args[0]
+        return arm_command("idle" if level == ARM_IDLE else "fire" if level == ARM_FIRE else str(level))
+    elif opcode == OP_DISARM:
+        return disarm_command()
+    elif opcode == OP_FIRE:
+        return fire_command(*args)
+    elif opcode == OP_TEXT:
+        return process_command(args[0])
+    else:
+        return f"Unknown opcode {opcode}"
 
-while True:
-    if supervisor.runtime.serial_bytes_available:
+def split_sequence(line):
+    """Split "@<seq>:<command>" into (seq, command); plain commands have no seq"""
+    if line.startswith("@") and ":" in line:
+        seq, command = line[1:].split(":", 1)
+        return seq, command
+    return None, line
+
+# Replies go back on the channel the command arrived on
+CONSOLE = "console"
+BINARY = "binary"
+
+def reply(channel, seq, result):
+    if channel == BINARY:
+        data_port.write(encode_frame(OP_REPLY, int(seq), result.encode("utf-8")))
+    else:
+        # Echo the sequence ID so the host can match the reply to its command
+        print(f"#{seq}:{result}" if seq is not None else result)
+
+MAX_QUEUED_COMMANDS = 16
+MAX_INPUT_CHARS_PER_TICK = 64
+MAX_INPUT_BYTES_PER_TICK = 256
+
+input_buffer = ""
+frame_decoder = FrameDecoder()
+command_queue = []
+current_channel = None
+current_seq = None
+current_action = None
+resume_at = 0
+
+def read_serial_lines():
+    """Collect whatever serial input is waiting without blocking; return complete lines"""
+    global input_buffer
+    lines = []
+    chars = 0
+    while supervisor.runtime.serial_bytes_available and chars < MAX_INPUT_CHARS_PER_TICK:
+        ch = sys.stdin.read(1)
+        chars += 1
+        if ch == "\n" or ch == "\r":
+            if input_buffer:
+                lines.append(input_buffer)
+            input_buffer = ""
+        else:
+            input_buffer += ch
+    return lines
+
+def read_frames():
+    """Decode whatever binary input is waiting on the data channel"""
+    if not binary_enabled:
+        return []
+    waiting = data_port.in_waiting
+    if not waiting:
+        return []
+    return frame_decoder.feed(data_port.read(min(waiting, MAX_INPUT_BYTES_PER_TICK)))
+
+def make_safe():
+    """Leave every actuator in a harmless state; this also disarms the flywheel"""
+    global armed_throttle
+    armed_throttle = 0.0
+    if step_pin:
+        step_pin.value = False
+    if brush_motor_available:
+        esc_motor.throttle = 0.0
+    if my_servo:
+        my_servo.angle = PUSHER_REST_ANGLE
+
+MAX_TELEMETRY_HZ = 50
+
+telemetry_channel = None  # channel that asked for status messages, None while off
+telemetry_interval_ns = 0
+telemetry_seq = 0
+next_telemetry_at = 0
+loop_window_start = 0
+last_loop_at = 0
+loop_count = 0
+loop_max_ns = 0
+
+def set_telemetry(channel, hz):
+    """Send status messages hz times a second on channel; 0 turns them off"""
+    global telemetry_channel, telemetry_interval_ns, next_telemetry_at
+    global loop_window_start, last_loop_at, loop_count, loop_max_ns
+    if hz <= 0:
+        telemetry_channel = None
+        return "telemetry:off"
+    if hz > MAX_TELEMETRY_HZ:
+        return f"Telemetry error: 1-{MAX_TELEMETRY_HZ} Hz"
+    now = time.monotonic_ns()
+    telemetry_channel = channel
+    telemetry_interval_ns = 1000000000 // hz
+    next_telemetry_at = now + telemetry_interval_ns
+    loop_window_start = last_loop_at = now
+    loop_count = 0
+    loop_max_ns = 0
+    return f"telemetry:on:{hz}"
+
+def telemetry_command(channel, args):
+    """Text form: "on:<hz>" or "off" """
+    if args == "off":
+        return set_telemetry(channel, 0)
+    if args.startswith("on:"):
+        try:
+            hz = int(args[3:])
+        except ValueError:
+            hz = 0
+        if hz > 0:
+            return set_telemetry(channel, hz)
+    return "Telemetry error: use telemetry:on:<hz> or telemetry:off"
+
+def status_values(now):
+    throttle = esc_motor.throttle if brush_motor_available else None
+    angle = my_servo.angle if my_servo else None
+    loops = max(loop_count, 1)
+    return (
+        (now // 1000000) & 0xFFFFFFFF,
+        min(loop_count, 65535),
+        min((now - loop_window_start) // loops // 1000, 65535),
+        min(loop_max_ns // 1000, 65535),
+        min(len(command_queue), 255),
+        1 if current_action is not None else 0,
+        steps_executed & 0xFFFFFFFF,
+        int(throttle * 100) if throttle is not None else 0,
+        int(angle) if angle is not None else -1,
+    )
+
+def tick_telemetry():
+    """Time this pass of the main loop and send a status message when one is due"""
+    global telemetry_seq, next_telemetry_at, loop_window_start, last_loop_at, loop_count, loop_max_ns
+    now = time.monotonic_ns()
+    loop_ns = now - last_loop_at
+    last_loop_at = now
+    loop_count += 1
+    if loop_ns > loop_max_ns:
+        loop_max_ns = loop_ns
+    if now < next_telemetry_at:
+        return
+
+    values = status_values(now)
+    if telemetry_channel == BINARY:
+        data_port.write(encode_frame(OP_STATUS, telemetry_seq, encode_telemetry(values)))
+    else:
+        print(format_telemetry_line(telemetry_seq, values))
+    telemetry_seq = (telemetry_seq + 1) & 0xFFFF
+
+    # Skip rather than burst if a long slice made us miss some
+    next_telemetry_at += telemetry_interval_ns
+    if next_telemetry_at < now:
+        next_telemetry_at = now + telemetry_interval_ns
+    loop_window_start = now
+    loop_count = 0
+    loop_max_ns = 0
+
+def cancel_all(reason):
+    """Preempt the running action and drop everything queued, replying reason to each"""
+    global current_action, current_channel, current_seq
+    if current_action is not None:
+        current_action.close()
+        reply(current_channel, current_seq, reason)
+        current_action = None
+        current_channel = None
+        current_seq = None
+    while command_queue:
+        queued_channel, queued_seq, _ = command_queue.pop(0)
+        reply(queued_channel, queued_seq, reason)
+
+def stop_all(channel, seq):
+    """Preempt the running action, drop everything queued and stop the motors"""
+    cancel_all("Cancelled by stop")
+    make_safe()
+    reply(channel, seq, "Stopped")
+
+# Failsafe: if the host goes quiet (crashed, unplugged, hung) for this long while
+# anything is moving or queued, stop as if it had sent stop. The host's heartbeat
+# pings every couple of seconds while idle, well inside this; scripts that leave a
+# motor running through a long wait (communication.py) ping during it too.
+HOST_TIMEOUT_MS = 5000
+
+last_host_ns = time.monotonic_ns()
+failsafe_tripped = False
+
+def host_seen():
+    global last_host_ns, failsafe_tripped
+    last_host_ns = time.monotonic_ns()
+    failsafe_tripped = False
+
+def actuators_active():
+    throttle = esc_motor.throttle if brush_motor_available else None
+    return current_action is not None or command_queue or armed_throttle > 0 or bool(throttle)
+
+def check_failsafe():
+    global failsafe_tripped
+    if failsafe_tripped or time.monotonic_ns() - last_host_ns < HOST_TIMEOUT_MS * 1000000:
+        return
+    failsafe_tripped = True
+    if actuators_active():
+        cancel_all("Cancelled by failsafe")
+        make_safe()
+        print(f"Failsafe: nothing from the host for {HOST_TIMEOUT_MS} ms, disarmed")
+
+def queue_command(channel, seq, cmd):
+    if len(command_queue) >= MAX_QUEUED_COMMANDS:
+        reply(channel, seq, "Busy: command queue full")
+    else:
+        command_queue.append((channel, seq, cmd))
+
+def pong(nonce):
+    """Echo for the latency benchmark, stamped with the board clock"""
+    return f"pong:{nonce}:{time.monotonic_ns()}"
+
+def handle_line(line):
+    seq, cmd = split_sequence(line.strip())
+    if not cmd:
+        return
+    host_seen()
+    if cmd == "stop":
+        stop_all(CONSOLE, seq)
+    elif cmd == "ping":
+        # Answered straight away, even mid-action, so host heartbeats never queue behind a shot
+        reply(CONSOLE, seq, "pong")
+    elif cmd.startswith("ping:"):
+        reply(CONSOLE, seq, pong(cmd[5:]))
+    elif cmd.startswith("telemetry:"):
+        # Also immediate, so the stream can be switched on while a burst runs
+        reply(CONSOLE, seq, telemetry_command(CONSOLE, cmd[10:]))
+    else:
+        queue_command(CONSOLE, seq, cmd)
+
+def handle_frame(opcode, seq, payload):
+    host_seen()
+    if opcode == OP_STOP:
+        stop_all(BINARY, seq)
+    elif opcode == OP_PING:
+        reply(BINARY, seq, pong(payload.decode("utf-8")))
+    elif opcode == OP_TELEMETRY:
         try:
-            cmd = sys.stdin.readline().strip()
-            if cmd:
-                result = process_command(cmd)
-                if result:
-                    print(result)
+            reply(BINARY, seq, set_telemetry(BINARY, decode_args(opcode, payload)[0]))
         except Exception as e:
-            print(f"Error: {e}")
+            reply(BINARY, seq, f"Bad payload: {e}")
+    elif opcode == OP_BATCH:
+        for inner in decode_batch(payload):
+            handle_frame(*inner)
+    else:
+        queue_command(BINARY, seq, (opcode, payload))
+
+def start_next_command():
+    global current_action, current_channel, current_seq, resume_at
+    channel, seq, cmd = command_queue.pop(0)
+    if channel == BINARY:
+        result = process_frame_command(*cmd)
+    else:
+        result = process_command(cmd)
+    if isinstance(result, str):
+        reply(channel, seq, result)
+    else:
+        current_action = result
+        current_channel = channel
+        current_seq = seq
+        resume_at = 0
+
+def run_current_action():
+    """Advance the running action by one slice if its deadline has passed"""
+    global current_action, current_channel, current_seq, resume_at
+    if time.monotonic_ns() < resume_at:
+        return
+    try:
+        step = next(current_action)
+    except StopIteration:
+        step = "Done"
+    except Exception as e:
+        make_safe()
+        step = f"Error: {e}"
+    if isinstance(step, str):
+        reply(current_channel, current_seq, step)
+        current_action = None
+        current_channel = None
+        current_seq = None
+    else:
+        resume_at = step
+
+print("CircuitPython ready for commands")
+
+while True:
+    try:
+        for line in read_serial_lines():
+            handle_line(line)
+        
+        for frame in read_frames():
+            handle_frame(*frame)
+        
+        if current_action is None and command_queue:
+            start_next_command()
+        
+        if current_action is not None:
+            run_current_action()
+        
+        if telemetry_channel is not None:
+            tick_telemetry()
+        
+        check_failsafe()
+    except Exception as e:
+        print(f"Error: {e}")
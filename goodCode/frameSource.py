@@ -0,0 +1,70 @@
+import os
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+
+def video_frames(path, size=None):
+    """Yield frames from a video file or camera index, resized to size if given"""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video {path}")
+    try:
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield cv2.resize(frame, size) if size else frame
+    finally:
+        cap.release()
+
+
+def image_sequence_frames(directory, size=None):
+    """Yield frames from a directory of images in filename order"""
+    names = sorted(n for n in os.listdir(directory) if n.lower().endswith(IMAGE_EXTENSIONS))
+    for name in names:
+        frame = cv2.imread(os.path.join(directory, name))
+        if frame is None:
+            print(f"Skipping unreadable image {name}")
+            continue
+        yield cv2.resize(frame, size) if size else frame
+
+
+def synthetic_frames(count=300, size=(1280, 720), blobs=2, seed=0):
+    """Yield a noisy static scene with moving blobs, for benchmarking without footage
+
+    The first third of the frames is empty so background models can settle.
+    """
+    rng = np.random.default_rng(seed)
+    width, height = size
+    background = rng.integers(30, 90, (height, width, 3), dtype=np.uint8)
+    background = cv2.GaussianBlur(background, (0, 0), 5)
+
+    starts = rng.uniform(0.1, 0.9, (blobs, 2)) * (width, height)
+    velocities = rng.uniform(-6, 6, (blobs, 2))
+    radii = rng.integers(height // 12, height // 6, blobs)
+
+    for i in range(count):
+        frame = background.copy()
+        noise = rng.integers(-6, 7, frame.shape, dtype=np.int16)
+        frame = np.clip(frame.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+        if i >= count // 3:
+            positions = starts + velocities * (i - count // 3)
+            for (x, y), r in zip(positions, radii):
+                x = int(x) % width
+                y = int(y) % height
+                cv2.ellipse(frame, (x, y), (int(r * 0.6), int(r)), 0, 0, 360, (220, 200, 180), -1)
+        yield frame
+
+
+def open_frames(source, size=None, seed=0):
+    """Frames from a camera index, a video file, an image directory, or 'synthetic'"""
+    if source == "synthetic":
+        return synthetic_frames(size=size or (1280, 720), seed=seed)
+    if str(source).isdigit():
+        return video_frames(int(source), size)
+    if os.path.isdir(source):
+        return image_sequence_frames(source, size)
+    return video_frames(source, size)
@@ -0,0 +1,313 @@
+import math
+import time
+
+import cv2
+
+from backgroundModel import BackgroundModelManager
+from hudOverlay import FONT, HudOverlay
+from stageTimer import stage_timer
+from tracker import MultiObjectTracker
+
+
+class TriggerEvent:
+    """One motor/servo trigger fired by the game loop, at one track
+
+    aim_x, aim_y is where the track is predicted to be once the shot lands,
+    actuation_latency after the frame.
+    """
+
+    def __init__(self, frame_number, elapsed_time, total_area, group_count, track_id=None, aim_x=None, aim_y=None):
+        self.frame_number = frame_number
+        self.elapsed_time = elapsed_time
+        self.total_area = total_area
+        self.group_count = group_count
+        self.track_id = track_id
+        self.aim_x = aim_x
+        self.aim_y = aim_y
+
+
+class GameLoop:
+    """Red light / green light phases, motion detection, triggering and HUD for one frame at a time
+
+    The caller owns the clock and the frame source, so the same logic runs on
+    the live camera pipeline and on recorded footage in replay.py.
+
+    Motion groups are tracked across frames and triggers go to tracks: a
+    confirmed track bigger than the trigger area fires at most once per
+    motion_cooldown, and trigger_fn gets the TriggerEvent with its predicted
+    aim point. ready_fn, if given, gates every trigger: while it returns
+    False (say the launcher is still firing the last burst) no target is
+    picked and no track's cooldown is spent.
+    """
+
+    def __init__(self, motion_detector, trigger_fn, cycle_music, frame_size=(1280, 720),
+                 cycle_duration=6, recording_duration=60, motion_cooldown=2.0,
+                 settle_time=0.5, background_backend="mog2", depth_available=False, show_hud=True,
+                 show_timing=False, actuation_latency=0.3, ready_fn=None):
+        self.motion_detector = motion_detector
+        self.trigger_fn = trigger_fn
+        self.ready_fn = ready_fn
+        self.cycle_music = cycle_music
+        self.frame_width, self.frame_height = frame_size
+        self.cycle_duration = cycle_duration
+        self.recording_duration = recording_duration
+        self.motion_cooldown = motion_cooldown  # per track: 2 seconds between shots at the same target
+        self.actuation_latency = actuation_latency  # serial round trip plus servo travel, in seconds
+        self.depth_available = depth_available  # None while the depth model is still loading
+        self.show_timing = show_timing  # needs stage_timer.enabled
+
+        # Headless runs can skip all drawing with show_hud=False
+        self.hud = None
+        if show_hud:
+            self.hud = HudOverlay(frame_size)
+            frame_center_x = self.frame_width // 2
+            frame_center_y = self.frame_height // 2
+            crosshair_size = 20
+            self.hud.line("crosshair_h", (frame_center_x - crosshair_size, frame_center_y),
+                          (frame_center_x + crosshair_size, frame_center_y), (255, 255, 255), 2)
+            self.hud.line("crosshair_v", (frame_center_x, frame_center_y - crosshair_size),
+                          (frame_center_x, frame_center_y + crosshair_size), (255, 255, 255), 2)
+            self.hud.text("recording", "RECORDING", (20, 190), 1.0, (0, 0, 255), 3)
+
+        # Learns through green light, and only slowly during red light after settle_time
+        self.background_model = BackgroundModelManager(motion_detector, backend=background_backend,
+                                                       settle_time=settle_time)
+
+        self.tracker = MultiObjectTracker()
+        self.previous_detection_state = False
+        self.contour_groups = []
+        self.tracks = []
+        self.music_switched = False
+        self.frame_count = 0
+        self.trigger_events = []
+
+    def step(self, frame, elapsed_time, depth=None):
+        """Run detection on a full-resolution frame and draw the HUD onto it
+
+        depth is a fresh DepthResult or None. Returns the motion groups found.
+        """
+        self.frame_count += 1
+
+        if not self.music_switched and elapsed_time >= self.cycle_duration:
+            print("Starting green/red light sound effects (squid music continues)...")
+            self.cycle_music.start()
+            self.music_switched = True
+
+        current_music_state = "squid"
+        music_remaining = 0
+        if self.music_switched:
+            current_music_state, music_remaining = self.cycle_music.update()
+
+        cycle_position = elapsed_time % (self.cycle_duration * 2)
+        motion_detection_active = cycle_position >= self.cycle_duration
+
+        if motion_detection_active != self.previous_detection_state:
+            print(f"Motion detection state changed to: {'ON' if motion_detection_active else 'OFF'}")
+            self.contour_groups = []
+            self.tracks = []
+            self.tracker.reset()
+            if motion_detection_active:
+                self.background_model.start_red(elapsed_time)
+            else:
+                self.background_model.start_green()
+
+        motion_detected = False
+        motion_count = 0
+
+        if motion_detection_active:
+            settle_remaining = self.background_model.settle_remaining(elapsed_time)
+            if settle_remaining > 0:
+                # Let the warm model absorb where everyone stopped before looking for motion
+                self.background_model.settle(frame)
+                self.contour_groups = []
+                print(f"Settling background: {settle_remaining:.1f}s remaining")
+            else:
+                self.contour_groups = self.background_model.detect(frame)
+                total_area = sum(group.area for group in self.contour_groups)
+
+                # Sample depth only inside each group's box and put the closest target first
+                if depth is not None and self.contour_groups:
+                    for group in self.contour_groups:
+                        group.depth = depth.sample_box(*group.bbox)
+                    self.contour_groups.sort(key=lambda group: group.depth, reverse=True)
+                motion_detected = len(self.contour_groups) > 0
+
+                start = stage_timer.start()
+                self.tracks = self.tracker.update(self.contour_groups, elapsed_time)
+                stage_timer.stop("tracking", start)
+
+                target = None
+                if self.ready_fn is None or self.ready_fn():
+                    target = self.select_target(elapsed_time)
+                if target is not None:
+                    aim_x, aim_y = target.position_at(elapsed_time + self.actuation_latency)
+                    print(f"Track {target.track_id} area {int(target.area)} - triggering motor/servo, "
+                          f"aiming at ({aim_x:.0f}, {aim_y:.0f})")
+                    target.last_fire_time = elapsed_time
+                    event = TriggerEvent(self.frame_count, elapsed_time, total_area, len(self.contour_groups),
+                                         target.track_id, aim_x, aim_y)
+                    self.trigger_events.append(event)
+                    self.trigger_fn(event)
+
+                # Draw detection results
+                if motion_detected and self.hud is not None:
+                    start = stage_timer.start()
+                    self.draw_groups(frame, elapsed_time)
+                    stage_timer.stop("hud_groups", start)
+
+            motion_count = len(self.contour_groups)
+        else:
+            # Green light keeps the same model learning the scene
+            self.background_model.learn(frame)
+            self.contour_groups = []
+            self.tracks = []
+
+        self.previous_detection_state = motion_detection_active
+
+        if self.hud is not None:
+            start = stage_timer.start()
+            self.draw_hud(frame, elapsed_time, cycle_position, motion_detection_active, motion_detected,
+                          motion_count, depth, current_music_state, music_remaining)
+            stage_timer.stop("hud", start)
+        return self.contour_groups
+
+    def select_target(self, elapsed_time):
+        """The track to fire at this frame, or None
+
+        Only confirmed tracks seen this frame and big enough to trigger are
+        candidates, and each track has its own cooldown. Closest first when
+        depth is known, otherwise biggest; one shot per frame.
+        """
+        candidates = [track for track in self.tracks
+                      if track.area > self.motion_detector.trigger_area
+                      and (track.last_fire_time is None
+                           or elapsed_time - track.last_fire_time > self.motion_cooldown)]
+        if not candidates:
+            return None
+        if all(track.depth is not None for track in candidates):
+            return max(candidates, key=lambda track: track.depth)
+        return max(candidates, key=lambda track: track.area)
+
+    def draw_groups(self, frame, elapsed_time):
+        for group in self.contour_groups:
+            center_x, center_y, area = group.center_x, group.center_y, group.area
+            box_size = min(300, max(150, int(math.sqrt(area/10))))
+            half_size = box_size // 2
+
+            x1 = max(0, center_x - half_size)
+            y1 = max(0, center_y - half_size)
+            x2 = min(self.frame_width, center_x + half_size)
+            y2 = min(self.frame_height, center_y + half_size)
+
+            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 4)
+            label = "MOTION GROUP" if group.track_id is None else f"TARGET {group.track_id}"
+            cv2.putText(frame, label, (center_x - 80, center_y - 20),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
+            cv2.circle(frame, (center_x, center_y), 6, (0, 255, 0), -1)
+            cv2.putText(frame, f"Area: {int(area)}", (center_x - 60, center_y + 40),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+            if group.depth is not None:
+                cv2.putText(frame, f"Depth: {group.depth:.0f}", (center_x - 60, center_y + 65),
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+
+        # Where each confirmed track will be when a shot fired now would land
+        for track in self.tracks:
+            aim_x, aim_y = track.position_at(elapsed_time + self.actuation_latency)
+            cv2.drawMarker(frame, (int(aim_x), int(aim_y)), (0, 0, 255), cv2.MARKER_CROSS, 30, 3)
+
+    def draw_hud(self, frame, elapsed_time, cycle_position, motion_detection_active, motion_detected,
+                 motion_count, depth, current_music_state, music_remaining):
+        """Composite the cached HUD elements onto the frame, then draw the per-frame text over it
+
+        Countdowns change every frame, so caching them would only add a
+        redraw on top of the putText; they go straight onto the frame.
+        """
+        hud = self.hud
+        if motion_detection_active:
+            detection_status = "MOTION DETECTION: ON"
+            detection_color = (0, 255, 0)
+            if motion_detected:
+                status_text = "MOTION DETECTED"
+                status_color = (0, 255, 0)
+            else:
+                status_text = "NO MOTION"
+                status_color = (255, 255, 255)
+        else:
+            detection_status = "MOTION DETECTION: OFF"
+            detection_color = (0, 0, 255)
+            status_text = "DETECTION PAUSED"
+            status_color = (128, 128, 128)
+
+        hud.text("detection", detection_status, (20, 50), 1.0, detection_color, 3)
+
+        hud.text("status", status_text, (20, 100), 1.0, status_color, 3)
+
+        if self.depth_available is None:
+            depth_status = "AI DEPTH: LOADING"
+            depth_color = (0, 165, 255)
+        elif not self.depth_available:
+            depth_status = "AI DEPTH: FAILED"
+            depth_color = (0, 0, 255)
+        elif depth is None:
+            depth_status = "AI DEPTH: STALE"
+            depth_color = (0, 165, 255)
+        else:
+            depth_status = "AI DEPTH: ON"
+            depth_color = (0, 255, 255)
+        hud.text("depth", depth_status, (20, 150), 0.8, depth_color, 2)
+
+        if motion_detection_active:
+            hud.text("motion_count", f"Motion objects: {motion_count}", (20, 300), 0.7, (255, 255, 255), 2)
+        else:
+            hud.remove("motion_count")
+
+        hud.composite(frame)
+
+        if self.recording_duration is not None:
+            remaining_time = self.recording_duration - elapsed_time
+            cv2.putText(frame, f"Time left: {remaining_time:.1f}s", (20, 230), FONT, 0.8, (255, 255, 0), 2)
+
+        if motion_detection_active:
+            cycle_remaining = (self.cycle_duration * 2) - cycle_position
+        else:
+            cycle_remaining = self.cycle_duration - cycle_position
+
+        cycle_status = "ON" if motion_detection_active else "OFF"
+        cv2.putText(frame, f"Cycle: {cycle_status} ({cycle_remaining:.1f}s left)", (20, 270), FONT, 0.7,
+                    (255, 255, 0), 2)
+
+        if self.music_switched:
+            music_display = f"Music: squid + {current_music_state}-light ({music_remaining:.1f}s)"
+            music_color = (0, 255, 0) if current_music_state == "green" else (0, 0, 255)
+        else:
+            music_display = f"Music: squid only ({(self.cycle_duration - elapsed_time):.1f}s left)"
+            music_color = (255, 255, 0)
+
+        cv2.putText(frame, music_display, (20, 330), FONT, 0.6, music_color, 2)
+
+        if self.show_timing and stage_timer.enabled:
+            cv2.putText(frame, stage_timer.hud_line(), (20, 370), FONT, 0.45, (255, 255, 255), 1)
+
+
+class NullMusic:
+    """Silent stand-in for CycleMusic that follows the same green/red schedule on a supplied clock"""
+
+    def __init__(self, clock=time.time, cycle_duration=6):
+        self.clock = clock
+        self.cycle_duration = cycle_duration
+        self.start_time = None
+
+    def start(self):
+        self.start_time = self.clock()
+
+    def update(self):
+        if self.start_time is None:
+            return "unknown", 0
+        # Same schedule as music.get_current_cycle_state, without importing pygame
+        elapsed_time = self.clock() - self.start_time - 5.8
+        if elapsed_time < 0:
+            return "red", -elapsed_time
+        cycle_position = elapsed_time % (self.cycle_duration * 2)
+        if cycle_position >= self.cycle_duration:
+            return "red", (self.cycle_duration * 2) - cycle_position
+        return "green", self.cycle_duration - cycle_position
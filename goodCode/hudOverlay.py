@@ -0,0 +1,136 @@
+import cv2
+import numpy as np
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+
+def overlaps(a, b):
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+
+def union(*rects):
+    """Smallest (x, y, w, h) containing all the given rectangles"""
+    x1 = min(r[0] for r in rects)
+    y1 = min(r[1] for r in rects)
+    x2 = max(r[0] + r[2] for r in rects)
+    y2 = max(r[1] + r[3] for r in rects)
+    return (x1, y1, x2 - x1, y2 - y1)
+
+
+class HudOverlay:
+    """Pre-rendered HUD layer alpha-blended onto each frame in one pass
+
+    Elements are keyed by name. Setting an element to what it already shows is
+    a dictionary lookup; only an element whose text, position or colour
+    changed is cleared and redrawn into the overlay, along with any neighbour
+    it overlaps. Drawing onto black gives a premultiplied colour layer and
+    drawing white onto the mask gives the anti-aliased alpha, so composite()
+    is frame * (1 - alpha) + overlay over the elements' rectangles.
+
+    Only worth it for static or rarely changing elements: text that changes
+    every frame costs a redraw plus the blend, more than a plain putText.
+    """
+
+    def __init__(self, frame_size):
+        width, height = frame_size
+        self.frame_size = frame_size
+        self.overlay = np.zeros((height, width, 3), dtype=np.uint8)
+        self.mask = np.zeros((height, width), dtype=np.uint8)
+        self.elements = {}  # key -> (spec, (x, y, w, h))
+        self.inverse_alpha = np.full((height, width, 3), 255, dtype=np.uint8)  # 255 - mask, per channel
+        self.regions = []
+        self.redraws = 0
+
+    def text(self, key, text, org, scale, color, thickness):
+        self._set(key, ("text", text, org, scale, color, thickness))
+
+    def line(self, key, pt1, pt2, color, thickness):
+        self._set(key, ("line", pt1, pt2, color, thickness))
+
+    def remove(self, key):
+        entry = self.elements.pop(key, None)
+        if entry is not None:
+            self._repaint(entry[1])
+            self._update_regions()
+
+    def _set(self, key, spec):
+        entry = self.elements.get(key)
+        if entry is not None and entry[0] == spec:
+            return
+        rect = self._bounds(spec)
+        self.elements[key] = (spec, rect)
+        self._repaint(rect if entry is None else union(rect, entry[1]))
+        self.redraws += 1
+        self._update_regions()
+
+    def _bounds(self, spec):
+        """Clipped (x, y, w, h) covering everything the element draws"""
+        if spec[0] == "text":
+            _, text, (x, y), scale, _, thickness = spec
+            (w, h), baseline = cv2.getTextSize(text, FONT, scale, thickness)
+            x1, y1, x2, y2 = x - thickness, y - h - thickness, x + w + thickness, y + baseline + thickness
+        else:
+            _, (ax, ay), (bx, by), _, thickness = spec
+            x1, y1 = min(ax, bx) - thickness, min(ay, by) - thickness
+            x2, y2 = max(ax, bx) + thickness + 1, max(ay, by) + thickness + 1
+        x1, y1 = max(0, x1), max(0, y1)
+        x2, y2 = min(self.frame_size[0], x2), min(self.frame_size[1], y2)
+        return (x1, y1, max(0, x2 - x1), max(0, y2 - y1))
+
+    def _draw(self, spec, overlay, mask):
+        if spec[0] == "text":
+            _, text, org, scale, color, thickness = spec
+            cv2.putText(overlay, text, org, FONT, scale, color, thickness)
+            cv2.putText(mask, text, org, FONT, scale, 255, thickness)
+        else:
+            _, pt1, pt2, color, thickness = spec
+            cv2.line(overlay, pt1, pt2, color, thickness)
+            cv2.line(mask, pt1, pt2, 255, thickness)
+
+    def _repaint(self, rect):
+        """Clear a rectangle and redraw, clipped to it, every element that overlaps it"""
+        x, y, w, h = rect
+        if w == 0 or h == 0:
+            return
+        self.overlay[y:y + h, x:x + w] = 0
+        self.mask[y:y + h, x:x + w] = 0
+        for spec, other in self.elements.values():
+            if overlaps(rect, other):
+                # Clipped so pixels outside the cleared window are never blended twice
+                self._draw_clipped(spec, rect)
+        self.inverse_alpha[y:y + h, x:x + w] = cv2.cvtColor(255 - self.mask[y:y + h, x:x + w], cv2.COLOR_GRAY2BGR)
+
+    def _draw_clipped(self, spec, rect):
+        x, y, w, h = rect
+        overlay = self.overlay[y:y + h, x:x + w]
+        mask = self.mask[y:y + h, x:x + w]
+        if spec[0] == "text":
+            _, text, (ox, oy), scale, color, thickness = spec
+            self._draw(("text", text, (ox - x, oy - y), scale, color, thickness), overlay, mask)
+        else:
+            _, (ax, ay), (bx, by), color, thickness = spec
+            self._draw(("line", (ax - x, ay - y), (bx - x, by - y), color, thickness), overlay, mask)
+
+    def _update_regions(self):
+        """Merge element rectangles until none overlap, so each pixel is blended once"""
+        regions = [rect for _, rect in self.elements.values() if rect[2] and rect[3]]
+        merged = True
+        while merged:
+            merged = False
+            for i in range(len(regions)):
+                for j in range(i + 1, len(regions)):
+                    if overlaps(regions[i], regions[j]):
+                        regions[i] = union(regions[i], regions.pop(j))
+                        merged = True
+                        break
+                if merged:
+                    break
+        self.regions = regions
+
+    def composite(self, frame):
+        """Blend the HUD onto frame in place"""
+        for x, y, w, h in self.regions:
+            roi = frame[y:y + h, x:x + w]
+            cv2.multiply(roi, self.inverse_alpha[y:y + h, x:x + w], dst=roi, scale=1 / 255)
+            cv2.add(roi, self.overlay[y:y + h, x:x + w], dst=roi)
+        return frame
@@ -1,458 +1,365 @@
 import cv2
-import numpy as np
 import time
-import math
-from music import CycleMusic, play_squid_music, stop_music
-import torch
-import torch.nn.functional as F
-from torchvision.transforms import Compose
-import urllib.request
-import os
-import serial
-import serial.tools.list_ports
-
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-
-def find_xiao_port():
-    ports = serial.tools.list_ports.comports()
-    for port in ports:
-        if "usbmodem" in port.device.lower() or "2e8a" in str(port.hwid):
-            return port.device
-    return None
-
-try:
-    PORT = find_xiao_port() or "/dev/cu.usbmodem11401"
-    ser = serial.Serial(PORT, 115200, timeout=1)
-    time.sleep(2)
-    print(f"Connected to Xiao RP2040 on {PORT}")
-    
-    ser.write(b'\x03')
-    time.sleep(0.5)
-    ser.write(b'\x04')
-    time.sleep(3)
-    
-    while ser.in_waiting > 0:
-        ser.read(ser.in_waiting)
-        time.sleep(0.1)
-        
-    motor_available = True
-    print("Motor control ready")
-except Exception as e:
-    print(f"Motor connection failed: {e}")
-    motor_available = False
-    ser = None
-
-def send_motor_command(cmd):
-    """Send command to Xiao RP2040 and get response"""
-    if not motor_available or ser is None:
-        return "Motor not available"
-    
-    try:
-        ser.write((cmd + "\r\n").encode("utf-8"))
-        time.sleep(0.1)
-        
-        attempts = 0
-        while attempts < 5:  # 0.5 second timeout
-            if ser.in_waiting > 0:
-                response = ser.readline().decode('utf-8', errors='ignore').strip()
-                if response and not response.startswith('>>>') and response != cmd:
-                    return response
-            time.sleep(0.1)
-            attempts += 1
-        return "No response"
-    except Exception as e:
-        return f"Error: {e}"
-
-def trigger_motor_and_servo():
-    """Trigger servo first, then motor using combined command"""
-    if motor_available:
-        print("Motion detected! Running servo-then-motor sequence...")
-        send_motor_command("servoThenMotor")
-        print("Servo-then-motor sequence completed")
-
-try:
-    model_type = "MiDaS_small"
-    midas = torch.hub.load("intel-isl/MiDaS", model_type, trust_repo=True)
-    midas.to(device)
-    midas.eval()
-    
-    midas_transforms = torch.hub.load("intel-isl/MiDaS", "transforms", trust_repo=True)
-    transform = midas_transforms.small_transform
-    print("MiDaS model loaded")
-except Exception as e:
-    print(f"Error loading MiDaS: {e}")
-    midas = None
-    transform = None
-
-def estimate_depth(frame):
-    if midas is None:
-        return None
-    
-    try:
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        
-        input_batch = transform(rgb_frame).to(device)
-        
-        with torch.no_grad():
-            prediction = midas(input_batch)
-            
-            prediction = F.interpolate(
-                prediction.unsqueeze(1),
-                size=frame.shape[:2],
-                mode="bicubic",
-                align_corners=False,
-            ).squeeze()
-        
-        depth_map = prediction.cpu().numpy()
-        
-        depth_normalized = cv2.normalize(depth_map, None, 0, 255, cv2.NORM_MINMAX, dtype=cv2.CV_8U)
-        
-        return depth_map, depth_normalized
-    
-    except Exception as e:
-        print(f"Error in depth estimation: {e}")
-        return None, None
-
-def get_object_depth(depth_map, center_x, center_y, window_size=20):
-    if depth_map is None:
-        return None
-    
-    half_window = window_size // 2
-    x_start = max(0, center_x - half_window)
-    x_end = min(depth_map.shape[1], center_x + half_window)
-    y_start = max(0, center_y - half_window)
-    y_end = min(depth_map.shape[0], center_y + half_window)
-    
-    roi = depth_map[y_start:y_end, x_start:x_end]
-    
-    return np.median(roi)
-
-cap = cv2.VideoCapture(0)
+import threading
+from pipeline import FrameRing, CaptureStage, print_pipeline_stats
+from depthWorker import DepthWorker
+from depthModel import load_depth_model
+from detection import MotionDetector
+from gameLoop import GameLoop, NullMusic
+from startup import Startup
+from stageTimer import stage_timer
+from recorder import VideoRecorder, CONTINUOUS, CLIPS
+from serialLink import SerialLink
+from motorClient import parse_fire_reply
+from telemetry import TelemetryCollector
+
+# Importing this module only sets configuration; App().run() opens the camera,
+# serial port, depth model and audio, all at the same time.
+
+# Per-stage timing; written to stage_timings.csv/.json at the end of the session when enabled
+enable_stage_timing = False
+show_timing_hud = False
+stage_timer.enabled = enable_stage_timing
+
+# Turn the whole HUD off to save drawing time, e.g. when nobody is watching
+show_hud = True
+
+camera_index = 0
+camera_timeout = 10.0
+
+# Text commands on the console channel; switch to binary frames on the data channel when the board supports it
+use_binary_protocol = True
+
+# Keep the flywheel spinning at its idle throttle ("idle", "fire" or a percent) so a
+# trigger only has to cycle the pusher; None spins it up from stopped on every burst.
+# Each trigger fires shots_per_trigger darts, burst_interval_ms apart (0 = back to back).
+arm_level = "idle"
+shots_per_trigger = 3
+burst_interval_ms = 0
+
+# How long shutdown waits for a serial connect still in progress, so the board it arms is stopped again
+serial_connect_timeout = 10.0
+
+# Firmware status messages (loop timing, queue depth, steps, throttle, servo angle) this many
+# times a second, written with the trigger times to telemetry_csv at the end; 0 turns them off
+telemetry_hz = 0
+telemetry_csv = "telemetry.csv"
+
+# Depth model from local files in goodCode/models (python depthModel.py export fills it once);
+# see depthModel.py for the backends. None keeps torch's default thread count
+depth_backend = "torchscript"
+depth_input_size = (256, 160)
+depth_threads = 2
+
+# Depth runs on its own thread; results older than this are ignored by detection
+max_depth_age = 1.0
+show_depth_window = True
 
 output_width = 1280
 output_height = 720
 
-fourcc = cv2.VideoWriter_fourcc(*'XVID')
-out = cv2.VideoWriter('depth_motion_output.avi', fourcc, 20.0, (output_width, output_height))
-
-# Create TWO separate background subtractors
-background_subtractor_active = cv2.createBackgroundSubtractorMOG2(
-    detectShadows=True,
-    varThreshold=50,
-    history=800
-)
-
-background_subtractor_pause = cv2.createBackgroundSubtractorMOG2(
-    detectShadows=True,
-    varThreshold=50,
-    history=800
-)
+# CLIPS writes a short file around every trigger into recording_dir;
+# CONTINUOUS records the whole session to depth_motion_output.avi
+recording_mode = CLIPS
+recording_dir = "clips"
+pre_roll_seconds = 3.0
+post_roll_seconds = 3.0
 
 motion_threshold = 7000
 
-print("Starting 60-second recording with AI depth estimation")
-print("Motion detection cycles: OFF for first 6 seconds, then ON for 6 seconds")
-print("Music: Squid music plays initially, then switches to green/red light cycling")
-print("Press 'q' to quit early")
-
-start_time = time.time()
-recording_duration = 60  
-cycle_duration = 6 
-
-frame_center_x = output_width // 2
-frame_center_y = output_height // 2
-
-play_squid_music() 
-
-cycle_music = CycleMusic(cycle_duration=6)
-music_switched = False
-
-depth_frame_skip = 5
-frame_counter = 0
-last_depth_map = None
-last_depth_normalized = None
-
-last_motion_trigger = 0
-motion_cooldown = 2.0  # 2 seconds between triggers instead of 1.0
-previous_detection_state = False
-state_change_buffer_time = 2.0  
-state_change_time = 0
-contour_groups = []
-
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        break
-    
-    elapsed_time = time.time() - start_time
-    if elapsed_time >= recording_duration:
-        print(f"\n60 seconds completed. Recording finished.")
-        break
-    
-    frame = cv2.resize(frame, (output_width, output_height))
-    frame_counter += 1
-
-    if not music_switched and elapsed_time >= cycle_duration:
-        print("Starting green/red light sound effects (squid music continues)...")
-        cycle_music.start()
-        music_switched = True
-
-    current_music_state = "squid"
-    music_remaining = 0
-    if music_switched:
-        current_music_state, music_remaining = cycle_music.update()
-
-    crosshair_size = 20
-    cv2.line(frame, (frame_center_x - crosshair_size, frame_center_y), 
-             (frame_center_x + crosshair_size, frame_center_y), (255, 255, 255), 2)
-    cv2.line(frame, (frame_center_x, frame_center_y - crosshair_size), 
-             (frame_center_x, frame_center_y + crosshair_size), (255, 255, 255), 2)
-
-    if midas is not None and frame_counter % depth_frame_skip == 0:
-        depth_result = estimate_depth(frame)
-        if depth_result[0] is not None:
-            last_depth_map, last_depth_normalized = depth_result
-
-    cycle_position = elapsed_time % (cycle_duration * 2)
-    motion_detection_active = cycle_position >= cycle_duration
-    
-    # Detect state changes and completely reset background models
-    state_just_changed = motion_detection_active != previous_detection_state
-    if state_just_changed:
-        state_change_time = elapsed_time
-        print(f"Motion detection state changed to: {'ON' if motion_detection_active else 'OFF'}")
-        
-        # Reset contour_groups when state changes
-        contour_groups = []
-        
-        # COMPLETE RESET: Create fresh background subtractors
-        if motion_detection_active:
-            # Starting motion detection - create fresh subtractor
-            background_subtractor_active = cv2.createBackgroundSubtractorMOG2(
-                detectShadows=True,
-                varThreshold=50,
-                history=800
-            )
-            print("Created fresh background model for motion detection")
-        else:
-            # Starting pause - create fresh subtractor
-            background_subtractor_pause = cv2.createBackgroundSubtractorMOG2(
-                detectShadows=True,
-                varThreshold=50,
-                history=800
-            )
-            print("Created fresh background model for pause period")
-    
-    # Check if we're in the buffer period after state change
-    in_buffer_period = state_just_changed and (elapsed_time - state_change_time) < state_change_buffer_time
-    
-    motion_detected = False
-    motion_count = 0
-    
-    if motion_detection_active:
-        if in_buffer_period:
-            # During buffer period, just learn background without detecting motion
-            background_subtractor_active.apply(frame, learningRate=0.3)  # Very fast learning
-            motion_detected = False
-            contour_groups = []  # Reset during buffer period
-            print(f"Buffer period: {state_change_buffer_time - (elapsed_time - state_change_time):.1f}s remaining")
-        else:
-            # Normal motion detection with completely fresh background model
-            fg_mask = background_subtractor_active.apply(frame, learningRate=0.002)
-            
-            # More aggressive morphological operations
-            kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (16, 16))
-            fg_mask = cv2.morphologyEx(fg_mask, cv2.MORPH_OPEN, kernel)
-            fg_mask = cv2.morphologyEx(fg_mask, cv2.MORPH_CLOSE, kernel)
-            
-            kernel_erode = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (8, 8))
-            fg_mask = cv2.erode(fg_mask, kernel_erode, iterations=2)
-            fg_mask = cv2.dilate(fg_mask, kernel_erode, iterations=2)
-            
-            contours, _ = cv2.findContours(fg_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            
-            # Filter and validate contours
-            valid_contours = []
-            for contour in contours:
-                area = cv2.contourArea(contour)
-                
-                if area > motion_threshold:
-                    x, y, w, h = cv2.boundingRect(contour)
-                    aspect_ratio = w / h if h > 0 else 0
-                    
-                    if 0.3 < aspect_ratio < 3.0:
-                        hull = cv2.convexHull(contour)
-                        hull_area = cv2.contourArea(hull)
-                        solidity = area / hull_area if hull_area > 0 else 0
-                        
-                        if solidity > 0.5:
-                            perimeter = cv2.arcLength(contour, True)
-                            if perimeter > 0:
-                                circularity = 4 * np.pi * area / (perimeter * perimeter)
-                                if circularity > 0.3:
-                                    valid_contours.append(contour)
-            
-            # Group nearby contours
-            def group_nearby_contours(contours, max_distance=150):
-                if not contours:
-                    return []
-                
-                centers = []
-                for contour in contours:
-                    M = cv2.moments(contour)
-                    if M["m00"] != 0:
-                        cx = int(M["m10"] / M["m00"])
-                        cy = int(M["m01"] / M["m00"])
-                        centers.append((cx, cy, contour))
-                
-                groups = []
-                used = set()
-                
-                for i, (cx1, cy1, contour1) in enumerate(centers):
-                    if i in used:
-                        continue
-                    
-                    group = [(cx1, cy1, contour1)]
-                    used.add(i)
-                    
-                    for j, (cx2, cy2, contour2) in enumerate(centers[i+1:], i+1):
-                        if j in used:
-                            continue
-                        
-                        distance = math.sqrt((cx1 - cx2)**2 + (cy1 - cy2)**2)
-                        if distance <= max_distance:
-                            group.append((cx2, cy2, contour2))
-                            used.add(j)
-                    
-                    total_area = sum(cv2.contourArea(item[2]) for item in group)
-                    if total_area > motion_threshold * 0.5:
-                        groups.append(group)
-                
-                return groups
-            
-            contour_groups = group_nearby_contours(valid_contours)
-            
-            all_motion_points = []
-            total_area = 0
-            
-            for group in contour_groups:
-                group_area = sum(cv2.contourArea(item[2]) for item in group)
-                weighted_x = sum(item[0] * cv2.contourArea(item[2]) for item in group) / group_area
-                weighted_y = sum(item[1] * cv2.contourArea(item[2]) for item in group) / group_area
-                
-                all_motion_points.append((int(weighted_x), int(weighted_y), group_area))
-                total_area += group_area
-                motion_detected = True
-            
-            # Motor trigger with short cooldown to prevent spam
-            if motion_detected and total_area > 10000 and (elapsed_time - last_motion_trigger) > motion_cooldown:
-                print(f"Motion area: {total_area} - triggering motor/servo")
-                time.sleep(0.3)
-                trigger_motor_and_servo()
-                last_motion_trigger = elapsed_time  # Update the trigger time
-            
-            # Draw detection results
-            if motion_detected and all_motion_points:
-                for center_x, center_y, area in all_motion_points:
-                    box_size = min(300, max(150, int(math.sqrt(area/10))))
-                    half_size = box_size // 2
-                    
-                    x1 = max(0, center_x - half_size)
-                    y1 = max(0, center_y - half_size)
-                    x2 = min(output_width, center_x + half_size)
-                    y2 = min(output_height, center_y + half_size)
-                    
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 4)
-                    cv2.putText(frame, f"MOTION GROUP", (center_x - 80, center_y - 20), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
-                    cv2.circle(frame, (center_x, center_y), 6, (0, 255, 0), -1)
-                    cv2.putText(frame, f"Area: {int(area)}", (center_x - 60, center_y + 40), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-        
-        motion_count = len(contour_groups) if 'contour_groups' in locals() else 0
+# "mog2", "knn", "running_average" or "median"; compare them with benchmarkBackgrounds.py
+background_backend = "mog2"
+
+# Background subtraction and contour analysis run at this size and are mapped
+# back to the output size; use (output_width, output_height) for full resolution
+analysis_width = 640
+analysis_height = 360
+
+recording_duration = 60
+cycle_duration = 6
+
+def open_camera():
+    cap = cv2.VideoCapture(camera_index)
+    if not cap.isOpened():
+        raise IOError(f"Could not open camera {camera_index}")
+    return cap
+
+def setup_board(link):
+    """Runs on every connect, since a reset board comes back disarmed and with telemetry off"""
+    if arm_level is not None:
+        print(f"Flywheel: {link.command(f'arm:{arm_level}')}")
+    if telemetry_hz:
+        print(f"Telemetry: {link.command(f'telemetry:on:{telemetry_hz}')}")
+
+def connect_motor(on_telemetry=None):
+    """Serial link to the Xiao RP2040; it keeps reconnecting in the background if the board drops out"""
+    link = SerialLink(use_binary=use_binary_protocol, on_connect=setup_board, on_telemetry=on_telemetry)
+    if link.connect():
+        print("Motor control ready")
     else:
-        # During pause, use separate background subtractor
-        background_subtractor_pause.apply(frame, learningRate=0.01)  # Moderate learning
-        contour_groups = []  # Reset during pause
-    
-    previous_detection_state = motion_detection_active
-    
-    if motion_detection_active:
-        detection_status = "MOTION DETECTION: ON"
-        detection_color = (0, 255, 0)
-        if motion_detected:
-            status_text = "MOTION DETECTED"
-            status_color = (0, 255, 0)
-        else:
-            status_text = "NO MOTION"
-            status_color = (255, 255, 255)
-    else:
-        detection_status = "MOTION DETECTION: OFF"
-        detection_color = (0, 0, 255)
-        status_text = "DETECTION PAUSED"
-        status_color = (128, 128, 128)
-    
-    cv2.putText(frame, detection_status, (20, 50), 
-               cv2.FONT_HERSHEY_SIMPLEX, 1.0, detection_color, 3)
-    
-    cv2.putText(frame, status_text, (20, 100), 
-               cv2.FONT_HERSHEY_SIMPLEX, 1.0, status_color, 3)
-    
-    depth_status = "AI DEPTH: ON" if midas is not None else "AI DEPTH: FAILED"
-    depth_color = (0, 255, 255) if midas is not None else (0, 0, 255)
-    cv2.putText(frame, depth_status, (20, 150), 
-               cv2.FONT_HERSHEY_SIMPLEX, 0.8, depth_color, 2)
-    
-    cv2.putText(frame, "RECORDING", (20, 190), 
-               cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 255), 3)
-    
-    remaining_time = recording_duration - elapsed_time
-    cv2.putText(frame, f"Time left: {remaining_time:.1f}s", (20, 230), 
-               cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 0), 2)
-    
-    if motion_detection_active:
-        cycle_remaining = (cycle_duration * 2) - cycle_position
-    else:
-        cycle_remaining = cycle_duration - cycle_position
-    
-    cycle_status = "ON" if motion_detection_active else "OFF"
-    cv2.putText(frame, f"Cycle: {cycle_status} ({cycle_remaining:.1f}s left)", (20, 270), 
-               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 0), 2)
-    
-    if music_switched:
-        music_display = f"Music: squid + {current_music_state}-light ({music_remaining:.1f}s)"
-        music_color = (0, 255, 0) if current_music_state == "green" else (0, 0, 255)
+        print("Motor not connected yet, retrying in the background")
+    link.start()
+    return link
+
+def load_depth():
+    depth_model = load_depth_model(depth_backend, input_size=depth_input_size, threads=depth_threads)
+    print(f"MiDaS model loaded ({depth_backend}) in {depth_model.load_time:.2f}s")
+    return depth_model
+
+def start_audio():
+    # pygame is only imported here, so tools importing this module never touch the mixer
+    from music import CycleMusic, play_squid_music
+    play_squid_music()
+    return CycleMusic(cycle_duration=cycle_duration)
+
+def report_burst(future):
+    try:
+        reply = future.result()
+    except Exception as e:
+        print(f"Burst: no reply ({e})")
+        return
+    fired = parse_fire_reply(reply)
+    if fired is None:
+        print(f"Burst: {reply}")
     else:
-        music_display = f"Music: squid only ({(cycle_duration - elapsed_time):.1f}s left)"
-        music_color = (255, 255, 0)
-    
-    cv2.putText(frame, music_display, (20, 330), 
-               cv2.FONT_HERSHEY_SIMPLEX, 0.6, music_color, 2)
-    
-    if motion_detection_active:
-        cv2.putText(frame, f"Motion objects: {motion_count}", (20, 300), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
-    
-    out.write(frame)
-    
-    cv2.imshow('AI Depth Motion Detection', frame)
-    
-    if last_depth_normalized is not None:
-        depth_display = cv2.resize(last_depth_normalized, (320, 240))
-        cv2.imshow('Depth Map', depth_display)
-    
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        print(f"\nRecording stopped early at {elapsed_time:.1f} seconds")
-        break
-
-cap.release()
-out.release()
-cv2.destroyAllWindows()
-
-if motor_available and ser:
-    send_motor_command("brushMotor:0")  # Ensure motor is stopped
-    ser.close()
-
-stop_music()
-
-
+        shots, ms, rate = fired
+        print(f"Burst: {shots} shots in {ms} ms, {rate:.1f} shots/s")
+
+
+class App:
+    """One game session: the camera, serial link, depth model and audio come up in parallel
+
+    Creating an App has no side effects. run() starts every component on its
+    own thread and begins detection as soon as the camera is open; triggers,
+    depth and sound effects join in whenever their component is ready.
+    """
+
+    def __init__(self):
+        self.telemetry = TelemetryCollector() if telemetry_hz else None
+        self.startup = Startup()
+        self.startup.add("camera", open_camera)
+        self.startup.add("serial", lambda: connect_motor(self.telemetry.add if self.telemetry else None))
+        self.startup.add("depth", load_depth)
+        self.startup.add("audio", start_audio)
+
+        self.recorder = None
+        self.game = None
+        self.depth_worker = None
+        self.pending_burst = None
+        self.depth_checked = False
+        self.audio_checked = False
+        self.start_time = None
+        self.stop_event = threading.Event()
+
+    def launcher_ready(self):
+        """False while the last burst is still firing, so triggers never queue up behind it"""
+        return self.pending_burst is None or self.pending_burst.done()
+
+    def fire_burst(self):
+        """Queue a burst without waiting for it; the shot rate is printed when the firmware replies"""
+        if not self.launcher_ready():
+            return
+        link = self.startup.value("serial")
+        command = f"fire:{shots_per_trigger}"
+        if burst_interval_ms:
+            command += f":{burst_interval_ms}"
+        future = link.send(command) if link is not None else None
+        if future is None:
+            print("Motion detected, but the motor is not connected")
+            return
+        print(f"Motion detected! Queued burst of {shots_per_trigger}")
+        self.pending_burst = future
+        # The reply only comes once the last shot is out, so this times the whole burst
+        start = stage_timer.start()
+        future.add_done_callback(lambda done: stage_timer.stop("burst", start))
+        future.add_done_callback(report_burst)
+
+    def on_trigger(self, event):
+        if self.telemetry is not None:
+            self.telemetry.mark(f"trigger track {event.track_id}")
+        self.fire_burst()
+        self.recorder.trigger()
+
+    def check_components(self):
+        """Bring depth and audio into the running game once their startup finishes"""
+        if not self.depth_checked and self.startup.is_ready("depth"):
+            self.depth_checked = True
+            depth_model = self.startup.value("depth")
+            if depth_model is not None:
+                self.depth_worker = DepthWorker(depth_model.estimate)
+                self.depth_worker.start()
+            self.game.depth_available = depth_model is not None
+
+        if not self.audio_checked and self.startup.is_ready("audio"):
+            self.audio_checked = True
+            cycle_music = self.startup.value("audio")
+            if cycle_music is not None:
+                # Take over the silent schedule where it is, so the sound effects stay in phase
+                cycle_music.start_time = self.game.cycle_music.start_time
+                self.game.cycle_music = cycle_music
+
+    def run_analysis(self, capture_ring, output_ring):
+        """Analysis stage: depth, then the game loop's detection, triggering and HUD drawing"""
+        last_depth = None
+
+        try:
+            while not self.stop_event.is_set():
+                packet = capture_ring.get_latest(timeout=0.5)
+                if packet is None:
+                    if capture_ring.is_drained():
+                        break
+                    continue
+                frame = packet.frame
+                self.check_components()
+
+                elapsed_time = time.time() - self.start_time
+                if elapsed_time >= recording_duration:
+                    print(f"\n60 seconds completed. Recording finished.")
+                    break
+
+                # Hand the clean frame to the depth worker before any HUD is drawn on it
+                depth_worker = self.depth_worker
+                if depth_worker is not None:
+                    if depth_worker.is_idle():
+                        depth_worker.submit(frame.copy(), packet.capture_time)
+                    last_depth = depth_worker.get_latest()
+                    if last_depth is not None and last_depth.age() >= max_depth_age:
+                        last_depth = None
+
+                self.game.step(frame, elapsed_time, last_depth)
+
+                packet.depth = last_depth
+                output_ring.put(packet)
+        finally:
+            self.stop_event.set()
+            output_ring.close()
+
+    def run(self):
+        """Play one session; the motor is stopped on the way out however it ends"""
+        self.startup.start()
+        try:
+            self.play()
+        finally:
+            self.shutdown()
+
+    def play(self):
+        cap = self.startup.wait("camera", timeout=camera_timeout)
+        if cap is None:
+            print("No camera, nothing to detect")
+            return
+
+        self.recorder = VideoRecorder(
+            'depth_motion_output.avi' if recording_mode == CONTINUOUS else recording_dir,
+            (output_width, output_height),
+            fps=20.0,
+            mode=recording_mode,
+            pre_roll=pre_roll_seconds,
+            post_roll=post_roll_seconds
+        )
+
+        motion_detector = MotionDetector(
+            frame_size=(output_width, output_height),
+            analysis_size=(analysis_width, analysis_height),
+            motion_threshold=motion_threshold,
+            trigger_area=10000
+        )
+
+        print("Starting 60-second recording with AI depth estimation")
+        print("Motion detection cycles: OFF for first 6 seconds, then ON for 6 seconds")
+        print("Music: Squid music plays initially, then switches to green/red light cycling")
+        print("Press 'q' to quit early")
+
+        self.start_time = time.time()
+
+        # Silent until the audio component is ready; check_components swaps in the real sounds
+        self.game = GameLoop(
+            motion_detector,
+            trigger_fn=self.on_trigger,
+            ready_fn=self.launcher_ready,
+            cycle_music=NullMusic(cycle_duration=cycle_duration),
+            frame_size=(output_width, output_height),
+            cycle_duration=cycle_duration,
+            recording_duration=recording_duration,
+            background_backend=background_backend,
+            depth_available=None,
+            show_hud=show_hud,
+            show_timing=show_timing_hud
+        )
+
+        # Capture -> analysis -> output pipeline. The capture ring only hands the newest
+        # frame to analysis so a slow frame never makes the next one stale.
+        capture_ring = FrameRing("analysis", capacity=2)
+        output_ring = FrameRing("output", capacity=8)
+
+        capture = CaptureStage(cap, capture_ring, size=(output_width, output_height))
+        analysis = threading.Thread(target=self.run_analysis, args=(capture_ring, output_ring),
+                                    name="analysis", daemon=True)
+        self.recorder.start()
+        capture.start()
+        analysis.start()
+
+        # Output stage stays on the main thread because imshow/waitKey must run there on macOS
+        while not output_ring.is_drained():
+            packet = output_ring.get(timeout=0.1)
+            if packet is not None:
+                start = stage_timer.start()
+                self.recorder.write(packet.frame, packet.capture_time)
+                stage_timer.stop("record_queue", start)
+
+                start = stage_timer.start()
+                cv2.imshow('AI Depth Motion Detection', packet.frame)
+
+                if show_depth_window and packet.depth is not None:
+                    cv2.imshow('Depth Map', packet.depth.visualization((320, 240)))
+
+            key = cv2.waitKey(1)
+            if packet is not None:
+                stage_timer.stop("display", start)
+            if key & 0xFF == ord('q'):
+                print(f"\nRecording stopped early at {time.time() - self.start_time:.1f} seconds")
+                break
+
+        self.stop_event.set()
+        capture.stop()
+        analysis.join(timeout=2.0)
+        capture.join(timeout=2.0)
+        if self.depth_worker is not None:
+            self.depth_worker.stop()
+            self.depth_worker.join(timeout=2.0)
+            print(f"Depth worker: {self.depth_worker.inferences} inferences, {self.depth_worker.frames_replaced} frames replaced before inference")
+        print_pipeline_stats(capture, [capture_ring, output_ring])
+        self.recorder.stop()
+        self.recorder.print_stats()
+        if stage_timer.enabled:
+            stage_timer.print_summary()
+
+        cap.release()
+        cv2.destroyAllWindows()
+
+    def shutdown(self):
+        """Stop the motor and music for whichever components made it up"""
+        self.startup.print_report()
+
+        # A connect still in progress would arm the flywheel after we left, so let it finish first
+        link = self.startup.wait("serial", timeout=serial_connect_timeout)
+        if link is not None:
+            if self.telemetry is not None and link.connected:
+                link.command("telemetry:off")
+            link.close()  # Sends stop first: cancels queued shots and ensures the motor is stopped
+            link.print_stats()
+
+        if self.telemetry is not None:
+            self.telemetry.print_summary()
+            rows = self.telemetry.export_csv(telemetry_csv)
+            print(f"Telemetry: {rows} rows written to {telemetry_csv}")
+
+        if stage_timer.enabled:
+            stage_timer.export("stage_timings")
+
+        if self.startup.value("audio") is not None:
+            from music import stop_music
+            stop_music()
+
+
+if __name__ == "__main__":
+    App().run()
@@ -0,0 +1,147 @@
+# Stepper motion profiles shared by the firmware and the host.
+# Pure Python with no imports beyond math so it runs unchanged on CircuitPython;
+# copy it next to code.py on the CIRCUITPY drive.
+import math
+
+TRAPEZOID = "trap"
+S_CURVE = "scurve"
+
+DEFAULT_START_SPEED = 100  # steps/s the geared turret can start at without a ramp
+DEFAULT_MAX_SPEED = 100
+DEFAULT_ACCEL = 400  # steps/s^2
+
+
+def peak_speed(steps, max_speed, accel, start_speed, profile=TRAPEZOID):
+    """Highest speed reached in a move, lower than max_speed if the move is too short"""
+    if accel <= 0 or max_speed <= start_speed:
+        return max(max_speed, 1)
+    # Ramp length in steps is (v^2 - v0^2) / (2a) for trapezoid, 1.5x that for
+    # the S-curve (its average acceleration is 2/3 of the peak)
+    ramp_factor = 1.0 if profile == TRAPEZOID else 1.5
+    reachable = math.sqrt(start_speed * start_speed + steps * accel / ramp_factor)
+    return min(max_speed, reachable)
+
+
+def trapezoid_ramp(start_speed, speed, accel):
+    """Intervals in seconds between steps while accelerating from start_speed to speed"""
+    ramp_steps = int((speed * speed - start_speed * start_speed) / (2 * accel))
+    intervals = []
+    previous = 0.0
+    v0_squared = start_speed * start_speed
+    for step in range(1, ramp_steps + 1):
+        t = (math.sqrt(v0_squared + 2 * accel * step) - start_speed) / accel
+        intervals.append(t - previous)
+        previous = t
+    return intervals
+
+
+def s_curve_ramp(start_speed, speed, accel):
+    """Intervals in seconds between steps for a smoothstep velocity ramp with peak acceleration accel"""
+    delta_v = speed - start_speed
+    duration = 1.5 * delta_v / accel
+
+    def position(tau):
+        return start_speed * duration * tau + delta_v * duration * (tau ** 3 - 0.5 * tau ** 4)
+
+    def velocity(tau):
+        return start_speed + delta_v * (3 * tau * tau - 2 * tau ** 3)
+
+    ramp_steps = int(position(1.0))
+    intervals = []
+    tau = 0.0
+    previous = 0.0
+    for step in range(1, ramp_steps + 1):
+        # Newton's method from the previous step's tau converges in a few iterations
+        for _ in range(8):
+            error = position(tau) - step
+            if abs(error) < 1e-4:
+                break
+            tau -= error / (velocity(tau) * duration)
+            tau = min(max(tau, 0.0), 1.0)
+        t = tau * duration
+        intervals.append(t - previous)
+        previous = t
+    return intervals
+
+
+def step_intervals(steps, max_speed=DEFAULT_MAX_SPEED, accel=DEFAULT_ACCEL,
+                   profile=TRAPEZOID, start_speed=DEFAULT_START_SPEED):
+    """Yield the delay in seconds before each of the steps in a move"""
+    steps = abs(int(steps))
+    if steps == 0:
+        return
+    start_speed = min(start_speed, max_speed)
+    speed = peak_speed(steps, max_speed, accel, start_speed, profile)
+
+    if speed <= start_speed or accel <= 0:
+        ramp = []
+    elif profile == S_CURVE:
+        ramp = s_curve_ramp(start_speed, speed, accel)
+    else:
+        ramp = trapezoid_ramp(start_speed, speed, accel)
+
+    ramp_steps = min(len(ramp), steps // 2)
+    cruise_steps = steps - 2 * ramp_steps
+    cruise_interval = 1.0 / speed
+
+    for i in range(ramp_steps):
+        yield ramp[i]
+    for i in range(cruise_steps):
+        yield cruise_interval
+    for i in range(ramp_steps - 1, -1, -1):
+        yield ramp[i]
+
+
+def step_intervals_ns(steps, max_speed=DEFAULT_MAX_SPEED, accel=DEFAULT_ACCEL,
+                      profile=TRAPEZOID, start_speed=DEFAULT_START_SPEED):
+    """step_intervals() in integer nanoseconds, for time.monotonic_ns() deadlines"""
+    for interval in step_intervals(steps, max_speed, accel, profile, start_speed):
+        yield int(interval * 1000000000)
+
+
+def timing_table(steps, max_speed=DEFAULT_MAX_SPEED, accel=DEFAULT_ACCEL,
+                 profile=TRAPEZOID, start_speed=DEFAULT_START_SPEED):
+    """List of (step number, time of step in seconds, instantaneous speed in steps/s)"""
+    table = []
+    t = 0.0
+    for i, interval in enumerate(step_intervals(steps, max_speed, accel, profile, start_speed)):
+        t += interval
+        table.append((i + 1, t, 1.0 / interval))
+    return table
+
+
+def move_duration(steps, max_speed=DEFAULT_MAX_SPEED, accel=DEFAULT_ACCEL,
+                  profile=TRAPEZOID, start_speed=DEFAULT_START_SPEED):
+    """Seconds a move takes, so the host can predict when the turret arrives"""
+    return sum(step_intervals(steps, max_speed, accel, profile, start_speed))
+
+
+def format_stepper_command(steps, max_speed=DEFAULT_MAX_SPEED, accel=DEFAULT_ACCEL, profile=TRAPEZOID):
+    """Host side: build the firmware's stepper:<steps>:<max_speed>:<accel>:<profile> command"""
+    return f"stepper:{int(steps)}:{int(max_speed)}:{int(accel)}:{profile}"
+
+
+def parse_profile(name):
+    if name in (TRAPEZOID, S_CURVE):
+        return name
+    raise ValueError(f"Unknown profile {name}, use {TRAPEZOID} or {S_CURVE}")
+
+
+if __name__ == "__main__":
+    import time
+
+    print("Stepper motion profiles (200 steps, max 400 steps/s, accel 800 steps/s^2)")
+    for name in (TRAPEZOID, S_CURVE):
+        table = timing_table(200, 400, 800, name)
+        peak = max(speed for _, _, speed in table)
+        print(f"  {name}: {table[-1][1]:.3f}s total, peak {peak:.0f} steps/s")
+    print(f"  no ramp at 100 steps/s: {move_duration(200, 100, 800):.3f}s total")
+
+    runs = 20
+    for name in (TRAPEZOID, S_CURVE):
+        start = time.perf_counter()
+        for _ in range(runs):
+            for _ in step_intervals_ns(2000, 800, 1600, name):
+                pass
+        per_step = (time.perf_counter() - start) / (runs * 2000)
+        print(f"  {name} generator cost: {per_step * 1e6:.2f} us/step")
@@ -0,0 +1,294 @@
+import queue
+import re
+import threading
+import time
+from concurrent.futures import Future
+
+import serial
+import serial.tools.list_ports
+
+from protocol import (FrameDecoder, encode_frame, encode_batch, text_to_command, decode_telemetry,
+                      parse_telemetry_line, OP_BATCH, OP_REPLY, OP_STATUS)
+
+# Commands are sent as "@<seq>:<command>" and the firmware answers "#<seq>:<result>".
+# The prefixes differ so a REPL echo of the command can never be mistaken for its reply.
+# Telemetry status lines ("!T:...") and OP_STATUS frames are split off from the replies.
+COMMAND_PREFIX = "@"
+REPLY_PREFIX = "#"
+MAX_SEQUENCE = 10000
+
+FIRE_REPLY = re.compile(r"Fired (\d+) in (\d+) ms \(([\d.]+) shots/s\)")
+
+
+def format_command(seq, cmd):
+    return f"{COMMAND_PREFIX}{seq}:{cmd}"
+
+
+def parse_reply(line):
+    """Return (seq, result) for a tagged reply line, or None for anything else"""
+    if not line.startswith(REPLY_PREFIX) or ":" not in line:
+        return None
+    seq_str, result = line[len(REPLY_PREFIX):].split(":", 1)
+    try:
+        return int(seq_str), result
+    except ValueError:
+        return None
+
+
+def parse_fire_reply(result):
+    """Return (shots, ms, shots_per_second) from a "Fired N in M ms (R shots/s)" reply, or None"""
+    match = FIRE_REPLY.match(result)
+    if match is None:
+        return None
+    return int(match.group(1)), int(match.group(2)), float(match.group(3))
+
+
+class LineCodec:
+    """Text protocol on the console channel: one tagged command per line"""
+
+    def __init__(self):
+        self.unmatched_lines = 0
+
+    def encode(self, commands):
+        return b"".join((format_command(seq, cmd) + "\r\n").encode("utf-8") for seq, cmd in commands)
+
+    def read(self, ser):
+        """Next (replies, statuses) from the port, each a list of (seq, ...) tuples"""
+        line = ser.readline().decode("utf-8", errors="ignore").strip()
+        if not line:
+            return [], []
+        reply = parse_reply(line)
+        if reply is not None:
+            return [reply], []
+        status = parse_telemetry_line(line)
+        if status is not None:
+            return [], [status]
+        self.unmatched_lines += 1
+        return [], []
+
+
+class FrameCodec:
+    """Binary protocol on the data channel; several commands can share one batch frame"""
+
+    def __init__(self):
+        self.decoder = FrameDecoder()
+        self.unmatched_lines = 0
+
+    def encode(self, commands):
+        if len(commands) == 1:
+            seq, cmd = commands[0]
+            opcode, payload = text_to_command(cmd)
+            return encode_frame(opcode, seq, payload)
+        batch = []
+        for seq, cmd in commands:
+            opcode, payload = text_to_command(cmd)
+            batch.append((opcode, seq, payload))
+        return encode_frame(OP_BATCH, 0, encode_batch(batch))
+
+    def read(self, ser):
+        data = ser.read(max(1, ser.in_waiting))
+        replies = []
+        statuses = []
+        for opcode, seq, payload in self.decoder.feed(data):
+            if opcode == OP_REPLY:
+                replies.append((seq, payload.decode("utf-8", errors="ignore")))
+            elif opcode == OP_STATUS:
+                try:
+                    statuses.append((seq, decode_telemetry(payload)))
+                except Exception:
+                    self.unmatched_lines += 1
+            else:
+                self.unmatched_lines += 1
+        return replies, statuses
+
+
+class MotorClient:
+    """Owns the Pico's serial port through a background writer and reader
+
+    send() returns a Future that resolves with the firmware's reply to that exact
+    command; send_nowait() queues a command without waiting for anything, so the
+    vision loop only pays for a queue put.
+
+    Telemetry status messages go to on_telemetry(seq, values) on the reader
+    thread; without a handler they are dropped, and handler exceptions are
+    counted in telemetry_errors.
+    """
+
+    def __init__(self, ser, response_timeout=10.0, codec=None, on_telemetry=None):
+        self.ser = ser
+        self.response_timeout = response_timeout
+        self.codec = codec or LineCodec()
+        self.on_telemetry = on_telemetry
+        self.outgoing = queue.Queue()
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.next_seq = 1
+        self.running = True
+        self.read_errors = 0
+        self.telemetry_errors = 0
+        self.last_reply_time = time.monotonic()
+
+        self.writer = threading.Thread(target=self._write_loop, name="motor-writer", daemon=True)
+        self.reader = threading.Thread(target=self._read_loop, name="motor-reader", daemon=True)
+        self.writer.start()
+        self.reader.start()
+
+    @property
+    def unmatched_lines(self):
+        return self.codec.unmatched_lines
+
+    def _allocate_seq(self):
+        with self.lock:
+            seq = self.next_seq
+            self.next_seq = self.next_seq % (MAX_SEQUENCE - 1) + 1
+            return seq
+
+    def _register(self, seq):
+        future = Future()
+        with self.lock:
+            self.pending[seq] = (future, time.monotonic() + self.response_timeout)
+        return future
+
+    def send(self, cmd):
+        """Queue a command and return a Future for its reply"""
+        return self.send_batch([cmd])[0]
+
+    def send_batch(self, cmds):
+        """Queue several commands to go out together; returns one Future per command
+
+        With the binary codec they share a single frame, with the text codec a single write.
+        """
+        if not self.running:
+            futures = [Future() for _ in cmds]
+            for future in futures:
+                future.set_exception(ConnectionError("Motor client closed"))
+            return futures
+
+        commands = [(self._allocate_seq(), cmd) for cmd in cmds]
+        futures = [self._register(seq) for seq, _ in commands]
+        self.outgoing.put(commands)
+        return futures
+
+    def send_nowait(self, cmd):
+        """Queue a command and forget about it; its reply is discarded"""
+        if self.running:
+            self.outgoing.put([(self._allocate_seq(), cmd)])
+
+    def command(self, cmd, timeout=0.5):
+        """Send a command and wait up to timeout seconds for its reply"""
+        try:
+            return self.send(cmd).result(timeout=timeout)
+        except Exception:
+            return "No response"
+
+    def _write_loop(self):
+        while self.running:
+            try:
+                commands = self.outgoing.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if commands is None:
+                break
+            try:
+                self.ser.write(self.codec.encode(commands))
+            except Exception as e:
+                for seq, _ in commands:
+                    self._resolve(seq, exception=e)
+
+    def _read_loop(self):
+        while self.running:
+            try:
+                replies, statuses = self.codec.read(self.ser)
+            except Exception as e:
+                if self.running:
+                    self.read_errors += 1
+                    if self.read_errors == 1:
+                        print(f"Motor client read error: {e}")
+                    time.sleep(0.5)
+                continue
+
+            # Only replies count: status messages must not quiet the heartbeat pings,
+            # which are what keeps the firmware's failsafe from tripping
+            if replies:
+                self.last_reply_time = time.monotonic()
+            for seq, result in replies:
+                self._resolve(seq, result=result)
+            if self.on_telemetry is not None:
+                for seq, values in statuses:
+                    try:
+                        self.on_telemetry(seq, values)
+                    except Exception as e:
+                        # A broken handler must not take the reply reader down with it
+                        self.telemetry_errors += 1
+                        if self.telemetry_errors == 1:
+                            print(f"Telemetry handler error: {e}")
+            self._expire_pending()
+
+    def _resolve(self, seq, result=None, exception=None):
+        with self.lock:
+            entry = self.pending.pop(seq, None)
+        if entry is None:
+            return
+        future = entry[0]
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+    def _expire_pending(self):
+        now = time.monotonic()
+        with self.lock:
+            expired = [seq for seq, (_, deadline) in self.pending.items() if deadline < now]
+            entries = [self.pending.pop(seq) for seq in expired]
+        for future, _ in entries:
+            future.set_exception(TimeoutError("No response"))
+
+    def close(self):
+        """Stop the background threads; outstanding futures fail with ConnectionError"""
+        self.running = False
+        self.outgoing.put(None)
+        self.writer.join(timeout=1.0)
+        self.reader.join(timeout=2.0)
+        with self.lock:
+            entries = list(self.pending.values())
+            self.pending.clear()
+        for future, _ in entries:
+            future.set_exception(ConnectionError("Motor client closed"))
+
+
+def find_data_port(console_port):
+    """The Pico's second USB serial channel, which carries the binary protocol"""
+    ports = serial.tools.list_ports.comports()
+    console = next((p for p in ports if p.device == console_port), None)
+    for port in ports:
+        if port.device == console_port:
+            continue
+        if port.interface and "data" in port.interface.lower():
+            return port.device
+        if console is not None and console.serial_number and port.serial_number == console.serial_number:
+            return port.device
+    return None
+
+
+def open_binary_client(console_client, console_port, baud=115200, on_telemetry=None):
+    """Negotiate binary mode over the text link; returns a binary MotorClient or None"""
+    reply = console_client.command("binary:on", timeout=1.0)
+    if not reply.startswith("binary:ok"):
+        print(f"Binary protocol not available ({reply}), staying on text commands")
+        return None
+
+    data_port = find_data_port(console_port)
+    if data_port is None:
+        print("Binary protocol enabled but no data port found, staying on text commands")
+        console_client.command("binary:off", timeout=1.0)
+        return None
+
+    try:
+        ser = serial.Serial(data_port, baud, timeout=0.1)
+    except serial.SerialException as e:
+        print(f"Could not open data port {data_port}: {e}")
+        console_client.command("binary:off", timeout=1.0)
+        return None
+
+    print(f"Binary protocol v{reply.split(':')[-1]} on {data_port}")
+    return MotorClient(ser, codec=FrameCodec(), on_telemetry=on_telemetry)
@@ -0,0 +1,288 @@
+"""
+Watch the play field from several cameras at once.
+
+Every source gets its own detection process running the usual game loop
+headless, so each one has a whole core and its own GIL. Workers only send
+compact detection events back, at most one per EVENT_INTERVAL each; a single
+TriggerArbiter in the main process dedupes them, applies the motion cooldown
+once and holds everything while the last burst is still firing.
+
+Sources can be camera indexes, video files, image directories or
+'synthetic'. Cameras run on the wall clock; files are replayed as fast as
+possible on a 1/fps clock each, which is what the scaling numbers measure.
+
+Camera indexes (and every source with --capture-process) get a capture
+process of their own that resizes frames straight into a SharedFramePool;
+the detection worker always takes the newest frame from it, so a slow
+step skips frames instead of falling behind the camera.
+
+The launcher is driven through SerialLink like in motionDetection.py, with
+SHOTS_PER_TRIGGER shots per burst; without --port a fake board on a
+pseudo-terminal answers instead.
+
+Usage: python multiCamera.py SOURCE [SOURCE ...] [--fps 20] [--max-frames N] [--capture-process]
+                             [--port /dev/ttyACM0]
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import time
+from contextlib import redirect_stdout
+
+from detection import MotionDetector
+from fakeSerial import PtyBoard
+from frameSource import open_frames
+from gameLoop import GameLoop, NullMusic
+from serialLink import SerialLink
+from sharedFrames import SharedFramePool, capture_process, pool_frames
+from replay import FRAME_SIZE, ANALYSIS_SIZE, MOTION_THRESHOLD, TRIGGER_AREA, CYCLE_DURATION, SHOTS_PER_TRIGGER
+
+MOTION_COOLDOWN = 2.0
+EVENT_INTERVAL = 0.5  # per worker; the arbiter only needs the first event of a shot
+ARM_LEVEL = "idle"
+
+
+class DetectionEvent:
+    """What a camera worker saw on a frame that was big enough to fire on
+
+    groups is a tuple of (center_x, center_y, area) in that camera's
+    full-resolution coordinates. Workers have no depth model.
+    """
+
+    __slots__ = ("camera_id", "elapsed_time", "capture_time", "groups")
+
+    def __init__(self, camera_id, elapsed_time, capture_time, groups):
+        self.camera_id = camera_id
+        self.elapsed_time = elapsed_time
+        self.capture_time = capture_time
+        self.groups = groups
+
+    @property
+    def total_area(self):
+        return sum(group[2] for group in self.groups)
+
+
+class TriggerArbiter:
+    """Turns detection events from every camera into at most one shot per cooldown
+
+    Events within dedupe_window of the last shot are other cameras (or later
+    frames) seeing the same motion; anything else inside the cooldown is held
+    back by the cooldown. Times are game time so replayed files behave like
+    live cameras. While ready_fn returns False (the launcher is still
+    firing) events are held without starting a cooldown.
+    """
+
+    def __init__(self, fire_fn, motion_cooldown=MOTION_COOLDOWN, dedupe_window=0.25, ready_fn=None):
+        self.fire_fn = fire_fn
+        self.ready_fn = ready_fn
+        self.motion_cooldown = motion_cooldown
+        self.dedupe_window = dedupe_window
+        self.last_fire_time = None
+        self.events = 0
+        self.duplicates = 0
+        self.cooled_down = 0
+        self.busy = 0
+        self.fired = []
+
+    def handle(self, event):
+        """Fire for this event unless it is a duplicate or inside the cooldown; returns True if fired"""
+        self.events += 1
+        if self.last_fire_time is not None:
+            since_fire = abs(event.elapsed_time - self.last_fire_time)
+            if since_fire <= self.dedupe_window:
+                self.duplicates += 1
+                return False
+            if since_fire <= self.motion_cooldown:
+                self.cooled_down += 1
+                return False
+        if self.ready_fn is not None and not self.ready_fn():
+            self.busy += 1
+            return False
+
+        self.last_fire_time = event.elapsed_time
+        self.fired.append(event)
+        self.fire_fn(event)
+        return True
+
+
+def camera_worker(camera_id, source, event_queue, stats_queue, stop_event, start_time, fps, max_frames,
+                  pool=None, capture_done=None):
+    """Detection process for one source; posts a DetectionEvent when a track triggers, EVENT_INTERVAL apart
+
+    With a pool the frames come from capture_process() and the worker runs
+    on the wall clock; the pool is freed by the main process.
+    """
+    live = pool is not None or str(source).isdigit()
+    clock = {"now": 0.0}
+    last_post = {"time": None}
+    motion_detector = MotionDetector(frame_size=FRAME_SIZE, analysis_size=ANALYSIS_SIZE,
+                                     motion_threshold=MOTION_THRESHOLD, trigger_area=TRIGGER_AREA)
+
+    def post_event(trigger_event):
+        groups = tuple((g.center_x, g.center_y, g.area) for g in game.contour_groups)
+        event_queue.put(DetectionEvent(camera_id, clock["now"], time.time(), groups))
+        last_post["time"] = clock["now"]
+
+    def may_post():
+        return last_post["time"] is None or clock["now"] - last_post["time"] >= EVENT_INTERVAL
+
+    # Tracks keep their own cooldown, and the worker posts at most once per EVENT_INTERVAL;
+    # the arbiter applies the shared cooldown across cameras
+    game = GameLoop(motion_detector, trigger_fn=post_event,
+                    cycle_music=NullMusic(clock=lambda: clock["now"], cycle_duration=CYCLE_DURATION),
+                    frame_size=FRAME_SIZE, cycle_duration=CYCLE_DURATION, recording_duration=None,
+                    motion_cooldown=MOTION_COOLDOWN, show_hud=False, ready_fn=may_post)
+
+    frames = 0
+    busy = 0.0
+    try:
+        # Per-frame narration from several processes at once is unreadable; events carry what matters
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            if pool is not None:
+                frame_iter = pool_frames(pool, stop_event, capture_done)
+            else:
+                frame_iter = open_frames(source, FRAME_SIZE, seed=camera_id)
+            for i, frame in enumerate(frame_iter):
+                if stop_event.is_set() or (max_frames is not None and i >= max_frames):
+                    break
+                clock["now"] = time.time() - start_time if live else i / fps
+                step_start = time.perf_counter()
+                game.step(frame, clock["now"])
+                busy += time.perf_counter() - step_start
+                frames += 1
+    except Exception as e:
+        print(f"Camera {camera_id} ({source}) failed: {e}")
+    finally:
+        stats_queue.put((camera_id, source, frames, busy))
+
+
+def run_cameras(sources, fire_fn, fps=20.0, max_frames=None, motion_cooldown=MOTION_COOLDOWN, ready_fn=None,
+                capture_processes=False):
+    """Run one worker process per source until they all finish; returns (arbiter, per-camera stats, seconds)
+
+    Stats are (camera_id, source, frames, busy seconds, frames captured),
+    the last one None for sources read by the worker itself.
+    """
+    event_queue = multiprocessing.Queue()
+    stats_queue = multiprocessing.Queue()
+    stop_event = multiprocessing.Event()
+    arbiter = TriggerArbiter(fire_fn, motion_cooldown, ready_fn=ready_fn)
+    start_time = time.time()
+
+    pools = {}
+    workers = []
+    for camera_id, source in enumerate(sources):
+        pool = capture_done = None
+        if capture_processes or str(source).isdigit():
+            pool = SharedFramePool(shape=(FRAME_SIZE[1], FRAME_SIZE[0], 3))
+            capture_done = multiprocessing.Event()
+            pools[camera_id] = pool
+            workers.append(multiprocessing.Process(
+                target=capture_process, name=f"capture-{camera_id}",
+                args=(source, pool, stop_event, max_frames, capture_done, camera_id), daemon=True))
+        workers.append(multiprocessing.Process(
+            target=camera_worker, name=f"camera-{camera_id}",
+            args=(camera_id, source, event_queue, stats_queue, stop_event, start_time, fps, max_frames,
+                  pool, capture_done), daemon=True))
+    for worker in workers:
+        worker.start()
+    detectors = len(sources)
+
+    stats = []
+    try:
+        while len(stats) < detectors:
+            try:
+                arbiter.handle(event_queue.get(timeout=0.1))
+            except queue.Empty:
+                pass
+            while True:
+                try:
+                    stats.append(stats_queue.get_nowait())
+                except queue.Empty:
+                    break
+            if len(stats) < detectors and not any(worker.is_alive() for worker in workers):
+                print("Camera workers exited without reporting")
+                break
+    except KeyboardInterrupt:
+        print("\nStopping camera workers")
+        stop_event.set()
+    finally:
+        # Workers finish before their last events are read; drain what is left
+        while True:
+            try:
+                arbiter.handle(event_queue.get(timeout=0.2))
+            except queue.Empty:
+                break
+        stop_event.set()  # Capture processes outlive their worker if it failed
+        for worker in workers:
+            worker.join(timeout=5.0)
+        captured = {camera_id: int(pool.published[0]) for camera_id, pool in pools.items()}
+        for pool in pools.values():
+            pool.close()
+
+    stats = [stat + (captured.get(stat[0]),) for stat in stats]
+    return arbiter, sorted(stats), time.time() - start_time
+
+
+def fake_reply(cmd):
+    """Burst replies for the fake board, which has no pusher to wait for"""
+    if cmd.startswith("fire:"):
+        return f"Fired {cmd.split(':')[1]} in 0 ms (0.0 shots/s)"
+    return f"OK {cmd}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-camera detection with one process per source")
+    parser.add_argument("sources", nargs="+", help="camera index, video file, image directory or 'synthetic'")
+    parser.add_argument("--fps", type=float, default=20.0, help="game clock rate for file sources")
+    parser.add_argument("--max-frames", type=int, default=None)
+    parser.add_argument("--capture-process", action="store_true",
+                        help="capture file sources in their own process too, as cameras are")
+    parser.add_argument("--port", default=None, help="Pico serial port; a fake device is used if not given")
+    args = parser.parse_args()
+
+    board = None
+    port = args.port
+    if port is None:
+        board = PtyBoard(reply_fn=fake_reply)
+        port = board.port
+    link = SerialLink(port, on_connect=lambda link: print(f"Flywheel: {link.command(f'arm:{ARM_LEVEL}')}"))
+    if not link.connect():
+        print("Motor not connected yet, retrying in the background")
+    link.start()
+    pending = {"burst": None}
+
+    def launcher_ready():
+        return pending["burst"] is None or pending["burst"].done()
+
+    def fire(event):
+        print(f"Camera {event.camera_id} at t={event.elapsed_time:.2f}s: area {int(event.total_area)} "
+              f"in {len(event.groups)} groups - firing {SHOTS_PER_TRIGGER}")
+        pending["burst"] = link.send(f"fire:{SHOTS_PER_TRIGGER}")
+        if pending["burst"] is None:
+            print("Motor not connected, shot lost")
+
+    print(f"Starting {len(args.sources)} camera workers")
+    try:
+        arbiter, stats, seconds = run_cameras(args.sources, fire, args.fps, args.max_frames,
+                                              ready_fn=launcher_ready, capture_processes=args.capture_process)
+    finally:
+        link.close()  # Sends stop: cancels the burst in flight and disarms
+        if board is not None:
+            board.close()
+
+    total_frames = sum(stat[2] for stat in stats)
+    print(f"\n{len(stats)} cameras, {total_frames} frames in {seconds:.2f}s "
+          f"({total_frames / seconds:.1f} fps combined)")
+    for camera_id, source, frames, busy, captured in stats:
+        rate = f"{frames / busy:.1f} fps while busy" if busy else "no frames"
+        skipped = f", {captured - frames} of {captured} captured skipped" if captured is not None else ""
+        print(f"  camera {camera_id} ({source}): {frames} frames, {rate}{skipped}")
+    print(f"Arbiter: {arbiter.events} events, {len(arbiter.fired)} fired, "
+          f"{arbiter.duplicates} duplicates, {arbiter.cooled_down} held by cooldown, "
+          f"{arbiter.busy} held while firing")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,12 +2,17 @@ import pygame
 import os
 import time
 
-pygame.mixer.pre_init(frequency=22050, size=-16, channels=2, buffer=512)
-pygame.mixer.init()
-pygame.mixer.set_num_channels(8) 
+def init_mixer():
+    """Start pygame's mixer on first use instead of at import"""
+    if pygame.mixer.get_init():
+        return
+    pygame.mixer.pre_init(frequency=22050, size=-16, channels=2, buffer=512)
+    pygame.mixer.init()
+    pygame.mixer.set_num_channels(8) 
 
 def play_squid_music():
     try:
+        init_mixer()
         if not os.path.exists("squid.mp3"):
             print("Error: squid.mp3 file not found!")
             return False
@@ -28,6 +33,7 @@ def play_squid_music():
 
 def play_green_light():
     try:
+        init_mixer()
         if not os.path.exists("green-light.mp3"):
             print("Error: green-light.mp3 file not found!")
             return False
@@ -48,6 +54,7 @@ def play_green_light():
 
 def play_red_light():
     try:
+        init_mixer()
         if not os.path.exists("red-light.mp3"):
             print("Error: red-light.mp3 file not found!")
             return False
@@ -126,6 +133,7 @@ class CycleMusic:
         self.start_time = None
         
         try:
+            init_mixer()
             if os.path.exists("green-light.mp3"):
                 self.green_sound = pygame.mixer.Sound("green-light.mp3")
                 self.green_sound.set_volume(1.0)
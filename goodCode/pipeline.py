@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import deque
+
+import cv2
+
+from stageTimer import stage_timer
+
+
+class FrameRing:
+    """Bounded ring buffer between pipeline stages that drops the oldest frames when full"""
+
+    def __init__(self, name, capacity=2):
+        self.name = name
+        self.frames = deque(maxlen=capacity)
+        self.condition = threading.Condition()
+        self.put_count = 0
+        self.taken_count = 0
+        self.dropped = 0
+        self.closed = False
+
+    def put(self, item):
+        with self.condition:
+            if len(self.frames) == self.frames.maxlen:
+                self.dropped += 1
+            self.frames.append(item)
+            self.put_count += 1
+            self.condition.notify_all()
+
+    def get(self, timeout=None):
+        """Return the oldest frame in order, or None on timeout / close"""
+        with self.condition:
+            if not self.frames and not self.closed:
+                self.condition.wait(timeout)
+            if not self.frames:
+                return None
+            self.taken_count += 1
+            return self.frames.popleft()
+
+    def get_latest(self, timeout=None):
+        """Return the newest frame and throw away anything older as stale"""
+        with self.condition:
+            if not self.frames and not self.closed:
+                self.condition.wait(timeout)
+            if not self.frames:
+                return None
+            item = self.frames.pop()
+            self.dropped += len(self.frames)
+            self.frames.clear()
+            self.taken_count += 1
+            return item
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def is_drained(self):
+        with self.condition:
+            return self.closed and not self.frames
+
+
+class FramePacket:
+    """A frame travelling through the pipeline along with when it was captured"""
+
+    def __init__(self, frame_id, frame, capture_time):
+        self.frame_id = frame_id
+        self.frame = frame
+        self.capture_time = capture_time
+        self.depth = None
+
+
+class CaptureStage(threading.Thread):
+    """Reads the camera as fast as it delivers and only keeps the newest frames"""
+
+    def __init__(self, cap, ring, size=None):
+        super().__init__(name="capture", daemon=True)
+        self.cap = cap
+        self.ring = ring
+        self.size = size
+        self.stop_event = threading.Event()
+        self.frames_captured = 0
+
+    def run(self):
+        try:
+            while not self.stop_event.is_set():
+                start = stage_timer.start()
+                ret, frame = self.cap.read()
+                stage_timer.stop("capture", start)
+                if not ret:
+                    print("Capture stage: camera returned no frame, stopping")
+                    break
+
+                capture_time = time.monotonic()
+                if self.size is not None:
+                    start = stage_timer.start()
+                    frame = cv2.resize(frame, self.size)
+                    stage_timer.stop("resize", start)
+
+                self.frames_captured += 1
+                self.ring.put(FramePacket(self.frames_captured, frame, capture_time))
+        finally:
+            self.ring.close()
+
+    def stop(self):
+        self.stop_event.set()
+
+
+def print_pipeline_stats(capture, rings):
+    """Print how many frames every stage saw and how many it had to drop"""
+    print("\nPipeline stats:")
+    print(f"  capture: {capture.frames_captured} frames read")
+    for ring in rings:
+        print(f"  {ring.name}: {ring.put_count} in, {ring.taken_count} processed, {ring.dropped} dropped")
@@ -0,0 +1,314 @@
+# Binary command protocol shared by the host and the firmware.
+# Only uses struct so it runs unchanged on CircuitPython; copy it next to code.py
+# on the CIRCUITPY drive.
+#
+# Frame layout (little endian):
+#   SYNC u8 (0xA5) | LENGTH u16 | OPCODE u8 | SEQ u16 | PAYLOAD (LENGTH bytes) | CRC16 u16
+# The CRC is CRC-16/CCITT-FALSE over LENGTH..PAYLOAD.
+#
+# Binary frames travel on the second USB CDC channel (usb_cdc.data, enabled in
+# boot.py). The console channel keeps the text protocol, and the host switches
+# with the text command "binary:on".
+#
+# With "telemetry:on:<hz>" the firmware also sends unsolicited status on the
+# channel that asked for it: OP_STATUS frames on the data channel, or lines
+# starting with TELEMETRY_PREFIX on the console, so clients can tell them
+# apart from command replies. Either way the seq counts status messages, so
+# gaps show dropped ones.
+import struct
+
+PROTOCOL_VERSION = 1
+SYNC = 0xA5
+HEADER_FORMAT = "<BHBH"
+HEADER_SIZE = 6
+CRC_SIZE = 2
+MAX_PAYLOAD = 512
+
+OP_TEXT = 0x01  # payload: UTF-8 text command, for anything without its own opcode
+OP_SERVO = 0x02  # payload: angle i16
+OP_BRUSH_MOTOR = 0x03  # payload: speed percent i8
+OP_STEPPER = 0x04  # payload: steps i32, max_speed u16, accel u16, profile u8 (0 = firmware default)
+OP_SERVO_THEN_MOTOR = 0x05
+OP_STOP = 0x06
+OP_HARDWARE_TEST = 0x07
+OP_ARM = 0x08  # payload: flywheel level u8, percent 1-100, or ARM_IDLE / ARM_FIRE for the firmware defaults
+OP_DISARM = 0x09
+OP_FIRE = 0x0A  # payload: shots u8, interval_ms u16 (0 = back to back)
+OP_TELEMETRY = 0x0B  # payload: status rate in Hz u8, 0 = off
+OP_PING = 0x0C  # payload: UTF-8 nonce, answered at once with "pong:<nonce>:<board monotonic_ns>"
+OP_BATCH = 0x10  # payload: repeated [opcode u8, seq u16, length u8, payload]
+OP_REPLY = 0x80  # payload: UTF-8 result text, seq echoes the command's
+OP_STATUS = 0x81  # payload: TELEMETRY_FORMAT, unsolicited
+
+ARM_IDLE = 0
+ARM_FIRE = 255
+
+# board_ms: monotonic time when sent; loops, loop_avg_us, loop_max_us: main loop
+# iterations since the previous status and their timing; queue_depth and busy:
+# queued commands and whether one is running; steps: stepper pulses since boot;
+# throttle: ESC percent; servo_angle: degrees, -1 if unknown
+TELEMETRY_PREFIX = "!T:"
+TELEMETRY_FIELDS = ("board_ms", "loops", "loop_avg_us", "loop_max_us", "queue_depth", "busy",
+                    "steps", "throttle", "servo_angle")
+TELEMETRY_FORMAT = "<IHHHBBIbh"
+
+PROFILE_CODES = {"": 0, "trap": 1, "scurve": 2}
+PROFILE_NAMES = {0: "", 1: "trap", 2: "scurve"}
+
+
+def crc16(data, crc=0xFFFF):
+    for byte in data:
+        crc ^= byte << 8
+        for _ in range(8):
+            if crc & 0x8000:
+                crc = ((crc << 1) ^ 0x1021) & 0xFFFF
+            else:
+                crc = (crc << 1) & 0xFFFF
+    return crc
+
+
+def encode_frame(opcode, seq, payload=b""):
+    if len(payload) > MAX_PAYLOAD:
+        raise ValueError("Payload too large")
+    header = struct.pack(HEADER_FORMAT, SYNC, len(payload), opcode, seq & 0xFFFF)
+    body = header[1:] + payload
+    return header[:1] + body + struct.pack("<H", crc16(body))
+
+
+class FrameDecoder:
+    """Turns a byte stream into (opcode, seq, payload) frames, resyncing after corruption"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.crc_errors = 0
+
+    def feed(self, data):
+        self.buffer.extend(data)
+        frames = []
+        while True:
+            # Plain loop instead of bytearray.find, which CircuitPython lacks
+            start = 0
+            while start < len(self.buffer) and self.buffer[start] != SYNC:
+                start += 1
+            if start == len(self.buffer):
+                self.buffer = bytearray()
+                return frames
+            if start > 0:
+                self.buffer = self.buffer[start:]
+            if len(self.buffer) < HEADER_SIZE:
+                return frames
+
+            _, length, opcode, seq = struct.unpack(HEADER_FORMAT, bytes(self.buffer[:HEADER_SIZE]))
+            if length > MAX_PAYLOAD:
+                # Not a real header, skip this sync byte
+                self.buffer = self.buffer[1:]
+                continue
+            frame_size = HEADER_SIZE + length + CRC_SIZE
+            if len(self.buffer) < frame_size:
+                return frames
+
+            body = bytes(self.buffer[1:HEADER_SIZE + length])
+            (crc,) = struct.unpack("<H", bytes(self.buffer[HEADER_SIZE + length:frame_size]))
+            if crc != crc16(body):
+                self.crc_errors += 1
+                self.buffer = self.buffer[1:]
+                continue
+
+            frames.append((opcode, seq, body[HEADER_SIZE - 1:]))
+            self.buffer = self.buffer[frame_size:]
+
+
+def encode_batch(commands):
+    """Payload for an OP_BATCH frame from a list of (opcode, seq, payload)"""
+    parts = []
+    for opcode, seq, payload in commands:
+        if len(payload) > 255:
+            raise ValueError("Batched payload too large")
+        parts.append(struct.pack("<BHB", opcode, seq & 0xFFFF, len(payload)) + payload)
+    return b"".join(parts)
+
+
+def decode_batch(payload):
+    commands = []
+    offset = 0
+    while offset + 4 <= len(payload):
+        opcode, seq, length = struct.unpack("<BHB", payload[offset:offset + 4])
+        offset += 4
+        commands.append((opcode, seq, payload[offset:offset + length]))
+        offset += length
+    return commands
+
+
+def encode_telemetry(values):
+    return struct.pack(TELEMETRY_FORMAT, *values)
+
+
+def decode_telemetry(payload):
+    return struct.unpack(TELEMETRY_FORMAT, payload)
+
+
+def format_telemetry_line(seq, values):
+    """Console form of a status message: "!T:<seq>:<value>,<value>,..." """
+    return TELEMETRY_PREFIX + str(seq) + ":" + ",".join(str(v) for v in values)
+
+
+def parse_telemetry_line(line):
+    """Return (seq, values) for a console status line, or None for anything else"""
+    if not line.startswith(TELEMETRY_PREFIX):
+        return None
+    try:
+        seq, values = line[len(TELEMETRY_PREFIX):].split(":", 1)
+        values = tuple(int(v) for v in values.split(","))
+    except ValueError:
+        return None
+    if len(values) != len(TELEMETRY_FIELDS):
+        return None
+    return int(seq), values
+
+
+def text_to_command(text):
+    """Host side: turn a text command like "servo:90" into (opcode, payload)"""
+    parts = text.strip().split(":")
+    name = parts[0]
+    try:
+        if name == "servo" and len(parts) == 2:
+            return OP_SERVO, struct.pack("<h", int(parts[1]))
+        if name == "brushMotor" and len(parts) == 2:
+            return OP_BRUSH_MOTOR, struct.pack("<b", int(parts[1]))
+        if name == "stepper" and 2 <= len(parts) <= 5:
+            max_speed = int(parts[2]) if len(parts) > 2 else 0
+            accel = int(parts[3]) if len(parts) > 3 else 0
+            profile = PROFILE_CODES[parts[4]] if len(parts) > 4 else 0
+            return OP_STEPPER, struct.pack("<iHHB", int(parts[1]), max_speed, accel, profile)
+        if name == "arm" and len(parts) <= 2:
+            level = parts[1] if len(parts) == 2 else "idle"
+            code = {"idle": ARM_IDLE, "fire": ARM_FIRE}.get(level)
+            if code is None:
+                code = int(level)
+                if code < 1 or code > 100:
+                    # 0 and 255 would read as ARM_IDLE / ARM_FIRE; sent as text the firmware rejects them
+                    raise ValueError("arm percent out of range")
+            return OP_ARM, struct.pack("<B", code)
+        if name == "fire" and 2 <= len(parts) <= 3:
+            interval = int(parts[2]) if len(parts) == 3 else 0
+            return OP_FIRE, struct.pack("<BH", int(parts[1]), interval)
+        if name == "telemetry" and parts[1:] == ["off"]:
+            return OP_TELEMETRY, struct.pack("<B", 0)
+        if name == "telemetry" and len(parts) == 3 and parts[1] == "on" and int(parts[2]) > 0:
+            return OP_TELEMETRY, struct.pack("<B", int(parts[2]))
+        if name == "ping" and len(parts) >= 2:
+            return OP_PING, text[5:].encode("utf-8")
+    except (ValueError, KeyError, OverflowError, struct.error):
+        pass
+    if text == "servoThenMotor":
+        return OP_SERVO_THEN_MOTOR, b""
+    if text == "stop":
+        return OP_STOP, b""
+    if text == "hardware_test":
+        return OP_HARDWARE_TEST, b""
+    if text == "disarm":
+        return OP_DISARM, b""
+    return OP_TEXT, text.encode("utf-8")
+
+
+def decode_args(opcode, payload):
+    """Firmware side: unpack an opcode's payload into its arguments"""
+    if opcode == OP_SERVO:
+        return struct.unpack("<h", payload)
+    if opcode == OP_BRUSH_MOTOR:
+        return struct.unpack("<b", payload)
+    if opcode == OP_STEPPER:
+        steps, max_speed, accel, profile = struct.unpack("<iHHB", payload)
+        return steps, max_speed, accel, PROFILE_NAMES.get(profile, "")
+    if opcode == OP_ARM:
+        return struct.unpack("<B", payload)
+    if opcode == OP_FIRE:
+        return struct.unpack("<BH", payload)
+    if opcode == OP_TELEMETRY:
+        return struct.unpack("<B", payload)
+    if opcode == OP_STATUS:
+        return decode_telemetry(payload)
+    if opcode in (OP_TEXT, OP_REPLY, OP_PING):
+        return (payload.decode("utf-8"),)
+    return ()
+
+
+def command_to_text(opcode, payload):
+    """Inverse of text_to_command, for logging and the round-trip check"""
+    args = decode_args(opcode, payload)
+    if opcode == OP_SERVO:
+        return f"servo:{args[0]}"
+    if opcode == OP_BRUSH_MOTOR:
+        return f"brushMotor:{args[0]}"
+    if opcode == OP_STEPPER:
+        steps, max_speed, accel, profile = args
+        parts = [str(steps)]
+        if max_speed:
+            parts.append(str(max_speed))
+        if accel:
+            parts.append(str(accel))
+        if profile:
+            parts.append(profile)
+        return "stepper:" + ":".join(parts)
+    if opcode == OP_SERVO_THEN_MOTOR:
+        return "servoThenMotor"
+    if opcode == OP_STOP:
+        return "stop"
+    if opcode == OP_HARDWARE_TEST:
+        return "hardware_test"
+    if opcode == OP_ARM:
+        return {ARM_IDLE: "arm", ARM_FIRE: "arm:fire"}.get(args[0], f"arm:{args[0]}")
+    if opcode == OP_DISARM:
+        return "disarm"
+    if opcode == OP_FIRE:
+        count, interval = args
+        return f"fire:{count}:{interval}" if interval else f"fire:{count}"
+    if opcode == OP_TELEMETRY:
+        return f"telemetry:on:{args[0]}" if args[0] else "telemetry:off"
+    if opcode == OP_PING:
+        return f"ping:{args[0]}"
+    return args[0] if args else ""
+
+
+if __name__ == "__main__":
+    # Round-trip check of the codec; run on the host or paste into the board's REPL
+    samples = ["servo:90", "servo:-5", "brushMotor:30", "brushMotor:-100", "stepper:200",
+               "stepper:-50:400:800:scurve", "stepper:10:300", "servoThenMotor", "stop",
+               "hardware_test", "pin_test", "stepper_debug", "arm", "arm:fire", "arm:35", "disarm",
+               "fire:3", "fire:5:400", "telemetry:on:20", "telemetry:off",
+               "ping:1234", "ping:7:xxxxxxxx"]
+
+    decoder = FrameDecoder()
+    stream = b""
+    for seq, text in enumerate(samples):
+        opcode, payload = text_to_command(text)
+        assert command_to_text(opcode, payload) == text, text
+        stream += encode_frame(opcode, seq, payload)
+
+    batch = [(op, 100 + i, payload) for i, (op, payload) in enumerate(text_to_command(t) for t in samples[:4])]
+    stream += encode_frame(OP_BATCH, 99, encode_batch(batch))
+
+    corrupted = bytearray(encode_frame(OP_REPLY, 7, b"lost"))
+    corrupted[-1] ^= 0xFF
+    stream = b"noise" + bytes(corrupted) + stream
+
+    frames = []
+    for i in range(0, len(stream), 7):  # feed in small chunks like a serial port would
+        frames.extend(decoder.feed(stream[i:i + 7]))
+
+    assert decoder.crc_errors == 1
+    assert [command_to_text(op, payload) for op, _, payload in frames[:-1]] == samples
+    assert [seq for _, seq, _ in frames[:-1]] == list(range(len(samples)))
+    assert frames[-1][0] == OP_BATCH and decode_batch(frames[-1][2]) == batch
+
+    for text in ("arm:0", "arm:255", "arm:101"):
+        assert text_to_command(text) == (OP_TEXT, text.encode("utf-8")), text
+
+    status = (123456, 900, 1100, 4200, 2, 1, 70000, 20, -1)
+    assert decode_telemetry(encode_telemetry(status)) == status
+    assert parse_telemetry_line(format_telemetry_line(42, status)) == (42, status)
+    assert parse_telemetry_line("#42:pong") is None
+
+    text_size = sum(len(f"@{seq}:{t}\r\n") for seq, t in enumerate(samples))
+    binary_size = len(stream) - len(corrupted) - 5 - len(encode_frame(OP_BATCH, 99, encode_batch(batch)))
+    print(f"Round trip OK: {len(samples)} commands, {binary_size} bytes binary vs {text_size} bytes text")
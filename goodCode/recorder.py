@@ -0,0 +1,152 @@
+import os
+import threading
+import time
+from collections import deque
+
+import cv2
+
+from stageTimer import stage_timer
+
+CONTINUOUS = "continuous"
+CLIPS = "clips"
+
+
+class VideoRecorder(threading.Thread):
+    """Encodes video on its own thread so the output stage only pays for a queue append
+
+    In CONTINUOUS mode every frame goes to one file. In CLIPS mode the last
+    pre_roll seconds of frames are held in memory and a clip file is only
+    written when trigger() is called, running until post_roll seconds after
+    the last trigger. When the encoder falls behind, new frames are dropped
+    and counted rather than blocking the caller.
+    """
+
+    def __init__(self, path, frame_size, fps=20.0, mode=CONTINUOUS, pre_roll=3.0, post_roll=3.0,
+                 queue_size=32, fourcc="XVID"):
+        super().__init__(name="recorder", daemon=True)
+        self.path = path  # the video file in CONTINUOUS mode, the clip directory in CLIPS mode
+        self.frame_size = frame_size
+        self.fps = fps
+        self.mode = mode
+        self.post_roll = post_roll
+        self.queue_size = queue_size
+        self.fourcc = cv2.VideoWriter_fourcc(*fourcc)
+
+        self.items = deque()
+        self.queued_frames = 0
+        self.condition = threading.Condition()
+        self.lock = threading.Lock()
+        self.pre_roll = deque(maxlen=max(1, int(pre_roll * fps)))
+        # A clip starts with a burst of pre-roll frames; leave room for it on top of queue_size
+        self.frame_capacity = queue_size + (self.pre_roll.maxlen if mode == CLIPS else 0)
+        self.clip_end = float("-inf")
+        self.clip_open = False
+        self.writer = None
+
+        self.frames_offered = 0
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self.max_queue_depth = 0
+        self.triggers = 0
+        self.clips = []
+
+        if mode == CLIPS:
+            os.makedirs(path, exist_ok=True)
+
+    def _enqueue(self, item, droppable=True):
+        with self.condition:
+            if item[0] == "frame":
+                if droppable and self.queued_frames >= self.frame_capacity:
+                    self.frames_dropped += 1
+                    return
+                self.queued_frames += 1
+                self.max_queue_depth = max(self.max_queue_depth, self.queued_frames)
+            self.items.append(item)
+            self.condition.notify()
+
+    def trigger(self, timestamp=None):
+        """Record from the pre-roll up to post_roll seconds after this moment (CLIPS mode)"""
+        if timestamp is None:
+            timestamp = time.monotonic()
+        with self.lock:
+            self.clip_end = max(self.clip_end, timestamp + self.post_roll)
+            self.triggers += 1
+
+    def write(self, frame, timestamp=None):
+        """Offer a frame; timestamp must come from the same clock as trigger()"""
+        self.frames_offered += 1
+        if self.mode == CONTINUOUS:
+            self._enqueue(("frame", frame))
+            return
+
+        if timestamp is None:
+            timestamp = time.monotonic()
+        with self.lock:
+            recording = timestamp <= self.clip_end
+
+        if recording:
+            if not self.clip_open:
+                self.clip_open = True
+                clip_path = os.path.join(self.path, f"clip_{len(self.clips) + 1:03d}_{time.strftime('%H%M%S')}.avi")
+                self.clips.append(clip_path)
+                self._enqueue(("open", clip_path))
+                # The pre-roll is already in memory, so it is never dropped
+                for buffered in self.pre_roll:
+                    self._enqueue(("frame", buffered), droppable=False)
+                self.pre_roll.clear()
+            self._enqueue(("frame", frame))
+        else:
+            if self.clip_open:
+                self._enqueue(("close",))
+                self.clip_open = False
+            self.pre_roll.append(frame)
+
+    def run(self):
+        if self.mode == CONTINUOUS:
+            self._open(self.path)
+        while True:
+            with self.condition:
+                while not self.items:
+                    self.condition.wait()
+                item = self.items.popleft()
+                if item[0] == "frame":
+                    self.queued_frames -= 1
+
+            if item[0] == "frame":
+                if self.writer is not None:
+                    start = stage_timer.start()
+                    self.writer.write(item[1])
+                    stage_timer.stop("encode", start)
+                    self.frames_written += 1
+            elif item[0] == "open":
+                self._open(item[1])
+            elif item[0] == "close":
+                self._close()
+            elif item[0] == "stop":
+                self._close()
+                break
+
+    def _open(self, path):
+        self._close()
+        self.writer = cv2.VideoWriter(path, self.fourcc, self.fps, self.frame_size)
+        if not self.writer.isOpened():
+            print(f"Recorder: could not open {path}")
+            self.writer = None
+
+    def _close(self):
+        if self.writer is not None:
+            self.writer.release()
+            self.writer = None
+
+    def stop(self, timeout=10.0):
+        """Finish encoding whatever is queued, close the file and wait for the thread"""
+        self._enqueue(("stop",))
+        self.join(timeout=timeout)
+
+    def print_stats(self):
+        print(f"Recorder ({self.mode}): {self.frames_written} frames written, {self.frames_dropped} dropped "
+              f"of {self.frames_offered} offered, max queue depth {self.max_queue_depth}/{self.frame_capacity}")
+        if self.mode == CLIPS:
+            print(f"  {self.triggers} triggers, {len(self.clips)} clips")
+            for clip_path in self.clips:
+                print(f"    {clip_path}")
@@ -0,0 +1,156 @@
+"""
+Run the detection game headless on recorded footage, as fast as the CPU allows.
+
+Frames come from a video file, an image directory or the synthetic scene, the
+clock advances by 1/fps per frame, triggers fire bursts through a MotorClient
+talking to a fake serial device and the music is silent. The fake device
+answers at once, so the launcher counts as busy for BURST_SECONDS of game
+time after each burst, as the real pusher would be. Prints throughput, per-frame
+latency percentiles and every trigger event.
+
+Usage: python replay.py [video file | image directory | synthetic] [--fps 20] [--max-frames N]
+                        [--output out.avi | --clips DIR] [--no-hud] [--background mog2] [--timing basename]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from backgroundModel import BACKENDS
+from detection import MotionDetector
+from fakeSerial import FakeSerial
+from frameSource import open_frames
+from gameLoop import GameLoop, NullMusic
+from motorClient import MotorClient
+from recorder import VideoRecorder, CONTINUOUS, CLIPS
+from stageTimer import stage_timer
+
+# Same settings as motionDetection.py
+FRAME_SIZE = (1280, 720)
+ANALYSIS_SIZE = (640, 360)
+MOTION_THRESHOLD = 7000
+TRIGGER_AREA = 10000
+CYCLE_DURATION = 6
+SHOTS_PER_TRIGGER = 3
+BURST_SECONDS = 0.15 + SHOTS_PER_TRIGGER * 0.4  # idle spin-up, then the pusher out and back per shot
+
+
+def replay(source, fps=20.0, max_frames=None, output=None, clip_dir=None, show_hud=True, background="mog2"):
+    """Replay frames through GameLoop; returns (latencies in seconds, trigger events, fake serial)"""
+    fake_serial = FakeSerial(timeout=0.1)
+    motor_client = MotorClient(fake_serial)
+    clock = {"now": 0.0}
+
+    motion_detector = MotionDetector(
+        frame_size=FRAME_SIZE,
+        analysis_size=ANALYSIS_SIZE,
+        motion_threshold=MOTION_THRESHOLD,
+        trigger_area=TRIGGER_AREA
+    )
+    recorder = None
+    if output:
+        recorder = VideoRecorder(output, FRAME_SIZE, fps=fps, mode=CONTINUOUS)
+    elif clip_dir:
+        recorder = VideoRecorder(clip_dir, FRAME_SIZE, fps=fps, mode=CLIPS)
+
+    launcher = {"burst": None, "busy_until": 0.0}
+
+    def launcher_ready():
+        burst = launcher["burst"]
+        return clock["now"] >= launcher["busy_until"] and (burst is None or burst.done())
+
+    def on_trigger(event):
+        launcher["burst"] = motor_client.send(f"fire:{SHOTS_PER_TRIGGER}")
+        launcher["busy_until"] = clock["now"] + BURST_SECONDS
+        if recorder is not None:
+            recorder.trigger(clock["now"])
+
+    game = GameLoop(
+        motion_detector,
+        trigger_fn=on_trigger,
+        cycle_music=NullMusic(clock=lambda: clock["now"], cycle_duration=CYCLE_DURATION),
+        frame_size=FRAME_SIZE,
+        cycle_duration=CYCLE_DURATION,
+        recording_duration=None,
+        background_backend=background,
+        show_hud=show_hud,
+        ready_fn=launcher_ready
+    )
+
+    if recorder is not None:
+        recorder.start()
+
+    latencies = []
+    try:
+        for i, frame in enumerate(open_frames(source, FRAME_SIZE)):
+            if max_frames is not None and i >= max_frames:
+                break
+            clock["now"] = i / fps
+            start = time.perf_counter()
+            game.step(frame, clock["now"])
+            latencies.append(time.perf_counter() - start)
+            if recorder is not None:
+                recorder.write(frame, clock["now"])
+    finally:
+        if recorder is not None:
+            recorder.stop()
+            recorder.print_stats()
+        start = stage_timer.start()
+        motor_client.command("stop", timeout=1.0)
+        stage_timer.stop("serial_rtt", start)
+        motor_client.close()
+
+    return latencies, game.trigger_events, fake_serial
+
+
+def print_report(latencies, trigger_events, fake_serial, fps):
+    if not latencies:
+        print("No frames replayed")
+        return
+
+    total = sum(latencies)
+    ms = np.array(latencies) * 1000
+    print(f"\nReplayed {len(latencies)} frames ({len(latencies) / fps:.1f}s of footage) in {total:.2f}s")
+    print(f"  throughput: {len(latencies) / total:.1f} fps ({len(latencies) / fps / total:.1f}x real time)")
+    print(f"  latency ms: p50 {np.percentile(ms, 50):.2f}, p95 {np.percentile(ms, 95):.2f}, "
+          f"p99 {np.percentile(ms, 99):.2f}, max {ms.max():.2f}")
+
+    print(f"\nTrigger events: {len(trigger_events)}")
+    for event in trigger_events:
+        print(f"  frame {event.frame_number:5d}  t={event.elapsed_time:6.2f}s  "
+              f"area {int(event.total_area):6d}  groups {event.group_count}  "
+              f"track {event.track_id} aim ({event.aim_x:.0f}, {event.aim_y:.0f})")
+
+    sent = [cmd for _, cmd in fake_serial.commands]
+    bursts = sum(cmd.startswith("fire:") for cmd in sent)
+    print(f"Fake serial received {len(sent)} commands: {bursts} bursts of {SHOTS_PER_TRIGGER}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless replay of the motion detection game")
+    parser.add_argument("source", nargs="?", default="synthetic",
+                        help="video file, image directory or 'synthetic'")
+    parser.add_argument("--fps", type=float, default=20.0, help="frame rate used for the game clock")
+    parser.add_argument("--max-frames", type=int, default=None)
+    parser.add_argument("--output", default=None, help="write all annotated frames to this video")
+    parser.add_argument("--clips", default=None, help="write a clip around every trigger into this directory")
+    parser.add_argument("--background", choices=sorted(BACKENDS), default="mog2",
+                        help="background subtraction backend")
+    parser.add_argument("--no-hud", action="store_true", help="skip all HUD drawing")
+    parser.add_argument("--timing", metavar="BASENAME", default=None,
+                        help="time every stage and write BASENAME.csv and BASENAME.json")
+    args = parser.parse_args()
+    stage_timer.enabled = args.timing is not None
+
+    print(f"Replaying {args.source} at {args.fps:g} fps game time")
+    latencies, trigger_events, fake_serial = replay(args.source, args.fps, args.max_frames,
+                                                   args.output, args.clips, not args.no_hud,
+                                                   args.background)
+    print_report(latencies, trigger_events, fake_serial, args.fps)
+    if stage_timer.enabled:
+        stage_timer.print_summary()
+        stage_timer.export(args.timing)
+
+
+if __name__ == "__main__":
+    main()
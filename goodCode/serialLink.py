@@ -0,0 +1,253 @@
+import threading
+import time
+
+import serial
+import serial.tools.list_ports
+
+from motorClient import MotorClient, format_command, open_binary_client, parse_reply
+from stageTimer import stage_timer
+
+FALLBACK_PORT = "/dev/cu.usbmodem11401"
+READY_BANNER = "CircuitPython ready for commands"
+PING_SEQ = 0  # MotorClient numbers its commands from 1, so handshake pings never collide
+
+
+def find_xiao_port():
+    ports = serial.tools.list_ports.comports()
+    for port in ports:
+        if "usbmodem" in port.device.lower() or "2e8a" in str(port.hwid):
+            return port.device
+    return None
+
+
+def wait_until_ready(ser, timeout=8.0, ping_interval=0.5):
+    """Read until the firmware prints its ready banner or answers a ping; True if it did within timeout
+
+    Pings go out every ping_interval, so a board that is already running (and
+    printed its banner long ago) is found as quickly as one that just booted.
+    """
+    deadline = time.monotonic() + timeout
+    next_ping = time.monotonic()
+    while time.monotonic() < deadline:
+        if time.monotonic() >= next_ping:
+            ser.write((format_command(PING_SEQ, "ping") + "\r\n").encode("utf-8"))
+            next_ping = time.monotonic() + ping_interval
+        line = ser.readline().decode("utf-8", errors="ignore").strip()
+        if READY_BANNER in line or parse_reply(line) == (PING_SEQ, "pong"):
+            return True
+    return False
+
+
+def open_ready(port=None, baud=115200, ready_timeout=8.0, reset=True):
+    """Open the Pico's console port and return it once the firmware is ready for commands
+
+    With reset, Ctrl-C and Ctrl-D restart code.py first, as the old fixed
+    sleeps did; the handshake replaces the sleeps. Raises IOError if the
+    firmware never answers.
+    """
+    port = port or find_xiao_port() or FALLBACK_PORT
+    ser = serial.Serial(port, baud, timeout=0.1)
+    try:
+        if reset:
+            ser.write(b'\x03')
+            ser.write(b'\x04')
+        if not wait_until_ready(ser, ready_timeout):
+            raise IOError(f"No ready banner or ping reply from {port} within {ready_timeout:.1f}s")
+        # Late boot chatter and extra pongs would only show up as unmatched replies
+        time.sleep(0.05)
+        ser.reset_input_buffer()
+    except Exception:
+        ser.close()
+        raise
+    return ser
+
+
+class SerialLink:
+    """Keeps the Pico connected: readiness handshake, heartbeats and reconnects in the background
+
+    connect() makes the first attempt in the caller's thread; start() hands
+    over to a monitor thread. While the link is up, a "ping" goes out whenever
+    no reply has arrived for heartbeat_interval, so a busy link costs nothing.
+    After max_missed unanswered pings, or read errors from a port that went
+    away, the clients are dropped and the monitor reconnects with exponential
+    backoff. Callers never wait on any of it: command() and send_nowait()
+    simply report the link as down meanwhile.
+
+    on_connect(link) runs after every successful connect, from whichever
+    thread made it, so state the firmware forgets across a reset (such as an
+    armed flywheel) can be restored. on_telemetry(seq, values) receives the
+    firmware's status messages from whichever client carries them.
+    """
+
+    def __init__(self, port=None, baud=115200, use_binary=False, ready_timeout=8.0, reset=True,
+                 heartbeat_interval=2.0, heartbeat_timeout=1.0, max_missed=2,
+                 min_backoff=0.5, max_backoff=8.0, on_connect=None,
+                 on_telemetry=None):
+        self.port = port
+        self.baud = baud
+        self.use_binary = use_binary
+        self.ready_timeout = ready_timeout
+        self.reset = reset
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_missed = max_missed
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.on_connect = on_connect
+        self.on_telemetry = on_telemetry
+
+        self.lock = threading.Lock()
+        self.ser = None
+        self.console_client = None
+        self.motor_client = None
+        self.connected_port = None
+        self.stop_event = threading.Event()
+        self.monitor = None
+        self.connects = 0
+        self.disconnects = 0
+        self.heartbeats = 0
+        self.missed_heartbeats = 0
+
+    @property
+    def connected(self):
+        return self.motor_client is not None
+
+    def connect(self, quiet=False):
+        """One connection attempt, reset and handshake included; True on success"""
+        port = self.port or find_xiao_port() or FALLBACK_PORT
+        try:
+            ser = open_ready(port, self.baud, self.ready_timeout, self.reset)
+        except Exception as e:
+            if not quiet:
+                print(f"Motor connection to {port} failed: {e}")
+            return False
+
+        if self.stop_event.is_set():
+            # close() ran while we were connecting; don't bring up (and arm) a board nobody will stop
+            ser.close()
+            return False
+
+        console_client = MotorClient(ser, on_telemetry=self.on_telemetry)
+        motor_client = console_client
+        if self.use_binary:
+            motor_client = open_binary_client(console_client, port, on_telemetry=self.on_telemetry) or console_client
+        with self.lock:
+            self.ser = ser
+            self.console_client = console_client
+            self.motor_client = motor_client
+            self.connected_port = port
+        self.connects += 1
+        print(f"Connected to Xiao RP2040 on {port}")
+        if self.on_connect is not None:
+            self.on_connect(self)
+        return True
+
+    def start(self):
+        """Watch the link from a background thread from now on"""
+        self.monitor = threading.Thread(target=self._monitor, name="serial-link", daemon=True)
+        self.monitor.start()
+
+    def _monitor(self):
+        backoff = self.min_backoff
+        missed = 0
+        while not self.stop_event.is_set():
+            if not self.connected:
+                # Only the first failure of a retry run is worth printing
+                if self.connect(quiet=backoff > self.min_backoff):
+                    backoff = self.min_backoff
+                    missed = 0
+                else:
+                    self.stop_event.wait(backoff)
+                    backoff = min(backoff * 2, self.max_backoff)
+                continue
+
+            console_client = self.console_client
+            if console_client.read_errors or self.motor_client.read_errors:
+                print("Motor link lost (port error), reconnecting")
+                self._drop()
+                continue
+
+            last_reply = max(console_client.last_reply_time, self.motor_client.last_reply_time)
+            idle = time.monotonic() - last_reply
+            if idle < self.heartbeat_interval:
+                self.stop_event.wait(self.heartbeat_interval - idle)
+                continue
+
+            self.heartbeats += 1
+            start = stage_timer.start()
+            if console_client.command("ping", timeout=self.heartbeat_timeout) == "pong":
+                stage_timer.stop("serial_rtt", start)
+                missed = 0
+            else:
+                missed += 1
+                self.missed_heartbeats += 1
+                if missed >= self.max_missed:
+                    print(f"Motor link lost ({missed} heartbeats missed), reconnecting")
+                    self._drop()
+                    missed = 0
+
+    def _drop(self):
+        with self.lock:
+            ser, console_client, motor_client = self.ser, self.console_client, self.motor_client
+            self.ser = self.console_client = self.motor_client = None
+        self.disconnects += 1
+        self._close_clients(ser, console_client, motor_client)
+
+    def _close_clients(self, ser, console_client, motor_client):
+        if motor_client is not None and motor_client is not console_client:
+            motor_client.close()
+            motor_client.ser.close()
+        if console_client is not None:
+            console_client.close()
+        if ser is not None:
+            try:
+                ser.close()
+            except Exception:
+                pass
+
+    def command(self, cmd, timeout=0.5):
+        """Send a command and wait for its reply; "Motor not connected" while the link is down
+
+        Answered round trips are timed as the serial_rtt stage, as are heartbeats.
+        """
+        motor_client = self.motor_client
+        if motor_client is None:
+            return "Motor not connected"
+        start = stage_timer.start()
+        reply = motor_client.command(cmd, timeout=timeout)
+        if reply != "No response":
+            stage_timer.stop("serial_rtt", start)
+        return reply
+
+    def send(self, cmd):
+        """Queue a command and return a Future for its reply, or None while the link is down"""
+        motor_client = self.motor_client
+        if motor_client is None:
+            return None
+        return motor_client.send(cmd)
+
+    def send_nowait(self, cmd):
+        """Queue a command if the link is up; returns False if it had to be dropped"""
+        motor_client = self.motor_client
+        if motor_client is None:
+            return False
+        motor_client.send_nowait(cmd)
+        return True
+
+    def close(self, stop_command="stop"):
+        """Stop the monitor, send stop_command if connected, and close the port"""
+        self.stop_event.set()
+        if self.monitor is not None:
+            self.monitor.join(timeout=self.heartbeat_timeout + 1.0)
+        if self.connected and stop_command:
+            self.command(stop_command, timeout=2.0)  # Cancel queued shots and ensure motor is stopped
+        with self.lock:
+            ser, console_client, motor_client = self.ser, self.console_client, self.motor_client
+            self.ser = self.console_client = self.motor_client = None
+        if motor_client is not None and motor_client is not console_client:
+            console_client.command("binary:off", timeout=1.0)
+        self._close_clients(ser, console_client, motor_client)
+
+    def print_stats(self):
+        print(f"Serial link: {self.connects} connects, {self.disconnects} disconnects, "
+              f"{self.heartbeats} heartbeats, {self.missed_heartbeats} missed")
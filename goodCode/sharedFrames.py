@@ -0,0 +1,211 @@
+import multiprocessing
+import os
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from frameSource import open_frames
+
+# Per-slot header fields, each one int64/float64 wide
+HEADER_FIELDS = 4  # sequence, frame number, capture time, pins
+GLOBAL_FIELDS = 2  # latest slot, frames published
+
+
+class SharedFrame:
+    """A reader's handle on one slot: a NumPy view into shared memory, not a copy
+
+    The view is only guaranteed while the frame is pinned (acquire_latest()
+    pins, release() unpins); after release() the slot can be overwritten,
+    which is_stale() reports.
+    """
+
+    def __init__(self, pool, slot, sequence, frame_number, capture_time, pinned):
+        self.pool = pool
+        self.slot = slot
+        self.sequence = sequence
+        self.frame_number = frame_number
+        self.capture_time = capture_time
+        self.pinned = pinned
+        self.frame = pool.frames[slot]
+
+    def is_stale(self):
+        """True if the writer has started reusing this slot since the frame was taken"""
+        return int(self.pool.sequences[self.slot]) != self.sequence
+
+
+class SharedFramePool:
+    """Fixed pool of frame slots in one shared-memory block, handed between processes
+
+    The capture side calls begin_write() for a free slot, fills the returned
+    view (cv2.resize(..., dst=view) avoids even the copy) and commit_write()s
+    it. Readers call acquire_latest() for a pinned view of the newest frame
+    and release() it when done. The writer never picks a pinned slot or the
+    latest one, so pinned views cannot change under a reader; with every slot
+    pinned the new frame is dropped and counted instead.
+
+    Each slot has a sequence number that is odd while being written and even
+    once committed, so a frame kept past release() can be checked with
+    is_stale(). The lock only guards the small header updates, never a frame copy.
+    Pass the pool to a multiprocessing.Process as an argument; the child
+    attaches to the same memory.
+    """
+
+    def __init__(self, slots=4, shape=(720, 1280, 3)):
+        self.slots = slots
+        self.shape = tuple(shape)
+        frame_bytes = int(np.prod(self.shape))
+        self.header_bytes = 8 * (GLOBAL_FIELDS + HEADER_FIELDS * slots)
+        self.shm = shared_memory.SharedMemory(create=True, size=self.header_bytes + frame_bytes * slots)
+        self.owner_pid = os.getpid()
+        self.condition = multiprocessing.Condition()
+        self.writer_drops = multiprocessing.Value("q", 0, lock=False)
+        self._map()
+        self.header[:] = 0
+        self.latest[0] = -1
+
+    def _map(self):
+        buf = self.shm.buf
+        self.header = np.ndarray((GLOBAL_FIELDS + HEADER_FIELDS * self.slots,), np.int64, buffer=buf)
+        self.latest = self.header[0:1]
+        self.published = self.header[1:2]
+        base = GLOBAL_FIELDS
+        self.sequences = self.header[base:base + self.slots]
+        self.frame_numbers = self.header[base + self.slots:base + 2 * self.slots]
+        self.capture_times = np.ndarray((self.slots,), np.float64, buffer=buf,
+                                        offset=8 * (base + 2 * self.slots))
+        self.pins = self.header[base + 3 * self.slots:base + 4 * self.slots]
+        self.frames = np.ndarray((self.slots,) + self.shape, np.uint8, buffer=buf, offset=self.header_bytes)
+
+    def __getstate__(self):
+        return {"slots": self.slots, "shape": self.shape, "header_bytes": self.header_bytes,
+                "name": self.shm.name, "condition": self.condition, "writer_drops": self.writer_drops}
+
+    def __setstate__(self, state):
+        self.slots = state["slots"]
+        self.shape = state["shape"]
+        self.header_bytes = state["header_bytes"]
+        self.condition = state["condition"]
+        self.writer_drops = state["writer_drops"]
+        self.shm = shared_memory.SharedMemory(name=state["name"])
+        self.owner_pid = None
+        self._map()
+
+    def begin_write(self):
+        """Claim the oldest free slot; returns (slot, writable view) or (None, None) if every slot is pinned"""
+        with self.condition:
+            latest = int(self.latest[0])
+            free = [s for s in range(self.slots) if self.pins[s] == 0 and s != latest]
+            if not free:
+                self.writer_drops.value += 1
+                return None, None
+            slot = min(free, key=lambda s: self.frame_numbers[s])
+            self.sequences[slot] += 1  # odd: being written
+        return slot, self.frames[slot]
+
+    def commit_write(self, slot, capture_time=None):
+        """Publish a slot filled after begin_write() and wake waiting readers"""
+        with self.condition:
+            self.published[0] += 1
+            self.frame_numbers[slot] = self.published[0]
+            self.capture_times[slot] = time.monotonic() if capture_time is None else capture_time
+            self.sequences[slot] += 1  # even: stable
+            self.latest[0] = slot
+            self.condition.notify_all()
+
+    def write(self, frame, capture_time=None):
+        """Copy a frame into the pool; returns its frame number, or None if it had to be dropped"""
+        slot, view = self.begin_write()
+        if slot is None:
+            return None
+        np.copyto(view, frame)
+        self.commit_write(slot, capture_time)
+        return int(self.frame_numbers[slot])
+
+    def _take_latest(self, after):
+        slot = int(self.latest[0])
+        if slot < 0 or self.frame_numbers[slot] <= after:
+            return None
+        self.pins[slot] += 1
+        return SharedFrame(self, slot, int(self.sequences[slot]), int(self.frame_numbers[slot]),
+                           float(self.capture_times[slot]), True)
+
+    def acquire_latest(self, after=0, timeout=None):
+        """Pin and return the newest frame numbered above `after`, waiting up to timeout; None on timeout"""
+        with self.condition:
+            frame = self._take_latest(after)
+            if frame is None and self.condition.wait_for(lambda: self._newer_than(after), timeout):
+                frame = self._take_latest(after)
+            return frame
+
+    def _newer_than(self, after):
+        slot = int(self.latest[0])
+        return slot >= 0 and self.frame_numbers[slot] > after
+
+    def release(self, frame):
+        if frame is not None and frame.pinned:
+            with self.condition:
+                self.pins[frame.slot] -= 1
+            frame.pinned = False
+
+    def close(self):
+        """Detach; the creating process also frees the memory
+
+        Forked children inherit the pool rather than attaching, so ownership
+        goes by pid. Release every SharedFrame first, their views pin the block.
+        """
+        self.header = self.latest = self.published = self.sequences = None
+        self.frame_numbers = self.capture_times = self.pins = self.frames = None
+        self.shm.close()
+        if self.owner_pid == os.getpid():
+            self.shm.unlink()
+
+
+def capture_process(source, pool, stop_event, max_frames=None, done_event=None, seed=0):
+    """Capture loop for a separate process: resize every frame straight into a pool slot
+
+    done_event is set once the source runs out, so readers waiting on the
+    pool know no newer frame is coming.
+    """
+    size = (pool.shape[1], pool.shape[0])
+    try:
+        for i, frame in enumerate(open_frames(source, seed=seed)):
+            if stop_event.is_set() or (max_frames is not None and i >= max_frames):
+                break
+            capture_time = time.monotonic()
+            slot, view = pool.begin_write()
+            if slot is None:
+                continue
+            if frame.shape == view.shape:
+                np.copyto(view, frame)
+            else:
+                cv2.resize(frame, size, dst=view)
+            pool.commit_write(slot, capture_time)
+    except Exception as e:
+        print(f"Capture from {source} failed: {e}")
+    finally:
+        pool.close()
+        if done_event is not None:
+            done_event.set()
+
+
+def pool_frames(pool, stop_event, done_event, timeout=0.5):
+    """Newest frame of the pool each time, pinned until the next one is asked for
+
+    Frames that arrive while the caller is busy are skipped, not queued.
+    Stops once done_event is set and nothing newer is left.
+    """
+    last = 0
+    while not stop_event.is_set():
+        finished = done_event.is_set()  # checked first: a frame committed before it is still found
+        shared = pool.acquire_latest(after=last, timeout=timeout)
+        if shared is None:
+            if finished:
+                break
+            continue
+        last = shared.frame_number
+        try:
+            yield shared.frame
+        finally:
+            pool.release(shared)
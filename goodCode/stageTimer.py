@@ -0,0 +1,121 @@
+import csv
+import json
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# Histogram bucket edges for exports, in milliseconds
+HISTOGRAM_EDGES_MS = [0, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, float("inf")]
+
+
+class StageTimer:
+    """Rolling per-stage durations from monotonic_ns counters
+
+    Wrap a stage as `start = timer.start()` ... `timer.stop("name", start)`.
+    While disabled, start() returns 0 and stop() returns straight away, so the
+    hooks can stay in the hot loop. Each stage keeps its last `window` samples.
+    Stages can be recorded from any thread, e.g. a serial reply callback.
+    """
+
+    def __init__(self, enabled=False, window=500):
+        self.enabled = enabled
+        self.window = window
+        self.samples = {}
+        self.counts = {}
+        self.lock = threading.Lock()
+
+    def start(self):
+        return time.monotonic_ns() if self.enabled else 0
+
+    def stop(self, name, start):
+        if not start:
+            return
+        self.record(name, time.monotonic_ns() - start)
+
+    def record(self, name, duration_ns):
+        with self.lock:
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = self.samples[name] = deque(maxlen=self.window)
+            samples.append(duration_ns)
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+    def reset(self):
+        with self.lock:
+            self.samples = {}
+            self.counts = {}
+
+    def stage_names(self):
+        with self.lock:
+            return list(self.samples)
+
+    def _snapshot_ms(self, name):
+        with self.lock:
+            return np.array(self.samples[name], dtype=np.float64) / 1e6, self.counts[name]
+
+    def stats(self, name):
+        """Count, mean, p50, p95, p99 and max in milliseconds over the rolling window"""
+        ms, count = self._snapshot_ms(name)
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+        return {
+            "count": count,
+            "mean_ms": float(ms.mean()),
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+            "max_ms": float(ms.max()),
+        }
+
+    def histogram(self, name):
+        ms, _ = self._snapshot_ms(name)
+        counts, _ = np.histogram(ms, bins=HISTOGRAM_EDGES_MS)
+        return [int(c) for c in counts]
+
+    def hud_line(self, names=None):
+        """Short "stage p50/p95" summary for drawing on the frame"""
+        parts = []
+        for name in names or self.stage_names():
+            if self.samples.get(name):
+                stats = self.stats(name)
+                parts.append(f"{name} {stats['p50_ms']:.1f}/{stats['p95_ms']:.1f}")
+        return "ms p50/p95: " + "  ".join(parts)
+
+    def print_summary(self):
+        print("\nStage timings (ms, rolling window):")
+        for name in self.stage_names():
+            stats = self.stats(name)
+            print(f"  {name:12s} n={stats['count']:6d}  p50 {stats['p50_ms']:7.2f}  p95 {stats['p95_ms']:7.2f}  "
+                  f"p99 {stats['p99_ms']:7.2f}  max {stats['max_ms']:7.2f}")
+
+    def export_csv(self, path):
+        """One row per stage with its percentiles, then one column per histogram bucket"""
+        bucket_names = [f"le_{edge:g}ms" for edge in HISTOGRAM_EDGES_MS[1:]]
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["stage", "count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"] + bucket_names)
+            for name in self.stage_names():
+                stats = self.stats(name)
+                writer.writerow([name] + [round(v, 4) for v in stats.values()] + self.histogram(name))
+
+    def export_json(self, path):
+        report = {
+            "histogram_edges_ms": HISTOGRAM_EDGES_MS[:-1] + ["inf"],
+            "stages": {name: dict(self.stats(name), histogram=self.histogram(name))
+                       for name in self.stage_names()},
+        }
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+
+    def export(self, basename):
+        """Write basename.csv and basename.json if anything was timed"""
+        if not self.samples:
+            return
+        self.export_csv(basename + ".csv")
+        self.export_json(basename + ".json")
+        print(f"Stage timings written to {basename}.csv and {basename}.json")
+
+
+# Shared by every stage of the pipeline; motionDetection.py and replay.py switch it on
+stage_timer = StageTimer()
@@ -0,0 +1,82 @@
+import threading
+import time
+
+
+class Component:
+    """One piece of the application being brought up on its own thread"""
+
+    def __init__(self, name, init_fn):
+        self.name = name
+        self.init_fn = init_fn
+        self.value = None
+        self.error = None
+        self.started_at = None
+        self.ready_at = None
+        self.ready = threading.Event()
+
+    @property
+    def duration(self):
+        if self.ready_at is None:
+            return None
+        return self.ready_at - self.started_at
+
+
+class Startup:
+    """Initializes named components concurrently and reports when each is ready
+
+    add() only registers an init function; start() runs them all at once, one
+    thread each. A component is ready when its function returns (its value) or
+    raises (value None, error kept), so callers can wait() on what they need
+    first and poll is_ready() for the rest instead of blocking on them.
+    """
+
+    def __init__(self):
+        self.components = {}
+        self.start_time = None
+
+    def add(self, name, init_fn):
+        self.components[name] = Component(name, init_fn)
+
+    def start(self):
+        self.start_time = time.monotonic()
+        for component in self.components.values():
+            threading.Thread(target=self._run, args=(component,), name=f"init-{component.name}",
+                             daemon=True).start()
+
+    def _run(self, component):
+        component.started_at = time.monotonic()
+        try:
+            component.value = component.init_fn()
+        except Exception as e:
+            component.error = e
+        component.ready_at = time.monotonic()
+        component.ready.set()
+        if component.error is not None:
+            print(f"[startup] {component.name} failed after {component.duration:.2f}s: {component.error}")
+        else:
+            print(f"[startup] {component.name} ready in {component.duration:.2f}s")
+
+    def wait(self, name, timeout=None):
+        """Block until the component is ready and return its value, None if it failed or timed out"""
+        component = self.components[name]
+        component.ready.wait(timeout)
+        return component.value
+
+    def is_ready(self, name):
+        return self.components[name].ready.is_set()
+
+    def value(self, name):
+        """The component's value if it is ready and succeeded, without waiting"""
+        component = self.components[name]
+        return component.value if component.ready.is_set() else None
+
+    def print_report(self):
+        print("\nStartup:")
+        for component in self.components.values():
+            if not component.ready.is_set():
+                status = "still starting"
+            elif component.error is not None:
+                status = f"failed after {component.duration:.2f}s ({component.error})"
+            else:
+                status = f"ready in {component.duration:.2f}s"
+            print(f"  {component.name:8s} {status}")
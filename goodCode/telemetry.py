@@ -0,0 +1,112 @@
+import csv
+import threading
+import time
+from collections import deque
+
+from protocol import TELEMETRY_FIELDS
+
+CSV_COLUMNS = ["host_time", "board_time", "event", "seq"] + list(TELEMETRY_FIELDS)
+
+
+class TelemetryCollector:
+    """Rolling buffer of the firmware's status messages plus host-side event marks
+
+    Pass add as the serial link's on_telemetry handler and call mark() when
+    something happens on the vision side, e.g. a trigger. Both are stamped
+    with time.monotonic(), the clock the capture pipeline and recorder use,
+    so the CSV puts actuation and vision timing on one axis. board_time maps
+    the board's clock onto it: the smallest host-minus-board difference seen
+    is the status message with the least transport delay, and serves as the
+    clock offset.
+    """
+
+    def __init__(self, capacity=6000, clock=time.monotonic):
+        self.clock = clock
+        self.samples = deque(maxlen=capacity)
+        self.events = deque(maxlen=capacity)
+        self.lock = threading.Lock()
+        self.received = 0
+        self.dropped = 0
+        self.last_seq = None
+        self.offset = None
+
+    def add(self, seq, values):
+        host_time = self.clock()
+        sample = dict(zip(TELEMETRY_FIELDS, values), seq=seq, host_time=host_time)
+        with self.lock:
+            if self.last_seq is not None:
+                # seq is a u16 counter on the board, and restarts at 0 after a reset
+                gap = (seq - self.last_seq - 1) & 0xFFFF
+                if 0 < gap < 1000:
+                    self.dropped += gap
+            self.last_seq = seq
+            offset = host_time - sample["board_ms"] / 1000.0
+            if self.offset is None or offset < self.offset:
+                self.offset = offset
+            self.samples.append(sample)
+            self.received += 1
+
+    def mark(self, event, timestamp=None):
+        """Record a host-side event, at timestamp (time.monotonic()) or now"""
+        with self.lock:
+            self.events.append({"host_time": self.clock() if timestamp is None else timestamp, "event": event})
+
+    def latest(self):
+        with self.lock:
+            return self.samples[-1] if self.samples else None
+
+    def rows(self):
+        """Samples and events merged in host time order, with board_time filled in"""
+        with self.lock:
+            rows = [dict(sample) for sample in self.samples] + [dict(event) for event in self.events]
+            offset = self.offset
+        for row in rows:
+            if "board_ms" in row and offset is not None:
+                row["board_time"] = round(row["board_ms"] / 1000.0 + offset, 6)
+            row["host_time"] = round(row["host_time"], 6)
+        rows.sort(key=lambda row: row["host_time"])
+        return rows
+
+    def export_csv(self, path):
+        rows = self.rows()
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+        return len(rows)
+
+    def print_summary(self):
+        with self.lock:
+            samples = list(self.samples)
+        if not samples:
+            print("Telemetry: nothing received")
+            return
+        duration = samples[-1]["host_time"] - samples[0]["host_time"]
+        rate = (len(samples) - 1) / duration if duration > 0 else 0.0
+        loop_max = max(sample["loop_max_us"] for sample in samples)
+        loop_avg = sum(sample["loop_avg_us"] for sample in samples) / len(samples)
+        queue_max = max(sample["queue_depth"] for sample in samples)
+        print(f"Telemetry: {self.received} status messages at {rate:.1f} Hz, {self.dropped} dropped; "
+              f"board loop avg {loop_avg:.0f} us, max {loop_max} us, queue depth max {queue_max}")
+
+
+if __name__ == "__main__":
+    # Feed the collector from a fake board stream, including a drop and a trigger mark
+    from protocol import format_telemetry_line, parse_telemetry_line
+
+    collector = TelemetryCollector()
+    for seq in range(20):
+        if seq == 7:
+            continue
+        values = (1000 + seq * 50, 400, 120, 900 + seq, seq % 3, int(seq > 10), seq * 25, 20 if seq > 10 else 10, 90)
+        collector.add(*parse_telemetry_line(format_telemetry_line(seq, values)))
+        if seq == 10:
+            collector.mark("trigger")
+        time.sleep(0.005)
+
+    assert collector.received == 19 and collector.dropped == 1
+    rows = collector.rows()
+    assert [row["event"] for row in rows if "event" in row] == ["trigger"]
+    assert all(a["host_time"] <= b["host_time"] for a, b in zip(rows, rows[1:]))
+    collector.print_summary()
+    print(f"{collector.export_csv('telemetry_demo.csv')} rows written to telemetry_demo.csv")
@@ -0,0 +1,197 @@
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """Intersection over union of every (x, y, w, h) box in boxes_a against every box in boxes_b"""
+    a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float64).reshape(-1, 4)
+    ax2, ay2 = a[:, 0] + a[:, 2], a[:, 1] + a[:, 3]
+    bx2, by2 = b[:, 0] + b[:, 2], b[:, 1] + b[:, 3]
+    iw = np.clip(np.minimum(ax2[:, None], bx2) - np.maximum(a[:, 0:1], b[:, 0]), 0, None)
+    ih = np.clip(np.minimum(ay2[:, None], by2) - np.maximum(a[:, 1:2], b[:, 1]), 0, None)
+    intersection = iw * ih
+    union = (a[:, 2] * a[:, 3])[:, None] + b[:, 2] * b[:, 3] - intersection
+    return np.where(union > 0, intersection / np.maximum(union, 1e-9), 0.0)
+
+
+def greedy_assignment(cost, max_cost):
+    """Cheapest pairs first, each row and column used once; (rows, cols) under max_cost"""
+    rows, cols = np.nonzero(cost < max_cost)
+    order = np.argsort(cost[rows, cols], kind="stable")
+    used_rows = set()
+    used_cols = set()
+    matched_rows = []
+    matched_cols = []
+    for i in order:
+        row, col = rows[i], cols[i]
+        if row in used_rows or col in used_cols:
+            continue
+        used_rows.add(row)
+        used_cols.add(col)
+        matched_rows.append(row)
+        matched_cols.append(col)
+    return np.array(matched_rows, dtype=int), np.array(matched_cols, dtype=int)
+
+
+def optimal_assignment(cost, max_cost):
+    """Hungarian assignment minimising the total cost; (rows, cols) under max_cost"""
+    # Gated pairs get a cost no real pair can reach, then are thrown away
+    gated = np.where(cost < max_cost, cost, max_cost * 10)
+    rows, cols = linear_sum_assignment(gated)
+    keep = gated[rows, cols] < max_cost
+    return rows[keep], cols[keep]
+
+
+class Track:
+    """One moving target followed across frames by a constant-velocity Kalman filter
+
+    The state is the full-resolution centre and its velocity in pixels per
+    second; the box size and area follow the latest detections directly.
+    """
+
+    def __init__(self, track_id, group, timestamp, position_noise, velocity_noise):
+        self.track_id = track_id
+        self.state = np.array([group.center_x, group.center_y, 0.0, 0.0])
+        self.covariance = np.diag([position_noise ** 2, position_noise ** 2,
+                                   velocity_noise ** 2, velocity_noise ** 2])
+        self.timestamp = timestamp
+        self.size = np.array(group.bbox[2:], dtype=np.float64)
+        self.area = group.area
+        self.depth = group.depth
+        self.hits = 1
+        self.misses = 0
+        self.first_seen = timestamp
+        self.last_fire_time = None
+
+    @property
+    def center(self):
+        return self.state[0], self.state[1]
+
+    @property
+    def velocity(self):
+        return self.state[2], self.state[3]
+
+    @property
+    def bbox(self):
+        """Current (x, y, w, h) around the filtered centre"""
+        w, h = self.size
+        return (self.state[0] - w / 2, self.state[1] - h / 2, w, h)
+
+    def predict(self, timestamp, acceleration_noise):
+        """Move the filter forward to timestamp"""
+        dt = timestamp - self.timestamp
+        if dt <= 0:
+            return
+        transition = np.eye(4)
+        transition[0, 2] = transition[1, 3] = dt
+        # Piecewise-constant white acceleration
+        q = acceleration_noise ** 2
+        dt2, dt3, dt4 = dt * dt, dt ** 3, dt ** 4
+        noise = q * np.array([[dt4 / 4, 0, dt3 / 2, 0],
+                              [0, dt4 / 4, 0, dt3 / 2],
+                              [dt3 / 2, 0, dt2, 0],
+                              [0, dt3 / 2, 0, dt2]])
+        self.state = transition @ self.state
+        self.covariance = transition @ self.covariance @ transition.T + noise
+        self.timestamp = timestamp
+
+    def update(self, group, measurement_noise):
+        """Correct the filter with a detection already predicted to this frame's time"""
+        residual = np.array([group.center_x, group.center_y]) - self.state[:2]
+        innovation = self.covariance[:2, :2] + np.eye(2) * measurement_noise ** 2
+        gain = self.covariance[:, :2] @ np.linalg.inv(innovation)
+        self.state = self.state + gain @ residual
+        self.covariance = self.covariance - gain @ self.covariance[:2, :]
+        self.size = np.array(group.bbox[2:], dtype=np.float64)
+        self.area = group.area
+        self.depth = group.depth
+        self.hits += 1
+        self.misses = 0
+
+    def position_at(self, timestamp):
+        """Where the target will be at timestamp if it keeps its current velocity"""
+        dt = timestamp - self.timestamp
+        return (self.state[0] + self.state[2] * dt, self.state[1] + self.state[3] * dt)
+
+
+class MultiObjectTracker:
+    """Gives motion groups persistent track IDs from frame to frame
+
+    Each frame every track is predicted to the frame's time and matched to the
+    new groups by IoU of the predicted and detected boxes. Fast movers at a low
+    frame rate may not overlap their previous box at all, so a centre within
+    max_distance also counts. The Hungarian solver from scipy is used when it
+    is installed, otherwise a greedy cheapest-first match; both are fine for
+    the handful of targets in a game.
+
+    A track is confirmed after min_hits detections and dropped after
+    max_misses frames without one. Groups get their track's ID in track_id.
+    """
+
+    def __init__(self, iou_threshold=0.1, max_distance=200, min_hits=2, max_misses=5,
+                 measurement_noise=15.0, initial_velocity_noise=500.0, acceleration_noise=1500.0,
+                 use_hungarian=True):
+        self.iou_threshold = iou_threshold
+        self.max_distance = max_distance
+        self.min_hits = min_hits
+        self.max_misses = max_misses
+        self.measurement_noise = measurement_noise
+        self.initial_velocity_noise = initial_velocity_noise
+        self.acceleration_noise = acceleration_noise
+        self.use_hungarian = use_hungarian and linear_sum_assignment is not None
+        self.tracks = []
+        self.next_id = 1
+
+    def reset(self):
+        self.tracks = []
+
+    def association_cost(self, groups):
+        """1 - IoU, plus normalised centre distance to break ties; pairs failing both gates cost >= 1"""
+        track_boxes = [track.bbox for track in self.tracks]
+        group_boxes = [group.bbox for group in groups]
+        overlap = iou_matrix(track_boxes, group_boxes)
+
+        track_centers = np.array([track.center for track in self.tracks])
+        group_centers = np.array([(group.center_x, group.center_y) for group in groups], dtype=np.float64)
+        distance = np.hypot(track_centers[:, None, 0] - group_centers[:, 0],
+                            track_centers[:, None, 1] - group_centers[:, 1]) / self.max_distance
+
+        cost = (1.0 - overlap) * 0.5 + np.minimum(distance, 1.0) * 0.5
+        gated = (overlap < self.iou_threshold) & (distance > 1.0)
+        return np.where(gated, 1.0, cost)
+
+    def update(self, groups, timestamp):
+        """Track this frame's groups; returns the confirmed tracks seen in this frame"""
+        for track in self.tracks:
+            track.predict(timestamp, self.acceleration_noise)
+
+        matched_tracks = set()
+        matched_groups = set()
+        if self.tracks and groups:
+            cost = self.association_cost(groups)
+            assign = optimal_assignment if self.use_hungarian else greedy_assignment
+            for row, col in zip(*assign(cost, 1.0)):
+                self.tracks[row].update(groups[col], self.measurement_noise)
+                groups[col].track_id = self.tracks[row].track_id
+                matched_tracks.add(row)
+                matched_groups.add(col)
+
+        for i, track in enumerate(self.tracks):
+            if i not in matched_tracks:
+                track.misses += 1
+        self.tracks = [track for track in self.tracks if track.misses <= self.max_misses]
+
+        for i, group in enumerate(groups):
+            if i not in matched_groups:
+                track = Track(self.next_id, group, timestamp, self.measurement_noise,
+                              self.initial_velocity_noise)
+                group.track_id = track.track_id
+                self.tracks.append(track)
+                self.next_id += 1
+
+        return [track for track in self.tracks if track.misses == 0 and track.hits >= self.min_hits]